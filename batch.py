@@ -0,0 +1,303 @@
+# batch.py
+"""
+GUI 없이 여러 사건을 한 번에 위키로 생성하는 배치 CLI입니다.
+
+입력 JSONL의 각 줄은 {"title": ..., "text": ...} (선택: "id") 형태입니다.
+summarize_event → expand_event_to_wiki → generate_wiki_html 파이프라인을 사건 단위로 병렬 실행하고,
+출력 폴더를 wiki_site 형식의 사이트로 씁니다: 사건마다 <id>.html 과 data/<id>.json(키워드, 섹션 원문),
+공유 스타일시트 wiki.css, 실행이 끝날 때 갱신되는 문서 목록 index.html.
+완료된 사건은 체크포인트 저널(journal.jsonl)에 기록되므로, 중단된 실행을 다시 돌리면 끝난 사건은 건너뜁니다.
+
+사용법:
+    python batch.py events.jsonl --out batch_output --workers 4 --concurrency 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import hedging
+import llm
+import llm_client
+import llm_to_wiki
+import metrics
+import scheduler
+import singleflight
+import wiki_site
+
+STAGES = ("summarize", "expand", "render")
+
+def event_id(event):
+    """이벤트의 "id"가 있으면 그대로, 없으면 (제목, 텍스트) 해시로 안정적인 id를 만듭니다."""
+    if event.get("id"):
+        return str(event["id"])
+    digest = hashlib.sha1(f'{event["title"]}\n{event["text"]}'.encode("utf-8")).hexdigest()
+    return digest[:16]
+
+def load_events(path):
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if not event.get("title") or not event.get("text"):
+                raise ValueError(f"{path}:{line_no}: title과 text가 모두 필요합니다.")
+            events.append(event)
+    return events
+
+def load_journal(path):
+    """저널에서 이미 완료된 사건 id 집합을 읽습니다. 마지막 줄이 중간에 끊겼으면 무시합니다."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("status") == "done":
+                done.add(entry["id"])
+    return done
+
+class Journal:
+    """완료/실패한 사건을 한 줄씩 추가하고 바로 디스크에 반영하는 체크포인트 저널"""
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+def process_event(event, out_dir, api_key, max_tokens=2048, concurrency=4,
+                  article_max_tokens=llm_to_wiki.DEFAULT_MAX_TOKENS, section_batches=None):
+    """
+    사건 하나를 생성하고 (출력 파일 경로, 단계별 소요 시간)을 반환합니다.
+    section_batches가 주어지면 구조화 출력 모드(JSON 키워드 + section_batches번의 묶음 요청)로 생성합니다.
+    LLM 호출은 배치 우선순위로 스케줄러에 들어가므로, 같은 프로세스의 GUI 요청이 먼저 처리됩니다.
+    실행 기록(단계/호출별 시간, 토큰, 캐시 적중, 재시도)은 <출력 폴더>/runs.jsonl에 남습니다.
+    """
+    run = metrics.RunMetrics(event["title"])
+    error = None
+    try:
+        with scheduler.priority(scheduler.PRIORITY_BATCH), metrics.activate(run):
+            output_file = _process_event(event, out_dir, api_key, max_tokens, concurrency, article_max_tokens,
+                                         section_batches, run)
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        run.finish(error=error)
+        metrics.write_run_log(run, out_dir)
+    return output_file, dict(run.stages)
+
+def _process_event(event, out_dir, api_key, max_tokens, concurrency, article_max_tokens, section_batches, run):
+    slug = wiki_site.slugify(event_id(event))
+    # 이전 실행에서 저장된 글이 있으면 입력이 같은 키워드/카테고리는 다시 생성하지 않음
+    previous = wiki_site.find_article(out_dir, slug)
+    keywords_input = llm.keywords_input_hash(event["text"], max_tokens)
+
+    # id가 달라도 설명이 같은 사건을 다른 작업 스레드가 생성 중이면 그 결과를 함께 씀 (제목은 생성 결과에 영향 없음)
+    key = singleflight.make_key("batch", event["text"], max_tokens, article_max_tokens, section_batches)
+    try:
+        (keywords_dict, detailed_articles, article_inputs), shared = singleflight.group("article").run(
+            key, lambda: _generate(event, api_key, previous, keywords_input, max_tokens, concurrency,
+                                   article_max_tokens, section_batches, run)
+        )
+    except llm_to_wiki.ExpansionError as e:
+        # 성공한 카테고리는 저장해 두어, 다음 실행에서는 실패한 카테고리만 다시 생성
+        wiki_site.publish(out_dir, slug, event["title"], event["text"], e.keywords, e.partial,
+                          previous=previous, keywords_input=keywords_input, article_inputs=e.article_inputs)
+        raise
+    if shared:
+        print(f"[합침] {event_id(event)} {event['title']}: 설명이 같은 사건의 생성 결과를 함께 사용")
+
+    with run.stage("render"):
+        return wiki_site.publish(out_dir, slug, event["title"], event["text"], keywords_dict, detailed_articles,
+                                 previous=previous, keywords_input=keywords_input, article_inputs=article_inputs)
+
+def _generate(event, api_key, previous, keywords_input, max_tokens, concurrency, article_max_tokens, section_batches,
+              run):
+    """키워드 요약과 카테고리별 서술. (키워드, 카테고리별 문서, 카테고리별 입력 해시)를 반환합니다."""
+    with run.stage("summarize"):
+        if previous and previous.get("keywords_input") == keywords_input:
+            keywords_dict = previous["keywords"]
+        elif section_batches:
+            keywords_dict = llm.summarize_event_structured(event["text"], api_type="Gemini", api_key=api_key,
+                                                           max_tokens=max_tokens)
+        else:
+            keywords_dict = llm.summarize_event(event["text"], api_type="Gemini", api_key=api_key, max_tokens=max_tokens)
+
+    with run.stage("expand"):
+        detailed_articles, article_inputs, _ = llm_to_wiki.expand_event_incremental(
+            event["text"], keywords_dict, api_key, previous=previous, max_tokens=article_max_tokens,
+            concurrency=concurrency, section_batches=section_batches
+        )
+    return keywords_dict, detailed_articles, article_inputs
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def print_summary(stage_timings, completed, failed, elapsed):
+    print()
+    print(f"완료 {completed}건, 실패 {failed}건, 경과 {elapsed:.1f}s, "
+          f"처리량 {completed / elapsed * 60 if elapsed else 0:.2f} events/min")
+    print(f"{'stage':<10} {'count':>6} {'total(s)':>10} {'mean(s)':>9} {'p50(s)':>8} {'p95(s)':>8} {'max(s)':>8}")
+    for stage in STAGES:
+        values = stage_timings[stage]
+        if not values:
+            continue
+        print(f"{stage:<10} {len(values):>6} {sum(values):>10.2f} {sum(values) / len(values):>9.2f} "
+              f"{percentile(values, 50):>8.2f} {percentile(values, 95):>8.2f} {max(values):>8.2f}")
+    stats = hedging.get_hedger().stats()
+    if stats["hedges"] or stats["failovers"]:
+        print(f"헤징 {stats['hedges']}회 (보조 요청이 이김 {stats['hedge_wins']}회), 장애 조치 {stats['failovers']}회")
+    shared = {name: group["shared"] for name, group in singleflight.stats().items()}
+    if any(shared.values()):
+        print(f"실행 중인 같은 요청과 합침: LLM 호출 {shared.get('llm', 0)}회, 사건 {shared.get('article', 0)}건")
+
+def run_batch(events, out_dir, api_key, workers=4, concurrency=4, max_tokens=2048, journal_path=None,
+              article_max_tokens=llm_to_wiki.DEFAULT_MAX_TOKENS, section_batches=None):
+    """
+    events를 workers개 스레드로 병렬 처리합니다. 저널에 완료로 기록된 사건은 건너뜁니다.
+    Returns:
+        (완료 수, 실패 수)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    journal_path = journal_path or os.path.join(out_dir, "journal.jsonl")
+    done_ids = load_journal(journal_path)
+    todo = []
+    seen = set()
+    for event in events:
+        eid = event_id(event)
+        if eid in done_ids or eid in seen:
+            continue
+        seen.add(eid)
+        todo.append(event)
+    print(f"전체 {len(events)}건 중 {len(events) - len(todo)}건은 이미 완료되어 건너뜁니다. 남은 작업 {len(todo)}건")
+
+    wiki_site.ensure_site(out_dir)
+    journal = Journal(journal_path)
+    pages = {}
+    stage_timings = {stage: [] for stage in STAGES}
+    completed = failed = 0
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="batch")
+    try:
+        futures = {
+            executor.submit(process_event, event, out_dir, api_key, max_tokens, concurrency, article_max_tokens,
+                            section_batches): event
+            for event in todo
+        }
+        for future in as_completed(futures):
+            event = futures[future]
+            eid = event_id(event)
+            try:
+                output_file, timings = future.result()
+            except Exception as e:
+                failed += 1
+                journal.record({"id": eid, "status": "error", "error": str(e)})
+                print(f"[실패] {eid} {event['title']}: {e}", file=sys.stderr)
+                continue
+            completed += 1
+            pages[wiki_site.slugify(eid)] = event["title"]
+            for stage, seconds in timings.items():
+                stage_timings[stage].append(seconds)
+            journal.record({"id": eid, "status": "done", "output": output_file, "timings": timings})
+            elapsed = time.perf_counter() - start
+            print(f"[{completed + failed}/{len(todo)}] {eid} {event['title']} "
+                  f"({sum(timings.values()):.1f}s, {completed / elapsed * 60:.2f} events/min)")
+    except KeyboardInterrupt:
+        print("\n중단됨: 완료된 사건은 저널에 기록되어 다음 실행에서 이어서 진행합니다.", file=sys.stderr)
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        journal.close()
+        # 문서 목록은 사건마다가 아니라 실행이 끝날 때 한 번만 갱신
+        wiki_site.update_index(out_dir, pages)
+        print_summary(stage_timings, completed, failed, time.perf_counter() - start)
+    executor.shutdown(wait=True)
+    return completed, failed
+
+def load_api_key():
+    """환경 변수 GEMINI_API_KEY, 없으면 GUI가 저장한 settings.json의 api_key를 사용합니다."""
+    if os.environ.get("GEMINI_API_KEY"):
+        return os.environ["GEMINI_API_KEY"]
+    if os.path.exists("settings.json"):
+        with open("settings.json", "r", encoding="utf-8") as f:
+            return json.load(f).get("api_key", "")
+    return ""
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="JSONL 파일의 사건들을 병렬로 위키 HTML로 생성합니다 (중단 후 재실행 시 이어서 진행)."
+    )
+    parser.add_argument("events", help="사건 JSONL 파일 (각 줄: {\"title\": ..., \"text\": ...})")
+    parser.add_argument("--out", default="batch_output", help="출력 폴더 (기본: batch_output)")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 사건 수 (기본: 4)")
+    parser.add_argument("--concurrency", type=int, default=4, help="사건당 동시 카테고리 요청 수 (기본: 4)")
+    parser.add_argument("--max-tokens", type=int, default=2048, help="키워드 생성 max tokens (기본: 2048)")
+    parser.add_argument("--article-max-tokens", type=int, default=llm_to_wiki.DEFAULT_MAX_TOKENS,
+                        help=f"카테고리 서술 max tokens (기본: {llm_to_wiki.DEFAULT_MAX_TOKENS}, "
+                             "실제 요청은 지난 응답 길이로 학습한 예산, 끊기면 이어쓰기)")
+    parser.add_argument("--structured", action="store_true",
+                        help="구조화 출력 모드: 키워드를 JSON으로 받고 카테고리 서술을 몇 번의 묶음 요청으로 생성")
+    parser.add_argument("--section-batches", type=int, default=llm_to_wiki.DEFAULT_SECTION_BATCHES,
+                        help=f"--structured의 사건당 카테고리 묶음 요청 수 (기본: {llm_to_wiki.DEFAULT_SECTION_BATCHES})")
+    parser.add_argument("--no-context-cache", action="store_true",
+                        help="긴 사건 설명을 컨텍스트 캐시로 공유하지 않고 카테고리 요청마다 전체 프롬프트를 보냄")
+    parser.add_argument("--no-coalesce", action="store_true",
+                        help="실행 중인 같은 LLM 요청과 설명이 같은 사건을 하나로 합치지 않음")
+    parser.add_argument("--no-hedge", action="store_true",
+                        help="느린 요청을 헤징(최근 응답 시간 분위수를 넘으면 중복 요청)하지 않음")
+    parser.add_argument("--hedge-percentile", type=float, default=hedging.PERCENTILE,
+                        help=f"이 분위수보다 오래 걸리는 요청을 헤징 (기본: {hedging.PERCENTILE})")
+    parser.add_argument("--fallback-model", help="헤징과 장애 조치에 쓸 보조 모델 (예: gemini-2.0-flash-lite)")
+    parser.add_argument("--journal", help="체크포인트 저널 경로 (기본: <출력 폴더>/journal.jsonl)")
+    parser.add_argument("--api-key", help="Gemini API 키 (기본: GEMINI_API_KEY 또는 settings.json)")
+    parser.add_argument("--rpm", type=int, default=scheduler.DEFAULT_REQUESTS_PER_MINUTE,
+                        help=f"분당 요청 한도 (기본: {scheduler.DEFAULT_REQUESTS_PER_MINUTE})")
+    parser.add_argument("--tpm", type=int, default=scheduler.DEFAULT_TOKENS_PER_MINUTE,
+                        help=f"분당 토큰 한도 (기본: {scheduler.DEFAULT_TOKENS_PER_MINUTE})")
+    parser.add_argument("--max-retries", type=int, default=5, help="일시적 오류 재시도 횟수 (기본: 5)")
+    parser.add_argument("--prometheus", help="실행 후 누적 계측 값을 Prometheus 텍스트 형식으로 쓸 파일")
+    args = parser.parse_args(argv)
+    scheduler.configure(requests_per_minute=args.rpm, tokens_per_minute=args.tpm, max_retries=args.max_retries)
+    llm_client.configure_context_cache(enabled=not args.no_context_cache)
+    singleflight.configure(enabled=not args.no_coalesce)
+    hedging.configure(enabled=not args.no_hedge, percentile=args.hedge_percentile)
+    llm_client.configure_fallback(model=args.fallback_model)
+
+    events = load_events(args.events)
+    api_key = args.api_key or load_api_key()
+    try:
+        completed, failed = run_batch(
+            events, args.out, api_key, workers=args.workers, concurrency=args.concurrency,
+            max_tokens=args.max_tokens, journal_path=args.journal, article_max_tokens=args.article_max_tokens,
+            section_batches=args.section_batches if args.structured else None
+        )
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# benchmarks/bench_async.py
+"""
+asyncio 파이프라인(asummarize_event → aexpand_event_to_wiki → agenerate_wiki_html) 벤치마크입니다.
+가짜 백엔드(fake_llm)로 문서 N개를 하나의 이벤트 루프에서 동시에 생성하고, 같은 동시 요청 수의
+스레드 풀(문서마다 스레드 하나 + 카테고리 스레드)로 생성한 경우와 처리량, 최대 스레드 수를 비교합니다.
+마지막으로 생성 도중 전체를 취소하여, 취소 후 남는 요청/대기열이 없는지 확인합니다.
+
+사용법: python benchmarks/bench_async.py [--articles 300] [--inflight 64] [--time-scale 0.05]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_llm
+import llm
+import llm_cache
+import llm_client
+import llm_to_wiki
+import scheduler
+import token_budget
+import wiki
+
+class ThreadSampler:
+    """실행 중 최대 스레드 수를 잽니다."""
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+async def agenerate_article(i, out_dir, semaphore):
+    text = f"가상의 사건 {i}에 관한 설명"
+    async with semaphore:
+        keywords = await llm.asummarize_event(text, max_tokens=2048)
+    articles = await llm_to_wiki.aexpand_event_to_wiki(text, keywords, "", semaphore=semaphore)
+    await wiki.agenerate_wiki_html(f"가상의 사건 {i}", text, articles, output_file=os.path.join(out_dir, f"{i}.html"))
+
+def generate_article(i, out_dir, concurrency):
+    text = f"가상의 사건 {i}에 관한 설명"
+    keywords = llm.summarize_event(text, max_tokens=2048)
+    articles = llm_to_wiki.expand_event_to_wiki(text, keywords, "", concurrency=concurrency)
+    wiki.generate_wiki_html(f"가상의 사건 {i}", text, articles, output_file=os.path.join(out_dir, f"{i}.html"))
+
+async def run_async(count, out_dir, inflight):
+    semaphore = asyncio.Semaphore(inflight)
+    tasks = [asyncio.ensure_future(agenerate_article(i, out_dir, semaphore)) for i in range(count)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # 취소되면 모든 문서의 태스크가 실제로 끝날 때까지 기다림
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+def run_threads(count, out_dir, inflight):
+    # 문서 하나가 카테고리 7개를 동시에 요청하므로, 같은 동시 요청 수가 되도록 문서 수를 나눔
+    with ThreadPoolExecutor(max_workers=max(1, inflight // len(llm.CATEGORIES))) as executor:
+        list(executor.map(lambda i: generate_article(i, out_dir, len(llm.CATEGORIES)), range(count)))
+
+async def run_cancelled(count, out_dir, inflight, after):
+    task = asyncio.ensure_future(run_async(count, out_dir, inflight))
+    await asyncio.sleep(after)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    return len(pending)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=300, help="동시에 생성할 문서 수")
+    parser.add_argument("--inflight", type=int, default=64, help="최대 동시 LLM 요청 수")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="가짜 백엔드 지연 배율")
+    args = parser.parse_args()
+
+    llm_client.set_backend(fake_llm.FakeBackend(time_scale=args.time_scale, seed=1))
+    llm_cache.configure(enabled=False)
+    token_budget.configure(enabled=False)
+    scheduler.configure(requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10)
+
+    print(f"{'mode':<8} {'articles':>8} {'elapsed(s)':>11} {'articles/s':>11} {'peak threads':>13}")
+    for mode in ("asyncio", "threads"):
+        with tempfile.TemporaryDirectory() as out_dir, ThreadSampler() as sampler:
+            start = time.perf_counter()
+            if mode == "asyncio":
+                asyncio.run(run_async(args.articles, out_dir, args.inflight))
+            else:
+                run_threads(args.articles, out_dir, args.inflight)
+            elapsed = time.perf_counter() - start
+            written = len(os.listdir(out_dir))
+        print(f"{mode:<8} {written:>8} {elapsed:>11.2f} {written / elapsed:>11.1f} {sampler.peak:>13}")
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        calls_before = scheduler.get_scheduler().stats()["calls"]
+        pending = asyncio.run(run_cancelled(args.articles, out_dir, args.inflight, after=0.5))
+        stats = scheduler.get_scheduler().stats()
+        print(f"취소: 0.5s 후 취소, 보낸 요청 {stats['calls'] - calls_before}개, 완료된 문서 {len(os.listdir(out_dir))}개, "
+              f"남은 태스크 {pending}개, 스케줄러 대기열 {stats['waiting']}개")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_client_pool.py
+"""
+호출당 오버헤드 벤치마크: 매 호출마다 genai.Client를 새로 만드는 기존 방식과
+llm_client의 공유 클라이언트(커넥션 풀 재사용)를 로컬 가짜 Gemini HTTP 서버에 대해 비교합니다.
+
+사용법: python benchmarks/bench_client_pool.py [--calls 200]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google import genai
+from google.genai import types
+
+import llm_client
+
+RESPONSE_BODY = json.dumps({
+    "candidates": [{
+        "content": {"role": "model", "parts": [{"text": "개요: 전쟁, 동맹, 조약"}]},
+        "finishReason": "STOP",
+    }],
+    "usageMetadata": {"promptTokenCount": 32, "candidatesTokenCount": 12, "totalTokenCount": 44},
+}, ensure_ascii=False).encode("utf-8")
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """generateContent 요청에 고정 응답을 돌려주는 keep-alive HTTP/1.1 핸들러"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+def call(client):
+    client.models.generate_content(
+        model=llm_client.DEFAULT_MODEL,
+        contents="벤치마크",
+        config=types.GenerateContentConfig(max_output_tokens=16, temperature=0.8),
+    )
+
+def run(label, calls, make_client):
+    StandInHandler.connections = 0
+    start = time.perf_counter()
+    for _ in range(calls):
+        call(make_client())
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed / calls * 1000:8.3f} ms/call   connections={StandInHandler.connections}")
+    return elapsed / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    http_options = {"base_url": f"http://127.0.0.1:{server.server_address[1]}/"}
+
+    # 워밍업 (SDK 내부 지연 초기화가 첫 측정에 섞이지 않도록)
+    call(genai.Client(api_key="bench", http_options=types.HttpOptions(**http_options)))
+
+    before = run("new client per call", args.calls,
+                 lambda: genai.Client(api_key="bench", http_options=types.HttpOptions(**http_options)))
+    after = run("shared pooled client", args.calls,
+                lambda: llm_client.get_client("bench", **http_options))
+    print(f"per-call overhead saved: {(before - after) * 1000:.3f} ms ({before / after:.2f}x)")
+
+    llm_client.close_clients()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
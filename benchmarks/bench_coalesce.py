@@ -0,0 +1,84 @@
+# benchmarks/bench_coalesce.py
+"""
+실행 중인 같은 요청 합치기(singleflight) 벤치마크입니다.
+
+--events개의 서로 다른 사건 설명을 각각 --repeat번 (id와 제목은 다르게) 넣은 배치를 batch.run_batch로
+--workers개 스레드에서 생성하며, 합치기를 켠 경우와 끈 경우의 API 호출 수, 합쳐진 LLM 호출/사건 수,
+경과 시간을 출력합니다. 응답 캐시는 끄고 측정하므로 끝난 요청의 재사용 없이 실행 중인 요청끼리만 합쳐집니다.
+--shuffle을 주면 같은 설명의 사건이 배치 안에 흩어져 있어 동시에 실행되지 않는 경우도 섞입니다.
+
+사용법: python benchmarks/bench_coalesce.py [--events 8] [--repeat 3] [--workers 6] [--time-scale 0.05]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+import fake_llm
+import llm_cache
+import llm_client
+import scheduler
+import singleflight
+import token_budget
+
+def make_events(count, repeat, shuffle):
+    events = [
+        {"id": f"{i}-{copy}", "title": f"가상의 전쟁 {i} ({copy})",
+         "text": f"가상의 전쟁 {i}은 19세기 말 여러 국가가 국경과 교역로를 두고 대립하면서 시작되었다."}
+        for i in range(count) for copy in range(repeat)
+    ]
+    if shuffle:
+        random.Random(1).shuffle(events)
+    return events
+
+def measure(mode, events, workers, concurrency):
+    singleflight.configure(enabled=mode == "on")
+    before_calls = scheduler.get_scheduler().stats()["calls"]
+    before = {name: group["shared"] for name, group in singleflight.stats().items()}
+    out_dir = tempfile.mkdtemp(prefix="bench_coalesce_")
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            completed, failed = batch.run_batch(events, out_dir, "", workers=workers, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    shared = {name: group["shared"] - before.get(name, 0) for name, group in singleflight.stats().items()}
+    api_calls = scheduler.get_scheduler().stats()["calls"] - before_calls
+    print(f"{mode:<5} {completed:>5} {failed:>6} {api_calls:>9} {shared.get('llm', 0):>10} "
+          f"{shared.get('article', 0):>13} {elapsed:>8.2f}")
+    return api_calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=8, help="서로 다른 사건 설명 수")
+    parser.add_argument("--repeat", type=int, default=3, help="설명마다 넣을 사건 수")
+    parser.add_argument("--workers", type=int, default=6, help="동시에 생성할 사건 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="사건당 동시 카테고리 요청 수")
+    parser.add_argument("--shuffle", action="store_true", help="같은 설명의 사건을 배치 안에 흩어 놓음")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="가짜 백엔드 지연 배율")
+    args = parser.parse_args()
+
+    llm_client.set_backend(fake_llm.FakeBackend(time_scale=args.time_scale, seed=1))
+    llm_cache.configure(enabled=False)
+    token_budget.configure(enabled=False)
+    scheduler.configure(requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10)
+
+    events = make_events(args.events, args.repeat, args.shuffle)
+    print(f"사건 {len(events)}개 (설명 {args.events}개 x {args.repeat}), 동시 {args.workers}개, 경과는 초")
+    print(f"{'mode':<5} {'done':>5} {'failed':>6} {'api calls':>9} {'llm shared':>10} {'events shared':>13} "
+          f"{'elapsed':>8}")
+    plain = measure("off", events, args.workers, args.concurrency)
+    coalesced = measure("on", events, args.workers, args.concurrency)
+    print(f"API 호출 {100 * (1 - coalesced / plain) if plain else 0:.0f}% 감소")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_context_cache.py
+"""
+컨텍스트 캐시(긴 사건 설명을 카테고리 요청들이 공유) 벤치마크입니다.
+
+사건 설명 길이별로 키워드가 주어진 사건을 expand_event_to_wiki로 생성하며, 컨텍스트 캐시를 켠 경우와 끈 경우의
+사건당 API 호출 수(캐시 생성 포함), 입력 토큰 수, 그중 캐시에서 읽은 토큰 수, 과금 환산 입력 토큰 수,
+지연(p50)을 출력합니다. 과금 환산은 캐시에서 읽은 토큰을 --cached-price 배율로 계산한 값입니다.
+기본은 가짜 백엔드(fake_llm)이며, --api-key를 주면 실제 Gemini API로 측정합니다 (토큰은 API가 보고한 사용량).
+응답 캐시와 토큰 예산은 끄고 측정합니다.
+
+사용법: python benchmarks/bench_context_cache.py [--events 5] [--text-chars 500 4000 16000] [--cached-price 0.25]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+import fake_llm
+import llm
+import llm_cache
+import llm_client
+import llm_to_wiki
+import metrics
+import scheduler
+import token_budget
+
+def make_text(i, chars):
+    """chars 글자 정도의 사건 설명"""
+    sentence = f"가상의 전쟁 {i}은 19세기 말 여러 국가가 국경과 교역로를 두고 대립하면서 시작되어 복잡한 전개를 보였다. "
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+def make_keywords():
+    return {category: ["가상", "국경", "교역로"] for category in llm.CATEGORIES}
+
+def measure(mode, events, text_chars, api_key, cached_price):
+    latencies = []
+    totals = {"api_calls": 0, "input_tokens": 0, "cached_tokens": 0}
+    for i in range(events):
+        run = metrics.RunMetrics(f"{mode} {i}")
+        start = time.perf_counter()
+        with metrics.activate(run):
+            llm_to_wiki.expand_event_to_wiki(make_text(i, text_chars), make_keywords(), api_key)
+        latencies.append(time.perf_counter() - start)
+        for key in totals:
+            totals[key] += run.totals()[key]
+    per = {key: value / events for key, value in totals.items()}
+    billed = per["input_tokens"] - per["cached_tokens"] * (1 - cached_price)
+    print(f"{text_chars:>7} {mode:<6} {per['api_calls']:>10.1f} {per['input_tokens']:>11,.0f} "
+          f"{per['cached_tokens']:>11,.0f} {billed:>11,.0f} {batch.percentile(latencies, 50):>8.2f}")
+    return billed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5, help="길이·모드별로 생성할 사건 수")
+    parser.add_argument("--text-chars", type=int, nargs="+", default=[500, 4000, 16000], help="사건 설명 길이 (글자)")
+    parser.add_argument("--cached-price", type=float, default=0.25, help="캐시에서 읽은 입력 토큰의 단가 배율")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="가짜 백엔드 지연 배율")
+    parser.add_argument("--api-key", help="주면 가짜 백엔드 대신 실제 Gemini API로 측정")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        llm_client.set_backend(fake_llm.FakeBackend(time_scale=args.time_scale, seed=1))
+    llm_cache.configure(enabled=False)
+    token_budget.configure(enabled=False)
+    scheduler.configure(requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10)
+
+    print(f"사건 {args.events}개씩, 값은 사건당 평균 (지연은 초, 캐시 토큰 단가 x{args.cached_price})")
+    print(f"{'chars':>7} {'mode':<6} {'api calls':>10} {'input tok':>11} {'cached tok':>11} {'billed tok':>11} {'p50':>8}")
+    api_key = args.api_key or ""
+    for chars in args.text_chars:
+        llm_client.configure_context_cache(enabled=False)
+        plain = measure("off", args.events, chars, api_key, args.cached_price)
+        llm_client.configure_context_cache(enabled=True)
+        cached = measure("on", args.events, chars, api_key, args.cached_price)
+        print(f"{'':>7} 과금 환산 입력 토큰 {100 * (1 - cached / plain) if plain else 0:.0f}% 절감")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/bench_hedging.py
+"""
+느린 요청 헤징과 장애 조치 벤치마크입니다.
+
+첫 토큰 지연에 긴 꼬리(가끔 파레토 분포만큼 멈춤)가 있는 가짜 백엔드(fake_llm)로 다음을 비교합니다.
+
+- 요청 지연: --requests개의 카테고리 서술 요청을 --inflight개씩 동시에 보내며 요청별 지연(p50/p95/p99)과 API 호출 수
+- 문서 지연: --events개의 사건을 키워드 1회 + 카테고리 7회(동시 요청)로 생성하며 사건별 지연
+- 모드: off(헤징 없음), same(같은 제공자로 헤징), secondary(지연 분포가 같은 별도 보조 제공자로 헤징)
+- 장애: 기본 제공자가 --error-rate 확률로 503을 낼 때, 재시도만 하는 경우와 보조 제공자로 장애 조치하는 경우의
+  성공 수와 지연
+
+응답 시간 분위수를 학습하도록 모드마다 --warmup개의 요청을 먼저 보내며, 그 지연은 결과에 넣지 않습니다.
+응답 캐시와 토큰 예산은 끄고 측정합니다.
+
+사용법: python benchmarks/bench_hedging.py [--requests 400] [--events 40] [--stall-rate 0.03] [--time-scale 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+import fake_llm
+import hedging
+import llm
+import llm_cache
+import llm_client
+import llm_to_wiki
+import scheduler
+import token_budget
+
+def make_backend(args, seed, error_rate=0.0):
+    return fake_llm.FakeBackend(time_scale=args.time_scale, seed=seed, stall_rate=args.stall_rate,
+                                stall_seconds=args.stall_seconds, error_rate=error_rate, error_codes=(503,))
+
+def setup(args, hedge, secondary, error_rate=0.0):
+    primary = make_backend(args, 1, error_rate)
+    llm_client.set_backend(primary)
+    if secondary:
+        llm_client.configure_fallback(model="fake-secondary", backend=make_backend(args, 2))
+    else:
+        llm_client.configure_fallback()
+    # 설정이 같으면 기존 Hedger를 유지하므로, 한 번 다른 설정으로 바꿔 모드마다 응답 시간 기록과 차단기를 새로 시작
+    hedging.configure(enabled=not hedge)
+    hedging.configure(enabled=hedge, min_delay=0.0, cooldown=args.cooldown)
+    return primary
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception:
+        return None
+    return time.perf_counter() - start
+
+def request(i):
+    llm_client.generate("", f"카테고리 : \"개요\" 벤치마크 요청 {i}", 2048, label="개요")
+
+def article(i):
+    text = f"가상의 전쟁 {i}은 19세기 말 여러 국가가 국경과 교역로를 두고 대립하면서 시작되었다."
+    keywords = llm.summarize_event(text, max_tokens=2048)
+    llm_to_wiki.expand_event_to_wiki(text, keywords, "", concurrency=len(llm.CATEGORIES))
+
+def report(mode, latencies, count, api_calls):
+    ok = [value for value in latencies if value is not None]
+    failed = len(latencies) - len(ok)
+    values = [batch.percentile(ok, q) if ok else 0 for q in (50, 95, 99)] + [max(ok) if ok else 0]
+    print(f"{mode:<10} {len(ok):>5} {failed:>6} {api_calls:>9} {100 * (api_calls / count - 1):>+7.1f}% "
+          + " ".join(f"{value:>7.2f}" for value in values))
+
+def header(title):
+    print(f"\n{title}")
+    print(f"{'mode':<10} {'ok':>5} {'failed':>6} {'api calls':>9} {'extra':>8} "
+          f"{'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}")
+
+def run_requests(args, mode, hedge, secondary):
+    setup(args, hedge, secondary)
+    with ThreadPoolExecutor(max_workers=args.inflight) as executor:
+        list(executor.map(request, range(-args.warmup, 0)))
+        before = scheduler.get_scheduler().stats()["calls"]
+        latencies = list(executor.map(lambda i: timed(request, i), range(args.requests)))
+    report(mode, latencies, args.requests, scheduler.get_scheduler().stats()["calls"] - before)
+
+def run_articles(args, mode, hedge, secondary):
+    setup(args, hedge, secondary)
+    with ThreadPoolExecutor(max_workers=args.inflight) as executor:
+        list(executor.map(request, range(-args.warmup, 0)))
+    before = scheduler.get_scheduler().stats()["calls"]
+    latencies = [timed(article, i) for i in range(args.events)]
+    calls = scheduler.get_scheduler().stats()["calls"] - before
+    report(mode, latencies, args.events * (len(llm.CATEGORIES) + 1), calls)
+
+def run_outage(args, mode, secondary):
+    setup(args, True, secondary, error_rate=args.error_rate)
+    before = scheduler.get_scheduler().stats()["calls"]
+    with ThreadPoolExecutor(max_workers=args.inflight) as executor:
+        latencies = list(executor.map(lambda i: timed(request, i), range(args.requests // 2)))
+    report(mode, latencies, args.requests // 2, scheduler.get_scheduler().stats()["calls"] - before)
+    stats = hedging.get_hedger().stats()
+    print(f"{'':<10} 장애 조치 {stats['failovers']}회, 차단된 제공자 {', '.join(stats['open_providers']) or '-'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="요청 지연을 잴 요청 수")
+    parser.add_argument("--events", type=int, default=40, help="문서 지연을 잴 사건 수")
+    parser.add_argument("--inflight", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=40, help="모드마다 먼저 보내는 (측정하지 않는) 요청 수")
+    parser.add_argument("--stall-rate", type=float, default=0.03, help="첫 토큰이 멈추는 확률")
+    parser.add_argument("--stall-seconds", type=float, default=10.0, help="멈춤의 최솟값 (가짜 백엔드 시간, 초)")
+    parser.add_argument("--error-rate", type=float, default=0.9, help="장애 측정에서 기본 제공자의 503 오류 확률")
+    parser.add_argument("--cooldown", type=float, default=5.0, help="차단기가 열려 있는 시간 (초)")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="가짜 백엔드 지연 배율")
+    args = parser.parse_args()
+
+    llm_cache.configure(enabled=False)
+    token_budget.configure(enabled=False)
+    # 재시도 대기도 가짜 백엔드 시간에 맞춰 줄임
+    scheduler.configure(requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10,
+                        base_delay=args.time_scale, max_delay=60 * args.time_scale)
+
+    print(f"멈춤 확률 {args.stall_rate}, 멈춤 {args.stall_seconds}s 이상 (x{args.time_scale}), 지연은 초")
+    modes = [("off", False, False), ("same", True, False), ("secondary", True, True)]
+    header(f"요청 {args.requests}개, 동시 {args.inflight}개")
+    for mode, hedge, secondary in modes:
+        run_requests(args, mode, hedge, secondary)
+    header(f"사건 {args.events}개 (사건당 요청 {len(llm.CATEGORIES) + 1}개)")
+    for mode, hedge, secondary in modes:
+        run_articles(args, mode, hedge, secondary)
+    header(f"기본 제공자 오류 확률 {args.error_rate}: 요청 {args.requests // 2}개")
+    run_outage(args, "retry", False)
+    run_outage(args, "failover", True)
+
+if __name__ == "__main__":
+    main()
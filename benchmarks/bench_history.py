@@ -0,0 +1,137 @@
+# benchmarks/bench_history.py
+"""
+GUI 작업 기록 목록 벤치마크입니다 (PySide6 필요, 화면 없이 offscreen으로 실행).
+
+--jobs개의 끝난 작업(과 결과 페이지)이 있을 때 다음 두 방식을 각각 별도 프로세스에서 비교합니다.
+
+- widgets: 이전 방식. 입력 이력 QPlainTextEdit에 작업마다 한 줄을 붙이고, 생성된 문서마다 QPushButton을 레이아웃에 추가
+- model:   job_store에 저장된 기록을 JobListModel/ResultListModel + QListView로 표시 (보이는 페이지만 불러옴)
+
+창을 띄우기까지의 시간, 목록 끝까지 갔다가 처음으로 돌아오는 스크롤 한 번의 평균 시간(model은 그때마다 한 페이지를 더 읽음),
+만들어진 행 수, 늘어난 최대 메모리(RSS)를 출력합니다.
+저장소는 임시 폴더에 만들며, 만드는 시간은 측정에서 제외합니다.
+
+사용법: python benchmarks/bench_history.py [--jobs 5000 20000] [--scrolls 5]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: 메모리는 측정하지 않음
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import job_store
+
+TEXT = "가상의 전쟁은 19세기 말 여러 국가가 국경과 교역로를 두고 대립하면서 시작되었다. " * 10
+
+def make_store(path, jobs):
+    store = job_store.JobStore(path)
+    for i in range(jobs):
+        job_id = store.add(f"가상의 전쟁 {i}", TEXT)
+        store.finish(job_id, "완료", "[출력이 완료되었습니다.]", page_path=f"/site/page-{i}.html")
+    store.close()
+
+def max_rss_mib():
+    if resource is None:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_widgets(app, jobs, scrolls):
+    from PySide6.QtWidgets import QPlainTextEdit, QPushButton, QVBoxLayout, QWidget, QHBoxLayout
+    start = time.perf_counter()
+    window = QWidget()
+    layout = QHBoxLayout(window)
+    history_view = QPlainTextEdit()
+    history_view.setReadOnly(True)
+    buttons = QWidget()
+    button_area = QVBoxLayout(buttons)
+    layout.addWidget(history_view)
+    layout.addWidget(buttons)
+    for i in range(jobs):
+        history_view.appendPlainText(f"[2025-01-01 00:00:00] 입력: {TEXT}")
+        button_area.addWidget(QPushButton(f"가상의 전쟁 {i}"))
+    window.show()
+    app.processEvents()
+    startup = time.perf_counter() - start
+    scroll_bar = history_view.verticalScrollBar()
+    start = time.perf_counter()
+    for _ in range(scrolls):
+        scroll_bar.setValue(scroll_bar.maximum())
+        app.processEvents()
+        scroll_bar.setValue(0)
+        app.processEvents()
+    return startup, (time.perf_counter() - start) / scrolls, jobs
+
+def run_model(app, jobs, scrolls, path):
+    import main
+    from PySide6.QtWidgets import QHBoxLayout, QListView, QWidget
+    start = time.perf_counter()
+    store = job_store.JobStore(path)
+    window = QWidget()
+    layout = QHBoxLayout(window)
+    views = []
+    for model in (main.JobListModel(store, {}, window), main.ResultListModel(store, window)):
+        view = QListView()
+        view.setUniformItemSizes(True)
+        view.setModel(model)
+        layout.addWidget(view)
+        views.append(view)
+    window.show()
+    app.processEvents()
+    startup = time.perf_counter() - start
+    scroll_bar = views[0].verticalScrollBar()
+    start = time.perf_counter()
+    for _ in range(scrolls):
+        scroll_bar.setValue(scroll_bar.maximum())
+        app.processEvents()
+        scroll_bar.setValue(0)
+        app.processEvents()
+    return startup, (time.perf_counter() - start) / scrolls, views[0].model().rowCount()
+
+def child(args):
+    from PySide6.QtWidgets import QApplication
+    app = QApplication([])
+    base = max_rss_mib()
+    if args.mode == "widgets":
+        startup, scroll, rows = run_widgets(app, args.child_jobs, args.scrolls)
+    else:
+        startup, scroll, rows = run_model(app, args.child_jobs, args.scrolls, args.store)
+    print(f"{args.mode:<8} {args.child_jobs:>7} {1000 * startup:>10.0f} {1000 * scroll:>10.1f} {rows:>8} "
+          f"{max_rss_mib() - base:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[5000, 20000], help="기록된 작업 수")
+    parser.add_argument("--scrolls", type=int, default=5, help="끝까지 갔다가 돌아오는 스크롤 횟수")
+    parser.add_argument("--mode", choices=["widgets", "model"], help=argparse.SUPPRESS)
+    parser.add_argument("--child-jobs", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--store", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        child(args)
+        return
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    print(f"{'mode':<8} {'jobs':>7} {'startup ms':>10} {'scroll ms':>10} {'rows':>8} {'RSS MiB':>9}")
+    for jobs in args.jobs:
+        temp_dir = tempfile.mkdtemp(prefix="bench_history_")
+        try:
+            path = os.path.join(temp_dir, "jobs.sqlite3")
+            make_store(path, jobs)
+            for mode in ("widgets", "model"):
+                subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, "--child-jobs", str(jobs),
+                                "--store", path, "--scrolls", str(args.scrolls)], env=env, cwd=temp_dir, check=True)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
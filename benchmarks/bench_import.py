@@ -0,0 +1,126 @@
+# benchmarks/bench_import.py
+"""
+모듈 import 시간 벤치마크입니다.
+
+각 대상 모듈을 새 인터프리터에서 `python -X importtime -c "import <모듈>"`로 --repeat번 불러와
+누적 import 시간의 최솟값을 잽니다.
+
+- 시작 시 불러오면 안 되는 무거운 모듈(google-genai SDK, multiprocessing, asyncio, GUI가 아닌 모듈의 PySide6,
+  main의 생성 파이프라인 모듈)이 import 중에 불러와지면 0이 아닌 종료 코드로 실패합니다.
+  컴퓨터와 상관없이 같은 결과가 나오는 검사입니다.
+- 시간은 컴퓨터마다 크게 다르므로 기준값은 저장소에 두지 않습니다. 같은 컴퓨터에서 --save-baseline으로
+  import_baseline.json을 만들어 두면 기준값보다 --tolerance 비율과 --slack-ms 이상 느려진 모듈을 알려 주며,
+  --strict를 주면 이 경우에도 실패합니다.
+
+main(GUI)은 PySide6가 설치된 경우에만 측정합니다.
+
+사용법: python benchmarks/bench_import.py [--repeat 5] [--tolerance 0.5] [--slack-ms 20] [--save-baseline] [--strict]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_baseline.json")
+
+TARGETS = ["main", "batch", "wiki_site", "search_index", "llm_to_wiki", "llm"]
+# 대상 모듈을 import할 때 함께 불러와지면 안 되는 모듈 (처음 필요할 때 불러옴)
+FORBIDDEN = ["google.genai", "multiprocessing", "asyncio"]
+# GUI(main)가 아닌 모듈은 PySide6도 불러오면 안 됨 (배치, 사이트 빌드는 GUI 없이 실행)
+GUI_MODULES = {"main"}
+GUI_ONLY = ["PySide6"]
+# GUI(main)는 생성 파이프라인 모듈을 창을 띄운 뒤 백그라운드에서 불러옴 (main.PIPELINE_MODULES와 작업 기록, 위키 서버)
+GUI_LAZY = ["scheduler", "metrics", "hedging", "llm_client", "llm_cache", "token_budget", "llm", "llm_to_wiki",
+            "singleflight", "wiki", "search_index", "wiki_site", "job_store", "wiki_server"]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+def measure(module):
+    """
+    새 인터프리터에서 module을 import하고 (누적 시간(초), 불러와진 모듈 이름 집합)을 반환합니다.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} 실패:\n{result.stderr[-2000:]}")
+    cumulative = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        loaded.add(name)
+        if name == module and not match.group(3):
+            cumulative = int(match.group(2)) / 1e6
+    if cumulative is None:
+        raise RuntimeError(f"import {module}의 importtime 출력을 찾을 수 없습니다.")
+    return cumulative, loaded
+
+def load_baseline():
+    try:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="모듈별 측정 횟수 (최솟값 보고)")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="기준값 대비 허용 증가 비율 (기본: 0.5 = 50%%)")
+    parser.add_argument("--slack-ms", type=float, default=20, help="허용 증가 폭의 최솟값 (ms, 측정 잡음 흡수)")
+    parser.add_argument("--save-baseline", action="store_true", help="측정값을 기준값 파일로 저장 (이 컴퓨터 전용)")
+    parser.add_argument("--strict", action="store_true", help="기준값보다 느려진 모듈이 있어도 실패")
+    args = parser.parse_args()
+
+    targets = [t for t in TARGETS if t != "main" or importlib.util.find_spec("PySide6") is not None]
+    baseline = load_baseline()
+    results = {}
+    failures = []
+    slower = []
+    print(f"{'module':<14} {'import(ms)':>11} {'baseline(ms)':>13}  heavy modules loaded")
+    for module in targets:
+        times = []
+        heavy = set()
+        forbidden = FORBIDDEN + (GUI_LAZY if module in GUI_MODULES else GUI_ONLY)
+        for _ in range(args.repeat):
+            elapsed, loaded = measure(module)
+            times.append(elapsed)
+            heavy |= {f for f in forbidden for name in loaded if name == f or name.startswith(f + ".")}
+        best = min(times)
+        results[module] = round(best * 1000, 1)
+        base = baseline.get(module)
+        print(f"{module:<14} {best * 1000:>11.1f} {base if base is not None else '-':>13}  "
+              f"{', '.join(sorted(heavy)) or '-'}")
+        if heavy:
+            failures.append(f"{module}: 시작 시 불러오면 안 되는 모듈을 불러옴 ({', '.join(sorted(heavy))})")
+        if base is not None and best * 1000 > base + max(base * args.tolerance, args.slack_ms):
+            slower.append(f"{module}: {best * 1000:.1f}ms (기준값 {base}ms)")
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"기준값 저장: {BASELINE_FILE}")
+    if slower:
+        print("\n기준값보다 느려진 모듈" + ("" if args.strict else " (참고용, --strict로 실패 처리)") + ":")
+        for line in slower:
+            print(f"  - {line}")
+        if args.strict:
+            failures.extend(slower)
+    if failures:
+        print("\nimport 회귀:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n회귀 없음")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
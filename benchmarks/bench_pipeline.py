@@ -0,0 +1,151 @@
+# benchmarks/bench_pipeline.py
+"""
+가짜 LLM 백엔드(fake_llm)로 전체 파이프라인의 지연 시간과 처리량을 측정하는 오프라인 벤치마크입니다.
+API 키나 네트워크 없이 실행되며, 다음 시나리오의 p50/p95/p99 지연과 처리량을 출력합니다.
+
+- single:     사건 하나씩 순서대로 생성 (summarize_event → expand_event_to_wiki → generate_wiki_html)
+- concurrent: 여러 사건을 스레드로 동시에 생성
+- batch:      batch.run_batch로 JSONL 배치 처리
+- render:     wiki.generate_wiki_html 렌더링 시간만 측정
+
+사용법: python benchmarks/bench_pipeline.py [--events 20] [--parallel 8] [--time-scale 0.05] [--error-rate 0.02]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+import fake_llm
+import llm
+import llm_cache
+import llm_client
+import llm_to_wiki
+import scheduler
+import token_budget
+import wiki
+
+def make_events(count):
+    return [
+        {"title": f"가상의 전쟁 {i}", "text": f"이 사건은 19세기 말에 발생한 가상의 전쟁 {i}로, 여러 국가가 참여하여 복잡한 전개를 보였다."}
+        for i in range(count)
+    ]
+
+def run_article(event, out_dir, concurrency, render_times):
+    start = time.perf_counter()
+    keywords_dict = llm.summarize_event(event["text"], api_key="fake", max_tokens=2048)
+    articles = llm_to_wiki.expand_event_to_wiki(event["text"], keywords_dict, "fake", max_tokens=8192,
+                                                concurrency=concurrency)
+    render_start = time.perf_counter()
+    wiki.generate_wiki_html(event["title"], event["text"], articles,
+                            output_file=os.path.join(out_dir, f"{batch.event_id(event)}.html"))
+    render_times.append(time.perf_counter() - render_start)
+    return time.perf_counter() - start
+
+def report(name, latencies, elapsed, unit="events"):
+    p = lambda q: batch.percentile(latencies, q)
+    print(f"{name:<11} n={len(latencies):<5} p50={p(50):7.3f}s p95={p(95):7.3f}s p99={p(99):7.3f}s "
+          f"throughput={len(latencies) / elapsed * 60 if elapsed else 0:9.1f} {unit}/min")
+
+def bench_single(events, out_dir, concurrency, render_times):
+    latencies = []
+    start = time.perf_counter()
+    for event in events:
+        latencies.append(run_article(event, out_dir, concurrency, render_times))
+    report("single", latencies, time.perf_counter() - start)
+
+def bench_concurrent(events, out_dir, concurrency, parallel, render_times):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        latencies = list(executor.map(lambda e: run_article(e, out_dir, concurrency, render_times), events))
+    report("concurrent", latencies, time.perf_counter() - start)
+
+def bench_batch(events, out_dir, concurrency, parallel):
+    events_path = os.path.join(out_dir, "events.jsonl")
+    with open(events_path, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    batch_out = os.path.join(out_dir, "batch")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch.run_batch(batch.load_events(events_path), batch_out, "fake", workers=parallel, concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    latencies = []
+    with open(os.path.join(batch_out, "journal.jsonl"), encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("status") == "done":
+                latencies.append(sum(entry["timings"].values()))
+    report("batch", latencies, elapsed)
+
+def bench_render(out_dir, repeat):
+    backend = fake_llm.FakeBackend(time_scale=0)
+    text = "가상의 전쟁"
+    keywords = llm.summarize_event(text, api_key="fake")
+    articles = {
+        category: backend.generate(llm_to_wiki.build_category_prompt(text, category, kws), llm_client.DEFAULT_MODEL, 8192, 0.8).text
+        for category, kws in keywords.items()
+    }
+    output_file = os.path.join(out_dir, "render.html")
+    times = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        wiki.generate_wiki_html(text, text, articles, output_file=output_file)
+        times.append(time.perf_counter() - t)
+    report("render", times, time.perf_counter() - start, unit="pages")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20, help="시나리오별 사건 수")
+    parser.add_argument("--parallel", type=int, default=8, help="concurrent / batch 시나리오의 동시 사건 수")
+    parser.add_argument("--concurrency", type=int, default=7, help="사건당 동시 카테고리 요청 수")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="가짜 백엔드 지연 배율 (1.0 = 실제 API 수준)")
+    parser.add_argument("--ttft-median", type=float, default=0.6)
+    parser.add_argument("--ttft-sigma", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="호출당 429/503 주입 확률")
+    parser.add_argument("--render-repeat", type=int, default=200)
+    parser.add_argument("--scenarios", default="single,concurrent,batch,render")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    backend = fake_llm.FakeBackend(
+        ttft_median=args.ttft_median, ttft_sigma=args.ttft_sigma, tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate, time_scale=args.time_scale, seed=args.seed
+    )
+    llm_client.set_backend(backend)
+    llm_cache.configure(enabled=False)
+    token_budget.configure(enabled=False)
+    # 한도 대기는 제외하고 백엔드/파이프라인 자체만 측정 (재시도 백오프는 time_scale에 맞춰 축소)
+    scheduler.configure(requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10,
+                        base_delay=max(args.time_scale, 0.001), max_delay=1.0)
+
+    scenarios = set(args.scenarios.split(","))
+    events = make_events(args.events)
+    render_times = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        print(f"fake backend: ttft median={args.ttft_median}s sigma={args.ttft_sigma} "
+              f"{args.tokens_per_second} tok/s error_rate={args.error_rate} time_scale={args.time_scale}")
+        if "single" in scenarios:
+            bench_single(events, out_dir, args.concurrency, render_times)
+        if "concurrent" in scenarios:
+            bench_concurrent(events, out_dir, args.concurrency, args.parallel, render_times)
+        if render_times:
+            report("page write", render_times, sum(render_times), unit="pages")
+        if "batch" in scenarios:
+            bench_batch(events, out_dir, args.concurrency, args.parallel)
+        if "render" in scenarios:
+            bench_render(out_dir, args.render_repeat)
+    stats = scheduler.get_scheduler().stats()
+    print(f"backend calls={backend.calls} injected errors={backend.errors} scheduler retries={stats['retries']}")
+
+if __name__ == "__main__":
+    main()
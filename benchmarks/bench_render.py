@@ -0,0 +1,140 @@
+# benchmarks/bench_render.py
+"""
+위키 본문 마크업 렌더러 마이크로 벤치마크입니다.
+이전 구현(대괄호/소괄호 re.sub 두 번 + 개행 replace + 문자열 += 연결)과
+현재 wiki.py의 단일 스캔 렌더러를 같은 입력으로 비교합니다.
+이전 구현은 HTML 이스케이프를 하지 않았으므로, 이스케이프를 더한 경우(markup+escape)도 함께 측정합니다.
+시간은 반복 중 최솟값, 메모리는 tracemalloc으로 잰 최대 할당량입니다.
+단일 스캔 렌더러는 이스케이프와 강조 안 각주 처리를 바로잡고 코드를 정리한 변경이며 더 빠르지는 않습니다.
+시간은 이전 구현과 비슷하고(약 0.8~1.2배) 최대 메모리는 이스케이프 없는 이전 구현보다 조금 큽니다.
+
+입력은 대괄호 강조, 소괄호 주석, 개행, HTML 특수문자가 섞인 섹션 7개로 만든 수 MB 크기의 본문입니다.
+
+사용법: python benchmarks/bench_render.py [--sizes 0.1,1,4] [--repeat 5]
+"""
+import argparse
+import html
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wiki
+
+WORDS = ["사건", "조약", "동맹", "국경", "개혁", "외교", "봉기", "<의회>", "A&B", "\"칙령\"", "함대", "요새"]
+
+def make_section(rng, target_chars):
+    parts = []
+    length = 0
+    while length < target_chars:
+        roll = rng.random()
+        word = rng.choice(WORDS)
+        if roll < 0.15:
+            piece = f"[{word}]"
+        elif roll < 0.22:
+            piece = f"({word} 기록)"
+        elif roll < 0.27:
+            piece = "\n"
+        else:
+            piece = word
+        parts.append(piece)
+        length += len(piece) + 1
+    return " ".join(parts)
+
+def make_articles(size_mb, seed=1):
+    rng = random.Random(seed)
+    per_section = int(size_mb * 1024 * 1024 / 3 / len(wiki.SECTIONS))  # 한글 약 3바이트
+    return {keys[0]: make_section(rng, per_section) for _, _, keys in wiki.SECTIONS}
+
+# ---- 이전 구현 (비교용) ----
+def legacy_process_text(text, start_counter=1):
+    footnotes = []
+    counter = start_counter
+
+    def replace_comment(match):
+        nonlocal counter
+        comment = match.group(1)
+        footnotes.append((counter, comment))
+        replacement = (f'<a href="#footnote-{counter}" id="footnotemark-{counter}" '
+                       f'style="text-decoration:none; color:#00aaff;" title="{comment}">'
+                       f'<sup>[{counter}]</sup></a>')
+        counter += 1
+        return replacement
+
+    processed = re.sub(r'\[([^\]]+)\]', r'<span style="color:#00aaff;">\1</span>', text)
+    processed = re.sub(r'\(([^)]+)\)', replace_comment, processed)
+    return processed, footnotes, counter
+
+def legacy_render(event_title, articles):
+    section_html = ""
+    all_footnotes = []
+    counter = 1
+    for sec_id, heading, keys in wiki.SECTIONS:
+        content = wiki._section_content(articles, keys)
+        processed, footnotes, counter = legacy_process_text(content, start_counter=counter)
+        processed = processed.replace("\n", "<br/>")
+        all_footnotes.extend(footnotes)
+        section_html += f"""
+    <section id="{sec_id}">
+      <h2>{heading.format(event_title=event_title)}</h2>
+      <p>{processed}</p>
+    </section>
+    """
+    footnotes_html = "<div class='footnotes'><h2>각주</h2><ol>"
+    for idx, note in all_footnotes:
+        footnotes_html += f'<li id="footnote-{idx}"><a href="#footnotemark-{idx}" style="text-decoration:none; color:#00aaff;">[{idx}]</a> {note}</li>'
+    footnotes_html += "</ol></div>"
+    return f"<html><head><style>{wiki.WIKI_CSS}</style></head><body>{section_html}{footnotes_html}</body></html>"
+
+def current_render(event_title, articles):
+    return "".join(wiki.render_wiki_page(event_title, articles))
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="0.1,1,4", help="본문 크기 목록 (MB, 쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=5, help="크기별 반복 횟수 (최솟값 보고)")
+    args = parser.parse_args()
+
+    print(f"{'size':>7} {'case':<14} {'legacy(s)':>10} {'single-pass(s)':>15} {'speedup':>8} "
+          f"{'legacy peak':>12} {'single-pass peak':>17}")
+    for size in (float(s) for s in args.sizes.split(",")):
+        articles = make_articles(size)
+        text = "\n".join(articles.values())
+        cases = [
+            ("markup", lambda: legacy_process_text(text)[0].replace("\n", "<br/>"),
+             lambda: wiki.process_text_for_wiki(text)),
+            ("markup+escape", lambda: legacy_process_text(html.escape(text))[0].replace("\n", "<br/>"),
+             lambda: wiki.process_text_for_wiki(text)),
+            ("page", lambda: legacy_render("가상의 사건", articles),
+             lambda: current_render("가상의 사건", articles)),
+        ]
+        for name, legacy, current in cases:
+            old = best_of(legacy, args.repeat)
+            new = best_of(current, args.repeat)
+            old_peak = peak_memory(legacy) / 2 ** 20
+            new_peak = peak_memory(current) / 2 ** 20
+            print(f"{size:>6.1f}M {name:<14} {old:>10.4f} {new:>15.4f} {old / new if new else 0:>7.2f}x "
+                  f"{old_peak:>10.1f}MB {new_peak:>15.1f}MB")
+
+if __name__ == "__main__":
+    main()
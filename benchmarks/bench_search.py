@@ -0,0 +1,70 @@
+# benchmarks/bench_search.py
+"""
+전문 검색 색인(search_index) 벤치마크입니다.
+가짜 백엔드(fake_llm) 텍스트로 글 N개를 색인한 뒤, 문서당 색인 시간과 질의 지연(p50/p95/p99)을 출력합니다.
+
+사용법: python benchmarks/bench_search.py [--articles 2000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+import fake_llm
+import llm
+import llm_client
+import llm_to_wiki
+import search_index
+
+def make_article(backend, i):
+    title = f"가상의 사건 {i}"
+    text = f"{title}에 관한 설명"
+    keyword_text = backend.generate(llm.build_keyword_prompt(text), llm_client.DEFAULT_MODEL, 2048, 0.8).text
+    keywords = dict(filter(None, map(llm.parse_keyword_line, keyword_text.splitlines())))
+    articles = {
+        category: backend.generate(llm_to_wiki.build_category_prompt(text, category, kws),
+                                   llm_client.DEFAULT_MODEL, 8192, 0.8).text
+        for category, kws in keywords.items()
+    }
+    return title, keywords, articles
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=2000, help="색인할 글 수")
+    parser.add_argument("--queries", type=int, default=200, help="측정할 질의 수")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    backend = fake_llm.FakeBackend(time_scale=0)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as site_dir:
+        index = search_index.get_index(site_dir)
+        add_times = []
+        for i in range(args.articles):
+            title, keywords, articles = make_article(backend, i)
+            start = time.perf_counter()
+            index.add(f"doc-{i}", title, f"doc-{i}.html", keywords, articles)
+            add_times.append(time.perf_counter() - start)
+        stats = index.stats()
+        size = os.path.getsize(search_index.index_path(site_dir))
+        print(f"색인: 문서 {stats['docs']}개, posting {stats['postings']:,}개, 파일 {size / 2 ** 20:.1f}MB, "
+              f"문서당 p50={batch.percentile(add_times, 50) * 1000:.2f}ms p95={batch.percentile(add_times, 95) * 1000:.2f}ms")
+
+        pool = fake_llm.KEYWORD_POOL + [s.split()[0] for s in fake_llm.SUBJECTS] + [f"사건 {i}" for i in range(50)]
+        query_times = []
+        for _ in range(args.queries):
+            query = " ".join(rng.sample(pool, rng.randint(1, 3)))
+            start = time.perf_counter()
+            index.search(query, limit=10)
+            query_times.append(time.perf_counter() - start)
+        p = lambda q: batch.percentile(query_times, q) * 1000
+        print(f"질의 {len(query_times)}회: p50={p(50):.2f}ms p95={p(95):.2f}ms p99={p(99):.2f}ms")
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# benchmarks/bench_server.py
+"""
+내장 위키 서버(wiki_server) 벤치마크입니다.
+
+--pages개의 페이지가 있는 사이트를 임시 폴더에 만들고(LLM 없이 wiki_site.publish), 서버를 별도 프로세스로 띄운 뒤
+--clients개의 스레드가 keep-alive 연결로 무작위 페이지를 --requests번 요청하며 다음을 비교합니다.
+
+- simple:     python -m http.server (요청마다 파일을 읽고 연결을 닫음, 압축/검증 없음)
+- identity:   wiki_server, 압축하지 않은 응답
+- gzip:       wiki_server, Accept-Encoding: gzip (미리 압축해 둔 .gz를 그대로 보냄)
+- revalidate: wiki_server, 받아 둔 ETag로 If-None-Match (304, 본문 없음)
+
+초당 요청 수, 요청당 응답 본문 크기, 지연(p50/p99, ms)을 출력합니다.
+클라이언트도 같은 컴퓨터의 Python이므로 절대값보다 모드 사이의 비교로 보세요.
+
+마지막으로 GUI처럼 같은 프로세스에서 서버를 실행하면서 요청 중인 페이지 --regenerate-pages개를 wiki.write_atomic으로
+계속 다시 쓰고(스트리밍 중 IncrementalWikiWriter와 같은 방식), 파일 교체 실패, 잘린/잘못된 응답,
+쓰기가 끝난 뒤 이전 내용을 보내는 경우가 없는지 확인합니다. 하나라도 있으면 종료 코드 1로 끝납니다.
+
+사용법: python benchmarks/bench_server.py [--pages 200] [--requests 4000] [--clients 16] [--regenerate-pages 5]
+"""
+import argparse
+import gzip
+import http.client
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import batch
+import llm
+import wiki
+import wiki_server
+import wiki_site
+
+def make_site(site_dir, pages):
+    sentence = "[가상의 전쟁]은 19세기 말 여러 국가가 국경과 교역로를 두고 대립하면서 시작되었다 (교역로 분쟁). "
+    articles = {category: sentence * 40 for category in llm.CATEGORIES}
+    keywords = {category: ["가상", "국경"] for category in llm.CATEGORIES}
+    slugs = [f"page-{i}" for i in range(pages)]
+    for slug in slugs:
+        wiki_site.publish(site_dir, slug, f"가상의 전쟁 {slug}", "설명", keywords, articles)
+    wiki_site.update_index(site_dir, {slug: f"가상의 전쟁 {slug}" for slug in slugs})
+    return slugs
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(command, port):
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"서버가 시작되지 않았습니다: {command}")
+
+def client(port, paths, headers, etags, latencies, sizes):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    for path in paths:
+        request_headers = dict(headers)
+        if etags is not None:
+            request_headers["If-None-Match"] = etags[path]
+        start = time.perf_counter()
+        connection.request("GET", path, headers=request_headers)
+        response = connection.getresponse()
+        body = response.read()
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(body))
+        if response.status not in (200, 304):
+            raise RuntimeError(f"{path}: {response.status}")
+    connection.close()
+
+def fetch_etags(port, paths):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    etags = {}
+    for path in set(paths):
+        connection.request("GET", path, headers={"Accept-Encoding": "gzip"})
+        response = connection.getresponse()
+        response.read()
+        etags[path] = response.getheader("ETag")
+    connection.close()
+    return etags
+
+def measure(mode, port, slugs, args, headers, revalidate=False):
+    rng = random.Random(1)
+    paths = [f"/{rng.choice(slugs)}.html" for _ in range(args.requests)]
+    etags = fetch_etags(port, paths) if revalidate else None
+    latencies, sizes = [], []
+    chunks = [paths[i::args.clients] for i in range(args.clients)]
+    threads = [threading.Thread(target=client, args=(port, chunk, headers, etags, latencies, sizes))
+               for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"{mode:<11} {len(latencies) / elapsed:>9.0f} {sum(sizes) / len(sizes) / 1024:>10.1f} "
+          f"{1000 * batch.percentile(latencies, 50):>8.2f} {1000 * batch.percentile(latencies, 99):>8.2f}")
+
+def check_regenerate(site_dir, slugs, args):
+    """제공 중인 페이지를 다시 쓰면서 요청합니다. 문제가 없으면 True"""
+    server = wiki_server.WikiServer(site_dir, port=0, quiet=True).start()
+    paths = {slug: wiki_site.page_path(site_dir, slug) for slug in slugs[:args.regenerate_pages]}
+    originals = {slug: open(path, encoding="utf-8").read() for slug, path in paths.items()}
+    stop = threading.Event()
+    writes, write_errors, bad = [0], [], []
+
+    def writer():
+        while not stop.is_set():
+            for slug, path in paths.items():
+                writes[0] += 1
+                try:
+                    wiki.write_atomic(path, originals[slug].replace("</body>", f"<!-- {writes[0]} --></body>"),
+                                      precompress=True)
+                except OSError as e:
+                    write_errors.append(repr(e))
+            time.sleep(0.002)
+
+    def reader(count):
+        connection = http.client.HTTPConnection("127.0.0.1", server.port)
+        for i in range(count):
+            slug = slugs[i % len(paths)]
+            connection.request("GET", f"/{slug}.html", headers={"Accept-Encoding": "gzip"})
+            response = connection.getresponse()
+            body = response.read()
+            try:
+                if response.getheader("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                complete = response.status == 200 and body.decode("utf-8").rstrip().endswith("</html>")
+            except (OSError, UnicodeDecodeError, EOFError):
+                complete = False
+            if not complete:
+                bad.append(f"{slug}: {response.status}")
+        connection.close()
+
+    threads = [threading.Thread(target=reader, args=(args.requests // args.clients,)) for _ in range(args.clients)]
+    write_thread = threading.Thread(target=writer)
+    write_thread.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop.set()
+    write_thread.join()
+
+    # 쓰기가 끝난 뒤에는 마지막으로 쓴 내용을 보내야 함 (압축/비압축 모두)
+    stale = 0
+    connection = http.client.HTTPConnection("127.0.0.1", server.port)
+    for slug, path in paths.items():
+        expected = open(path, "rb").read()
+        for headers in ({}, {"Accept-Encoding": "gzip"}):
+            connection.request("GET", f"/{slug}.html", headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+            if response.getheader("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            stale += body != expected
+    connection.close()
+    server.stop()
+
+    print(f"regenerate: 요청 {len(threads) * (args.requests // args.clients)}개, 다시 쓰기 {writes[0]}회, "
+          f"교체 실패 {len(write_errors)}, 잘못된 응답 {len(bad)}, 이전 내용 {stale}")
+    for error in (write_errors + bad)[:5]:
+        print("  ", error)
+    return not write_errors and not bad and not stale
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="사이트의 페이지 수")
+    parser.add_argument("--requests", type=int, default=4000, help="모드별 요청 수")
+    parser.add_argument("--clients", type=int, default=16, help="동시 클라이언트 연결 수")
+    parser.add_argument("--regenerate-pages", type=int, default=5, help="제공 중에 다시 쓸 페이지 수")
+    args = parser.parse_args()
+
+    site_dir = tempfile.mkdtemp(prefix="bench_server_")
+    try:
+        slugs = make_site(site_dir, args.pages)
+        print(f"페이지 {args.pages}개, 요청 {args.requests}개, 동시 연결 {args.clients}개")
+        print(f"{'mode':<11} {'req/s':>9} {'KiB/resp':>10} {'p50 ms':>8} {'p99 ms':>8}")
+
+        port = free_port()
+        process = start_server([sys.executable, "-m", "http.server", str(port), "--bind", "127.0.0.1",
+                                "--directory", site_dir], port)
+        try:
+            measure("simple", port, slugs, args, {})
+        finally:
+            process.kill()
+            process.wait()
+
+        port = free_port()
+        process = start_server([sys.executable, "wiki_server.py", "--site", site_dir, "--port", str(port), "--quiet"],
+                               port)
+        try:
+            measure("identity", port, slugs, args, {})
+            measure("gzip", port, slugs, args, {"Accept-Encoding": "gzip"})
+            measure("revalidate", port, slugs, args, {"Accept-Encoding": "gzip"}, revalidate=True)
+        finally:
+            process.kill()
+            process.wait()
+
+        ok = check_regenerate(site_dir, slugs, args)
+    finally:
+        shutil.rmtree(site_dir, ignore_errors=True)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
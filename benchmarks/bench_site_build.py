@@ -0,0 +1,62 @@
+# benchmarks/bench_site_build.py
+"""
+정적 사이트 전체 재생성(wiki_site.build_site) 벤치마크입니다.
+가짜 백엔드(fake_llm) 텍스트로 저장된 글 N개를 만든 뒤, 프로세스 수별 재렌더링 시간과
+페이지당 디스크 사용량(인라인 CSS vs 공유 스타일시트)을 출력합니다.
+
+사용법: python benchmarks/bench_site_build.py [--articles 2000] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_llm
+import llm
+import llm_client
+import llm_to_wiki
+import wiki
+import wiki_site
+
+def make_site(site_dir, count):
+    backend = fake_llm.FakeBackend(time_scale=0)
+    wiki_site.ensure_site(site_dir)
+    for i in range(count):
+        title = f"가상의 사건 {i}"
+        text = f"{title}에 관한 설명"
+        articles = {
+            category: backend.generate(llm_to_wiki.build_category_prompt(text, category, ["동맹", "조약"]),
+                                       llm_client.DEFAULT_MODEL, 8192, 0.8).text
+            for category in llm.CATEGORIES
+        }
+        wiki_site.save_article(site_dir, wiki_site.slugify(title), title, text, {}, articles)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=2000, help="저장된 글 수")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="비교할 프로세스 수 목록 (쉼표 구분)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as site_dir:
+        start = time.perf_counter()
+        make_site(site_dir, args.articles)
+        print(f"저장된 글 {args.articles}개 준비: {time.perf_counter() - start:.2f}s")
+
+        for workers in (int(w) for w in args.workers.split(",")):
+            start = time.perf_counter()
+            count = wiki_site.build_site(site_dir, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"workers={workers:<3} pages={count:<6} {elapsed:8.2f}s {count / elapsed:9.0f} pages/s")
+
+        slug = wiki_site.stored_slugs(site_dir)[0]
+        record = wiki_site.load_article(site_dir, slug)
+        linked = os.path.getsize(wiki_site.page_path(site_dir, slug))
+        inline = len("".join(wiki.render_wiki_page(record["title"], record["articles"])).encode("utf-8"))
+        print(f"페이지 크기: 인라인 CSS {inline:,}B → 공유 스타일시트 {linked:,}B "
+              f"({inline - linked:,}B/page 절약, {(inline - linked) * args.articles / 2 ** 20:.1f}MB/사이트)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_structured.py
+"""
+구조화 출력(JSON) 모드와 기존 8회 호출 파이프라인의 지연 시간과 토큰 비용을 비교하는 벤치마크입니다.
+
+- calls8:      summarize_event(키워드 1회) → expand_event_to_wiki(카테고리 7회, 동시 요청)
+- json/<N>:    summarize_event_structured(JSON 키워드 1회) → expand_event_structured(N개 묶음 요청, 동시 요청)
+
+사건을 하나씩 생성하며 사건당 API 호출 수, 입력/출력 토큰 수, 지연(p50/p95)을 출력합니다.
+기본은 가짜 백엔드(fake_llm)이며, --api-key를 주면 실제 Gemini API로 측정합니다 (토큰은 API가 보고한 사용량).
+응답 캐시와 토큰 예산은 끄고 측정합니다.
+
+사용법: python benchmarks/bench_structured.py [--events 10] [--batches 1 2 3] [--text-chars 1200] [--time-scale 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+import fake_llm
+import llm
+import llm_cache
+import llm_client
+import llm_to_wiki
+import metrics
+import scheduler
+import token_budget
+
+def make_text(i, chars):
+    """chars 글자 정도의 사건 설명 (호출마다 다시 보내는 입력의 크기를 현실적으로 맞춤)"""
+    sentence = f"가상의 전쟁 {i}은 19세기 말 여러 국가가 국경과 교역로를 두고 대립하면서 시작되어 복잡한 전개를 보였다. "
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+def run_calls8(text, api_key, concurrency):
+    keywords = llm.summarize_event(text, api_key=api_key, max_tokens=2048)
+    return llm_to_wiki.expand_event_to_wiki(text, keywords, api_key, concurrency=concurrency)
+
+def run_structured(text, api_key, batches):
+    keywords = llm.summarize_event_structured(text, api_key=api_key, max_tokens=2048)
+    return llm_to_wiki.expand_event_structured(text, keywords, api_key, section_batches=batches, concurrency=batches)
+
+def measure(mode, generate, events, text_chars):
+    latencies = []
+    totals = {"api_calls": 0, "input_tokens": 0, "output_tokens": 0}
+    sections = 0
+    for i in range(events):
+        run = metrics.RunMetrics(f"{mode} {i}")
+        start = time.perf_counter()
+        with metrics.activate(run):
+            articles = generate(make_text(i, text_chars))
+        latencies.append(time.perf_counter() - start)
+        sections += sum(1 for article in articles.values() if article)
+        for key in totals:
+            totals[key] += run.totals()[key]
+    per = {key: value / events for key, value in totals.items()}
+    print(f"{mode:<8} {per['api_calls']:>10.1f} {per['input_tokens']:>11,.0f} {per['output_tokens']:>12,.0f} "
+          f"{sections / events:>9.1f} {batch.percentile(latencies, 50):>8.2f} {batch.percentile(latencies, 95):>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10, help="모드별로 생성할 사건 수")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 2, 3], help="비교할 묶음 요청 수")
+    parser.add_argument("--text-chars", type=int, default=1200, help="사건 설명 길이 (글자)")
+    parser.add_argument("--concurrency", type=int, default=len(llm.CATEGORIES), help="calls8의 동시 카테고리 요청 수")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="가짜 백엔드 지연 배율")
+    parser.add_argument("--api-key", help="주면 가짜 백엔드 대신 실제 Gemini API로 측정")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        llm_client.set_backend(fake_llm.FakeBackend(time_scale=args.time_scale, seed=1))
+    llm_cache.configure(enabled=False)
+    token_budget.configure(enabled=False)
+    scheduler.configure(requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10)
+
+    print(f"사건 {args.events}개, 설명 {args.text_chars}자, 값은 사건당 평균 (지연은 초)")
+    print(f"{'mode':<8} {'api calls':>10} {'input tok':>11} {'output tok':>12} {'sections':>9} {'p50':>8} {'p95':>8}")
+    api_key = args.api_key or ""
+    measure("calls8", lambda text: run_calls8(text, api_key, args.concurrency), args.events, args.text_chars)
+    for batches in args.batches:
+        measure(f"json/{batches}", lambda text: run_structured(text, api_key, batches), args.events, args.text_chars)
+
+if __name__ == "__main__":
+    main()
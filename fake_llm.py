@@ -0,0 +1,265 @@
+# fake_llm.py
+"""
+API 키 없이 파이프라인을 실행하고 성능을 측정하기 위한 로컬 가짜 LLM 백엔드입니다.
+llm_client.set_backend(FakeBackend(...))로 설정하면 summarize_event / expand_category가 이 백엔드를 사용합니다.
+
+- 출력: 프롬프트 종류(키워드 / 카테고리 서술)에 맞는 한국어 텍스트. 같은 프롬프트에는 같은 텍스트를 돌려줍니다.
+  generate_json(과 schema를 준 generate_stream)은 응답 스키마(키워드 / 섹션 묶음)에 맞는 JSON을 돌려줍니다.
+- 컨텍스트 캐시: create_context로 올린 앞부분을 cached_context로 참조하면 앞부분 + prompt 전체에 대한 응답을 돌려주고,
+  앞부분의 토큰 수를 cached_tokens로 보고합니다.
+- 지연: 첫 토큰까지의 시간(TTFT)은 로그정규분포, 이후 생성 속도는 tokens_per_second로 결정됩니다.
+  stall_rate를 주면 그 확률로 첫 토큰이 파레토 분포만큼 더 늦어지는 긴 꼬리 지연이 생깁니다 (헤징 측정용).
+- 오류 주입: error_rate 확률로 429/503 등 재시도 가능한 오류를 발생시킵니다.
+"""
+import hashlib
+import itertools
+import json
+import math
+import random
+import threading
+import time
+
+import llm
+import llm_client
+import scheduler
+
+KEYWORD_POOL = [
+    "왕조", "동맹", "조약", "국경", "봉기", "개혁", "외교", "교역로", "요새", "함대", "성벽", "관료제",
+    "세금", "흉년", "망명", "사절단", "연합군", "포위전", "휴전", "배상금", "민심", "신문", "소설", "영화",
+    "다큐멘터리", "기념비", "학계", "논쟁", "전설", "민요", "귀족", "상인", "농민", "장군", "황제", "의회",
+]
+SUBJECTS = ["양국의 조정은", "당시 지배층은", "현지 주민들은", "연합군 지휘부는", "상인 조합은", "후대의 역사가들은"]
+PREDICATES = [
+    "을 계기로 기존 질서를 재편하려 하였다.", "을 둘러싸고 치열한 논쟁을 벌였다.", "의 여파를 오랫동안 감당해야 했다.",
+    "을 중심으로 세력을 결집하였다.", "을 통해 새로운 교역 체계를 마련하였다.", "에 대해 서로 다른 평가를 내렸다.",
+]
+NOTES = ["당시 기록에 따름", "일부 사료에는 다르게 기록됨", "후대의 추정", "현지 구전", "공식 문서 기준"]
+
+class FakeAPIError(Exception):
+    """주입된 오류. scheduler.is_retryable이 판별할 수 있도록 HTTP 상태 코드(code)를 가집니다."""
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+class FakeBackend:
+    """
+    llm_client.GeminiBackend와 같은 인터페이스(generate, generate_json, generate_stream, agenerate,
+    create_context, delete_context)를 가진 가짜 백엔드입니다.
+    ttft_median / ttft_sigma: 첫 토큰까지 시간(초)의 로그정규분포 중앙값과 시그마
+    stall_rate / stall_seconds: 첫 토큰이 stall_seconds 이상(파레토 분포, 형상 모수 1.5) 더 늦어질 확률과 그 최솟값
+    tokens_per_second: 출력 생성 속도
+    output_tokens_mean: 카테고리 서술 응답의 평균 출력 토큰 수 (max_tokens를 넘으면 MAX_TOKENS로 잘림)
+    error_rate / error_codes: 호출당 오류 발생 확률과 발생시킬 상태 코드
+    time_scale: 모든 지연에 곱하는 배율 (0이면 지연 없음)
+    context_cache: False이면 create_context가 400 오류를 내어 컨텍스트 캐시를 지원하지 않는 모델처럼 동작
+    context_min_tokens: 추정 토큰 수가 이보다 작은 앞부분은 create_context가 400 오류로 거부 (제공자의 최소 캐시 크기)
+    """
+    name = "Fake"
+    cache_namespace = "fake"
+
+    def __init__(self, ttft_median=0.6, ttft_sigma=0.5, tokens_per_second=150.0, output_tokens_mean=700,
+                 error_rate=0.0, error_codes=(429, 503), time_scale=1.0, seed=None, chunk_tokens=20, context_cache=True,
+                 stall_rate=0.0, stall_seconds=5.0, context_min_tokens=0):
+        self.ttft_median = ttft_median
+        self.ttft_sigma = ttft_sigma
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens_mean = output_tokens_mean
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.time_scale = time_scale
+        self.chunk_tokens = chunk_tokens
+        self.context_cache = context_cache
+        self.context_min_tokens = context_min_tokens
+        self.contexts = {}  # 캐시 이름 -> 앞부분
+        self._context_ids = itertools.count(1)
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # ---- 지연 / 오류 ----
+    def sample_ttft(self):
+        with self._lock:
+            ttft = self.ttft_median * math.exp(self._rng.gauss(0, self.ttft_sigma))
+            if self._rng.random() < self.stall_rate:
+                ttft += self.stall_seconds * self._rng.paretovariate(1.5)
+            return ttft
+
+    def _maybe_fail(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.error_rate
+            code = self._rng.choice(self.error_codes) if fail else None
+            if fail:
+                self.errors += 1
+        if fail:
+            raise FakeAPIError(code, "injected error")
+
+    def _sleep(self, seconds):
+        if self.time_scale > 0 and seconds > 0:
+            time.sleep(seconds * self.time_scale)
+
+    async def _asleep(self, seconds):
+        import asyncio
+        if self.time_scale > 0 and seconds > 0:
+            await asyncio.sleep(seconds * self.time_scale)
+
+    # ---- 출력 생성 ----
+    @staticmethod
+    def _prompt_rng(prompt):
+        seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+        return random.Random(seed)
+
+    def _keyword_text(self, rng):
+        lines = []
+        for category in llm.CATEGORIES:
+            lines.append(f"{category}: " + ", ".join(rng.sample(KEYWORD_POOL, 12)))
+        return "\n".join(lines)
+
+    def _article_text(self, rng, target_tokens):
+        paragraphs = []
+        length = 0
+        target_chars = target_tokens * 2  # 한국어 약 2글자당 1토큰
+        while length < target_chars:
+            sentences = []
+            for _ in range(rng.randint(3, 5)):
+                sentence = f"{rng.choice(SUBJECTS)} [{rng.choice(KEYWORD_POOL)}]{rng.choice(PREDICATES)}"
+                if rng.random() < 0.3:
+                    sentence = sentence[:-1] + f" ({rng.choice(NOTES)})."
+                sentences.append(sentence)
+            paragraph = " ".join(sentences)
+            paragraphs.append(paragraph)
+            length += len(paragraph) + 1
+        return "\n".join(paragraphs)
+
+    def _full_text(self, prompt):
+        rng = self._prompt_rng(prompt)
+        if "키워드 12개" in prompt:
+            return self._keyword_text(rng)
+        target = max(50, int(rng.gauss(self.output_tokens_mean, self.output_tokens_mean * 0.25)))
+        return self._article_text(rng, target)
+
+    def _json_text(self, prompt, schema):
+        # 스키마의 항목에 "keywords"가 있으면 키워드 목록, 아니면 카테고리별 섹션 본문
+        item = schema["items"]["properties"]
+        categories = item["category"]["enum"]
+        if "keywords" in item:
+            rng = self._prompt_rng(prompt)
+            value = [{"category": category, "keywords": rng.sample(KEYWORD_POOL, 12)} for category in categories]
+        else:
+            value = []
+            for category in categories:
+                rng = self._prompt_rng(f"{prompt}\n{category}")
+                target = max(50, int(rng.gauss(self.output_tokens_mean, self.output_tokens_mean * 0.25)))
+                value.append({"category": category, "text": self._article_text(rng, target)})
+        return json.dumps(value, ensure_ascii=False)
+
+    def _response_text(self, prompt, max_tokens):
+        continuation = llm_client.parse_continuation_prompt(prompt)
+        if continuation:
+            # 이어쓰기 요청에는 원래 응답에서 끊긴 지점 이후의 나머지를 돌려줌
+            original, partial = continuation
+            text = self._full_text(original)
+            end = text.find(partial)
+            text = text[end + len(partial):] if end >= 0 else text
+        else:
+            text = self._full_text(prompt)
+        limit = max_tokens * 2
+        if len(text) > limit:
+            return text[:limit], "MAX_TOKENS"
+        return text, "STOP"
+
+    # ---- 컨텍스트 캐시 ----
+    def create_context(self, prefix, model, ttl):
+        if not self.context_cache:
+            raise FakeAPIError(400, "context caching is not supported for this model")
+        tokens = scheduler.estimate_tokens(prefix)
+        if tokens < self.context_min_tokens:
+            raise FakeAPIError(400, f"Cached content is too small. total_token_count={tokens}, "
+                                    f"min_total_token_count={self.context_min_tokens}")
+        name = f"cachedContents/fake-{next(self._context_ids)}"
+        with self._lock:
+            self.contexts[name] = prefix
+        return name
+
+    def delete_context(self, name):
+        with self._lock:
+            self.contexts.pop(name, None)
+
+    def _resolve(self, prompt, cached_context):
+        # (전체 프롬프트, 캐시에서 읽은 토큰 수)
+        if cached_context is None:
+            return prompt, 0
+        with self._lock:
+            prefix = self.contexts.get(cached_context)
+        if prefix is None:
+            raise FakeAPIError(404, f"{cached_context} not found")
+        return prefix + prompt, len(prefix) // 2
+
+    def _usage(self, prompt, text, finish_reason, cached_tokens):
+        input_tokens = len(prompt) // 2 + 1
+        output_tokens = len(text) // 2 + 1
+        return llm_client.LLMResponse(text, finish_reason, input_tokens, output_tokens, input_tokens + output_tokens,
+                                      cached_tokens=cached_tokens)
+
+    # ---- 백엔드 인터페이스 ----
+    def generate(self, prompt, model, max_tokens, temperature, cached_context=None):
+        prompt, cached_tokens = self._resolve(prompt, cached_context)
+        ttft = self.sample_ttft()
+        self._sleep(ttft)
+        self._maybe_fail()
+        text, finish_reason = self._response_text(prompt, max_tokens)
+        output_tokens = len(text) // 2 + 1
+        self._sleep(output_tokens / self.tokens_per_second)
+        return self._usage(prompt, text, finish_reason, cached_tokens)
+
+    def _json_output(self, prompt, schema, max_tokens):
+        text, finish_reason = self._json_text(prompt, schema), "STOP"
+        if len(text) > max_tokens * 2:
+            # 출력 길이 한도로 잘린 JSON (파싱 실패)
+            text, finish_reason = text[:max_tokens * 2], "MAX_TOKENS"
+        return text, finish_reason
+
+    def generate_json(self, prompt, model, max_tokens, temperature, schema):
+        ttft = self.sample_ttft()
+        self._sleep(ttft)
+        self._maybe_fail()
+        text, finish_reason = self._json_output(prompt, schema, max_tokens)
+        output_tokens = len(text) // 2 + 1
+        self._sleep(output_tokens / self.tokens_per_second)
+        input_tokens = len(prompt) // 2 + 1
+        return llm_client.LLMResponse(text, finish_reason, input_tokens, output_tokens, input_tokens + output_tokens)
+
+    async def agenerate(self, prompt, model, max_tokens, temperature, cached_context=None):
+        prompt, cached_tokens = self._resolve(prompt, cached_context)
+        ttft = self.sample_ttft()
+        await self._asleep(ttft)
+        self._maybe_fail()
+        text, finish_reason = self._response_text(prompt, max_tokens)
+        output_tokens = len(text) // 2 + 1
+        await self._asleep(output_tokens / self.tokens_per_second)
+        return self._usage(prompt, text, finish_reason, cached_tokens)
+
+    def generate_stream(self, prompt, model, max_tokens, temperature, cached_context=None, schema=None):
+        prompt, cached_tokens = self._resolve(prompt, cached_context)
+        ttft = self.sample_ttft()
+        self._sleep(ttft)
+        self._maybe_fail()
+        if schema is not None:
+            text, finish_reason = self._json_output(prompt, schema, max_tokens)
+        else:
+            text, finish_reason = self._response_text(prompt, max_tokens)
+        input_tokens = len(prompt) // 2 + 1
+        step = self.chunk_tokens * 2
+        pieces = [text[i:i + step] for i in range(0, len(text), step)] or [""]
+        for index, piece in enumerate(pieces):
+            if index:
+                self._sleep(self.chunk_tokens / self.tokens_per_second)
+            last = index == len(pieces) - 1
+            output_tokens = len(text) // 2 + 1 if last else 0
+            yield llm_client.LLMResponse(
+                piece, finish_reason if last else None, input_tokens, output_tokens,
+                input_tokens + output_tokens if last else 0, cached_tokens=cached_tokens if last else 0
+            )
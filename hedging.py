@@ -0,0 +1,449 @@
+# hedging.py
+"""
+느린 요청의 헤징(hedged request)과 제공자 장애 조치입니다.
+
+- LatencyTracker: 제공자·요청 종류별로 최근 WINDOW개 요청의 응답 시간을 기억합니다 (스트리밍은 첫 조각까지의 시간).
+- CircuitBreaker: 제공자별로 재시도 가능한 오류가 FAILURE_THRESHOLD번 연속되면 COOLDOWN초 동안 그 제공자를 건너뛰고,
+  그 뒤에는 요청 하나로 회복되었는지 확인합니다.
+- Hedger: 요청이 실제로 나간 뒤 최근 응답 시간의 PERCENTILE 분위수(최소 MIN_DELAY초)가 지나도 끝나지 않으면
+  같은 요청을 보조 제공자(없으면 같은 제공자)로 한 번 더 보내고 먼저 성공한 응답을 씁니다.
+  진 요청은 취소합니다. asyncio에서는 태스크를 취소합니다. 스레드에서는 두 요청을 모두 작업 스레드에서 보내고
+  호출한 스레드는 먼저 성공한 결과를 바로 반환하며, 요청마다 취소 토큰을 두어 진 요청이 분당 한도 슬롯을 받기 전이나
+  재시도 대기 중이면 거기서 멈추고, 이미 보냈으면 응답을 버립니다 (스트림은 닫음).
+  요청이 재시도로 해결되지 않은 일시적 오류로 실패하거나 그 제공자의 차단기가 열리면 다음 제공자로 다시 보냅니다.
+
+llm_client는 요청마다 attempt(provider, track)를 넘깁니다. attempt는 실제 API 호출 함수를 track(fn)
+(코루틴 함수는 track.awrap(fn))으로 감싸 scheduler.call에 넘기며, track이 호출 시작 시각, 소요 시간, 오류를 기록합니다.
+provider는 name 속성을 가진 객체(llm_client.Provider)입니다.
+"""
+import contextvars
+import math
+import queue
+import threading
+import time
+from collections import deque
+
+import scheduler
+
+PERCENTILE = 95          # 이 분위수보다 오래 걸리는 요청을 헤징 (요청의 약 5%가 두 번 나감)
+WINDOW = 200             # 제공자·요청 종류별로 기억하는 최근 응답 시간 수
+MIN_SAMPLES = 20         # 이보다 기록이 적으면 헤징하지 않음
+MIN_DELAY = 1.0          # 초. 분위수가 이보다 짧아도 이만큼은 기다림
+FAILURE_THRESHOLD = 5    # 연속 오류가 이만큼이면 차단기를 엶
+COOLDOWN = 30.0          # 초. 차단기가 열려 있는 시간
+
+class ProviderUnavailable(Exception):
+    """제공자의 차단기가 열려 있어 더 재시도하지 않았습니다. 다음 제공자로 넘어갑니다."""
+
+class Abandoned(scheduler.Cancelled):
+    """헤징에서 진 요청을 보내지 않고 멈췄습니다."""
+
+class _AttemptToken(scheduler.CancelToken):
+    """요청 하나의 취소 신호입니다. 호출한 작업이 취소되거나(parent) 헤징에서 져서 cancel()되면 취소됩니다."""
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+
+    @property
+    def cancelled(self):
+        return self._event.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.cancelled:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._event.wait(min(remaining, scheduler.CANCEL_POLL_INTERVAL))
+        return True
+
+class LatencyTracker:
+    """{키: 최근 응답 시간(초)}를 보관합니다. 여러 스레드에서 공유할 수 있습니다."""
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    @staticmethod
+    def _percentile(ordered, percentile):
+        return ordered[min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1)]
+
+    def percentile(self, key, percentile):
+        """key의 최근 응답 시간 분위수(초). 기록이 MIN_SAMPLES개보다 적으면 None"""
+        with self._lock:
+            ordered = sorted(self._samples.get(key, ()))
+        if len(ordered) < MIN_SAMPLES:
+            return None
+        return self._percentile(ordered, percentile)
+
+    def stats(self):
+        with self._lock:
+            items = {key: sorted(samples) for key, samples in self._samples.items()}
+        return {
+            key: {"samples": len(ordered), **{f"p{q}": round(self._percentile(ordered, q), 3) for q in (50, 95, 99)}}
+            for key, ordered in items.items() if ordered
+        }
+
+class CircuitBreaker:
+    """제공자 이름별 연속 오류 수와 차단 상태입니다. 여러 스레드에서 공유할 수 있습니다."""
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened = {}  # 이름 -> 차단기를 연 (또는 마지막으로 확인 요청을 허용한) 시각
+        self._lock = threading.Lock()
+
+    def is_open(self, name):
+        with self._lock:
+            opened = self._opened.get(name)
+            return opened is not None and time.monotonic() - opened < self.cooldown
+
+    def allow(self, name):
+        """name으로 보내도 되면 True. 냉각 시간이 지났으면 확인 요청 하나를 허용하고 다시 냉각 시간을 셉니다."""
+        with self._lock:
+            opened = self._opened.get(name)
+            if opened is None:
+                return True
+            now = time.monotonic()
+            if now - opened < self.cooldown:
+                return False
+            self._opened[name] = now
+            return True
+
+    def success(self, name):
+        with self._lock:
+            self._failures[name] = 0
+            recovered = self._opened.pop(name, None) is not None
+        if recovered:
+            print(f"{name}: 요청이 다시 성공하여 사용을 재개합니다.")
+
+    def failure(self, name):
+        with self._lock:
+            self._failures[name] = self._failures.get(name, 0) + 1
+            if self._failures[name] < self.threshold:
+                return
+            opened = name in self._opened
+            self._opened[name] = time.monotonic()
+        if not opened:
+            print(f"{name}: 오류가 {self.threshold}번 연속되어 {self.cooldown:g}초 동안 다른 제공자로 요청합니다.")
+
+    def open_names(self):
+        with self._lock:
+            now = time.monotonic()
+            return sorted(name for name, opened in self._opened.items() if now - opened < self.cooldown)
+
+class _Track:
+    """attempt 하나의 상태입니다. role: "primary", "hedge"(헤징), "failover"(장애 조치)"""
+    def __init__(self, hedger, provider, kind, role, can_fail_over):
+        self.hedger = hedger
+        self.provider = provider
+        self.key = f"{provider.name}|{kind}"
+        self.role = role
+        self.can_fail_over = can_fail_over
+        self.started_at = None
+        self.abandoned = False
+        self.token = None  # _call_hedged에서 이 요청만 취소할 수 있게 둠
+        self._failed = False
+
+    def abandon(self):
+        self.abandoned = True
+        if self.token is not None:
+            self.token.cancel()
+
+    def _before(self):
+        if self.abandoned:
+            raise Abandoned("더 빠른 응답을 받아 요청을 보내지 않았습니다.")
+        if self._failed and self.can_fail_over and self.hedger.breaker.is_open(self.provider.name):
+            raise ProviderUnavailable(f"{self.provider.name}: 오류가 계속되어 잠시 사용하지 않습니다.")
+        start = time.monotonic()
+        if self.started_at is None:
+            self.started_at = start
+        return start
+
+    def _failure(self, error):
+        self._failed = True
+        if scheduler.is_retryable(error):
+            self.hedger.breaker.failure(self.provider.name)
+
+    def _success(self, start):
+        self.hedger.breaker.success(self.provider.name)
+        self.hedger.latency.record(self.key, time.monotonic() - start)
+
+    def __call__(self, fn):
+        """scheduler.call에 넘길 fn을 감쌉니다."""
+        def send():
+            start = self._before()
+            try:
+                result = fn()
+            except Exception as e:
+                self._failure(e)
+                raise
+            self._success(start)
+            return result
+        return send
+
+    def awrap(self, fn):
+        """scheduler.call_async에 넘길 코루틴 함수 fn을 감쌉니다."""
+        async def send():
+            start = self._before()
+            try:
+                result = await fn()
+            except Exception as e:
+                self._failure(e)
+                raise
+            self._success(start)
+            return result
+        return send
+
+class Hedger:
+    """
+    요청 하나를 제공자 목록으로 헤징/장애 조치하며 보냅니다. 여러 스레드와 이벤트 루프에서 공유할 수 있습니다.
+    enabled=False이면 헤징은 하지 않고 장애 조치만 합니다.
+    """
+    def __init__(self, enabled=True, percentile=PERCENTILE, min_delay=MIN_DELAY, failure_threshold=FAILURE_THRESHOLD,
+                 cooldown=COOLDOWN):
+        self.options = {
+            "enabled": enabled, "percentile": percentile, "min_delay": min_delay,
+            "failure_threshold": failure_threshold, "cooldown": cooldown,
+        }
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def delay(self, provider, kind):
+        """provider의 kind 요청을 헤징하기 전에 기다릴 시간(초). 헤징하지 않으면 None"""
+        if not self.enabled:
+            return None
+        value = self.latency.percentile(f"{provider.name}|{kind}", self.percentile)
+        return None if value is None else max(self.min_delay, value)
+
+    def _route(self, providers):
+        """
+        (시도할 순서, 헤징 대상, 첫 요청의 역할). 차단기가 열린 제공자는 뒤로 보내며 (모두 열려 있으면 그래도 순서대로 시도),
+        그래서 기본 제공자를 건너뛰면 첫 요청부터 장애 조치로 셉니다.
+        """
+        providers = [p for p in providers if p is not None]
+        available = [p for p in providers if self.breaker.allow(p.name)]
+        candidates = available + [p for p in providers if p not in available]
+        role = "primary"
+        if candidates[0] is not providers[0]:
+            role = "failover"
+            with self._lock:
+                self.failovers += 1
+        return candidates, available[1] if len(available) > 1 else candidates[0], role
+
+    @staticmethod
+    def _fails_over(error):
+        if isinstance(error, scheduler.Cancelled):
+            return False
+        return isinstance(error, ProviderUnavailable) or scheduler.is_retryable(error)
+
+    def _failover(self, provider, target, error):
+        with self._lock:
+            self.failovers += 1
+        print(f"{provider.name} 요청 실패, {target.name}(으)로 다시 요청합니다:", error)
+
+    def _start_hedge(self):
+        # 분당 한도로 대기 중인 요청이 있으면 중복 요청이 한도만 더 쓰므로 헤징하지 않음
+        if scheduler.get_scheduler().stats()["waiting"]:
+            return False
+        with self._lock:
+            self.hedges += 1
+        return True
+
+    def _won(self, track):
+        if track.role == "hedge":
+            with self._lock:
+                self.hedge_wins += 1
+
+    def call(self, attempt, providers, kind, discard=None):
+        """
+        attempt(provider, track)로 요청하고 결과를 반환합니다.
+        providers: [기본 제공자, 보조 제공자 또는 None], kind: 응답 시간을 따로 기록할 요청 종류
+        discard(result): 진 요청이 뒤늦게 성공했을 때 그 결과를 버리는 함수 (스트림 닫기 등)
+        """
+        candidates, hedge_target, role = self._route(providers)
+        delay = self.delay(candidates[0], kind)
+        if delay is None:
+            return self._call_inline(attempt, candidates, kind, role)
+        return self._call_hedged(attempt, candidates, hedge_target, kind, role, delay, discard)
+
+    def _call_inline(self, attempt, candidates, kind, role):
+        # 헤징하지 않을 때는 호출한 스레드에서 그대로 보내고, 실패하면 다음 제공자로
+        for index, provider in enumerate(candidates):
+            last = index + 1 == len(candidates)
+            track = _Track(self, provider, kind, "failover" if index else role, not last)
+            try:
+                return attempt(provider, track)
+            except Exception as e:
+                if last or not self._fails_over(e):
+                    raise
+                self._failover(provider, candidates[index + 1], e)
+
+    def _call_hedged(self, attempt, candidates, hedge_target, kind, role, delay, discard):
+        # 요청마다 호출한 작업의 취소 토큰에 연결된 토큰을 두어, 진 요청은 분당 한도 슬롯을 받기 전에 멈춤
+        parent = scheduler.current_cancel_token()
+        results = queue.Queue()
+        lock = threading.Lock()
+        running = []
+
+        def start(provider, role, can_fail_over):
+            track = _Track(self, provider, kind, role, can_fail_over)
+            track.token = _AttemptToken(parent)
+
+            def run():
+                try:
+                    with scheduler.cancellation(track.token):
+                        outcome = (track, None, attempt(provider, track))
+                except BaseException as e:
+                    outcome = (track, e, None)
+                with lock:
+                    if not track.abandoned:
+                        results.put(outcome)
+                        return
+                if outcome[1] is None and discard:
+                    discard(outcome[2])
+
+            # 우선순위, 취소 토큰, 계측 대상 실행이 작업 스레드에도 이어지도록 context를 복사
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(run,), name=f"llm_{role}", daemon=True).start()
+            running.append(track)
+            return track
+
+        primary = start(candidates[0], role, len(candidates) > 1)
+        next_index = 1
+        hedged = False
+        try:
+            while True:
+                scheduler.check_cancelled()
+                timeout = scheduler.CANCEL_POLL_INTERVAL
+                if not hedged and primary.started_at is not None:
+                    remaining = primary.started_at + delay - time.monotonic()
+                    if remaining > 0:
+                        timeout = min(timeout, remaining)
+                    elif self._start_hedge():
+                        hedged = True
+                        start(hedge_target, "hedge", False)
+                try:
+                    track, error, result = results.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                running.remove(track)
+                if error is None:
+                    self._won(track)
+                    return result
+                if running:
+                    continue
+                if next_index < len(candidates) and self._fails_over(error):
+                    self._failover(track.provider, candidates[next_index], error)
+                    hedged = True
+                    start(candidates[next_index], "failover", next_index + 1 < len(candidates))
+                    next_index += 1
+                    continue
+                raise error
+        finally:
+            with lock:
+                for track in running:
+                    track.abandon()
+                leftovers = []
+                while not results.empty():
+                    leftovers.append(results.get_nowait())
+            for _, error, result in leftovers:
+                if error is None and discard:
+                    discard(result)
+
+    async def acall(self, attempt, providers, kind):
+        """call()의 asyncio 버전입니다. attempt(provider, track)는 코루틴 함수이며, 진 요청의 태스크는 취소합니다."""
+        import asyncio
+        candidates, hedge_target, role = self._route(providers)
+        delay = self.delay(candidates[0], kind)
+        tasks = {}
+
+        def start(provider, role, can_fail_over):
+            track = _Track(self, provider, kind, role, can_fail_over)
+            tasks[asyncio.ensure_future(attempt(provider, track))] = track
+            return track
+
+        primary = start(candidates[0], role, len(candidates) > 1)
+        next_index = 1
+        hedged = delay is None
+        try:
+            while True:
+                timeout = None
+                if not hedged:
+                    timeout = scheduler.CANCEL_POLL_INTERVAL
+                    if primary.started_at is not None:
+                        remaining = primary.started_at + delay - time.monotonic()
+                        if remaining > 0:
+                            timeout = remaining
+                        elif self._start_hedge():
+                            hedged = True
+                            timeout = None
+                            start(hedge_target, "hedge", False)
+                done, _ = await asyncio.wait(list(tasks), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                # 같은 순간에 끝났으면 성공한 요청을 먼저 봄
+                for task in sorted(done, key=lambda t: t.exception() is not None):
+                    track = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self._won(track)
+                        return task.result()
+                    if tasks:
+                        continue
+                    if next_index < len(candidates) and self._fails_over(error):
+                        self._failover(track.provider, candidates[next_index], error)
+                        hedged = True
+                        start(candidates[next_index], "failover", next_index + 1 < len(candidates))
+                        next_index += 1
+                        continue
+                    raise error
+        finally:
+            for task, track in tasks.items():
+                track.abandon()
+                if track.started_at is not None:
+                    # 취소한 요청의 응답 시간은 알 수 없으므로 지금까지 걸린 시간을 기록 (분위수가 낮게 치우치지 않도록)
+                    self.latency.record(track.key, time.monotonic() - track.started_at)
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        with self._lock:
+            counts = {"hedges": self.hedges, "hedge_wins": self.hedge_wins, "failovers": self.failovers}
+        counts["open_providers"] = self.breaker.open_names()
+        counts["latency"] = self.latency.stats()
+        return counts
+
+# 프로세스 전역 설정 (설정 패널의 "느린 요청 헤징"과 연결)
+_hedger = None
+_hedger_lock = threading.Lock()
+
+def configure(**options):
+    """
+    프로세스 전역 Hedger를 새 설정(enabled, percentile, min_delay, failure_threshold, cooldown)으로 교체합니다.
+    설정이 지금과 같으면 기존 Hedger(응답 시간 기록, 차단기 상태)를 그대로 유지합니다.
+    """
+    global _hedger
+    with _hedger_lock:
+        candidate = Hedger(**options)
+        if _hedger is None or _hedger.options != candidate.options:
+            _hedger = candidate
+    return _hedger
+
+def get_hedger():
+    global _hedger
+    if _hedger is None:
+        with _hedger_lock:
+            if _hedger is None:
+                _hedger = Hedger()
+    return _hedger
@@ -0,0 +1,184 @@
+# job_store.py
+"""
+GUI 생성 작업의 기록을 저장하는 SQLite 저장소입니다.
+
+- jobs: 전송한 작업마다 한 행 (제목, 입력 텍스트, 상태, 마지막 진행 문구, 결과 페이지, 오류, 시각).
+  상태가 바뀔 때(시작, 완료/오류/취소)만 쓰고, 실행 중의 진행 문구와 미리보기는 GUI가 메모리에 들고 있습니다.
+- results: 생성된 페이지마다 한 행. 같은 페이지를 다시 생성하면 이전 행을 지우고 새로 넣어 목록 맨 위로 올립니다.
+- 목록은 최신 항목부터 기본 키 기준으로 페이지 단위로 읽으므로(before보다 작은 id를 limit개),
+  기록이 아무리 많아도 한 페이지를 읽는 비용은 같습니다. 목록에는 입력 텍스트의 앞부분만 싣고 전체는 get()으로 읽습니다.
+- 프로그램이 작업 도중 종료되면 끝나지 않은 작업이 남으므로, 다음 시작 때 mark_interrupted()로 "중단됨" 처리합니다.
+
+여러 스레드에서 공유할 수 있으며, WAL 모드라 목록을 읽는 중에도 기록할 수 있습니다.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = "jobs.sqlite3"
+# 목록에 싣는 입력 텍스트 길이 (글자)
+SNIPPET_CHARS = 200
+INTERRUPTED = "중단됨"
+
+_JOB_COLUMNS = "job_id, title, substr(text, 1, ?), state, progress, page_path, error, created_at, finished_at"
+_JOB_KEYS = ("job_id", "title", "text", "state", "progress", "page_path", "error", "created_at", "finished_at")
+_RESULT_COLUMNS = "result_id, title, path, job_id, updated_at"
+_RESULT_KEYS = ("result_id", "title", "path", "job_id", "updated_at")
+# 지운 행의 id를 다시 쓰지 않도록 AUTOINCREMENT (목록 행이나 작업이 들고 있는 id가 다른 항목을 가리키지 않게 함)
+_TABLES = {
+    "jobs": (
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " job_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " title TEXT NOT NULL,"
+        " text TEXT NOT NULL,"
+        " state TEXT NOT NULL,"
+        " progress TEXT NOT NULL DEFAULT '',"
+        " page_path TEXT,"
+        " error TEXT,"
+        " created_at REAL NOT NULL,"
+        " finished_at REAL)"
+    ),
+    "results": (
+        "CREATE TABLE IF NOT EXISTS results ("
+        " result_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " path TEXT UNIQUE NOT NULL,"
+        " title TEXT NOT NULL,"
+        " job_id INTEGER NOT NULL,"
+        " updated_at REAL NOT NULL)"
+    ),
+}
+
+class JobStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for table, create in _TABLES.items():
+            self._create_table(table, create)
+        # 끝나지 않은 작업만 담는 부분 색인 (mark_interrupted가 전체 기록을 훑지 않게 함)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_unfinished ON jobs(job_id) WHERE finished_at IS NULL")
+
+    def _create_table(self, table, create):
+        """table을 만듭니다. AUTOINCREMENT 없이 만든 이전 버전의 표는 같은 행으로 다시 만듭니다."""
+        row = self._conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        if row is None:
+            self._conn.execute(create)
+            return
+        if "AUTOINCREMENT" in row[0].upper():
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            self._conn.execute(create)
+            self._conn.execute(f"INSERT INTO {table} SELECT * FROM {table}_old")
+            self._conn.execute(f"DROP TABLE {table}_old")
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def add(self, title, text, state="대기"):
+        """새 작업을 기록하고 job_id를 반환합니다."""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO jobs (title, text, state, created_at) VALUES (?, ?, ?, ?)",
+                (title, text, state, time.time())
+            ).lastrowid
+
+    def set_state(self, job_id, state):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET state = ? WHERE job_id = ?", (state, job_id))
+
+    def finish(self, job_id, state, progress="", page_path=None, error=None):
+        """
+        작업을 끝난 상태로 기록합니다. page_path가 있으면 결과 목록에 넣습니다.
+        Returns:
+            결과 목록에 넣었으면 그 행 (results()의 항목과 같은 형식), 아니면 None
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, progress = ?, page_path = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                    (state, progress, page_path, error, now, job_id)
+                )
+                result = None
+                if page_path:
+                    title = self._conn.execute("SELECT title FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0]
+                    self._conn.execute("DELETE FROM results WHERE path = ?", (page_path,))
+                    result_id = self._conn.execute(
+                        "INSERT INTO results (path, title, job_id, updated_at) VALUES (?, ?, ?, ?)",
+                        (page_path, title, job_id, now)
+                    ).lastrowid
+                    result = dict(zip(_RESULT_KEYS, (result_id, title, page_path, job_id, now)))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def mark_interrupted(self):
+        """끝나지 않은 채 남은 작업(이전 실행이 도중에 종료됨)을 "중단됨"으로 기록하고 그 수를 반환합니다."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ? WHERE finished_at IS NULL",
+                (INTERRUPTED, time.time())
+            ).rowcount
+
+    def get(self, job_id):
+        """작업 하나 (입력 텍스트 전체 포함). 없으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_JOB_KEYS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(_JOB_KEYS, row)) if row else None
+
+    def jobs(self, before=None, limit=100):
+        """
+        job_id가 before보다 작은 작업을 최신순으로 limit개 반환합니다 (before=None이면 가장 최근부터).
+        text는 앞부분 SNIPPET_CHARS글자만 담습니다.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE job_id < ? ORDER BY job_id DESC LIMIT ?",
+                (SNIPPET_CHARS, before if before is not None else 2 ** 63 - 1, limit)
+            ).fetchall()
+        return [dict(zip(_JOB_KEYS, row)) for row in rows]
+
+    def results(self, before=None, limit=100):
+        """result_id가 before보다 작은 결과 페이지를 최근에 생성한 순으로 limit개 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_RESULT_COLUMNS} FROM results WHERE result_id < ? ORDER BY result_id DESC LIMIT ?",
+                (before if before is not None else 2 ** 63 - 1, limit)
+            ).fetchall()
+        return [dict(zip(_RESULT_KEYS, row)) for row in rows]
+
+    def stats(self):
+        with self._lock:
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            results = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"jobs": jobs, "results": results}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(path=DEFAULT_STORE_PATH):
+    """경로별로 하나의 JobStore를 공유합니다."""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = JobStore(path)
+        return store
@@ -1,51 +1,246 @@
 # llm.py
+import difflib
 import re
-from google import genai
-from google.genai import types
+import llm_client
+
+CATEGORIES = ["개요", "배경", "전개/경과", "결과", "영향", "여담", "대중 매체에서 다루는 이 사건"]
+# 키워드가 이보다 적은 카테고리는 형식이 잘못된 것으로 보고 보완 요청에 포함합니다.
+MIN_KEYWORDS = 3
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+# 줄 앞의 목록 기호/번호/마크다운 강조 ("- ", "1. ", "**", "#")
+_LINE_PREFIX_RE = re.compile(r"^\s*(?:[-*•#>]+|\d+[.)])?\s*")
+
+def _normalize_category(name):
+    return _NON_WORD_RE.sub("", name)
+
+_NORMALIZED_CATEGORIES = {_normalize_category(cat): cat for cat in CATEGORIES}
+
+# 구조화 출력(JSON) 모드의 키워드 응답 스키마: [{"category": 카테고리, "keywords": [키워드, ...]}, ...]
+KEYWORD_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "category": {"type": "STRING", "enum": CATEGORIES},
+            "keywords": {"type": "ARRAY", "items": {"type": "STRING"}},
+        },
+        "required": ["category", "keywords"],
+    },
+}
+
+def build_keyword_prompt(text):
+    return (
+        f'{text}에 입력된 역사적 사건을 “개요, 배경, 전개, 결과, 영향, 여담, 대중 매체에서 다루는 이 사건” '
+        "각각에 대해 관련된 키워드 12개를 생성하시오. 결과는 각 줄이 '카테고리: 키워드1, 키워드2, ..., 키워드12' 형태여야 합니다."
+    )
+
+def match_category(name):
+    """
+    모델이 쓴 카테고리 이름을 CATEGORIES 중 하나로 맞춥니다. 맞출 수 없으면 None.
+    공백/기호/강조 표시를 무시하고 비교하며, 앞부분만 쓴 이름("전개", "대중 매체")이나 뒤에 덧붙인 이름("여담(트리비아)")은
+    앞부분이 겹치는 카테고리가 하나뿐일 때, 그 외에는 충분히 비슷한(difflib) 하나의 카테고리로 맞춥니다.
+    """
+    normalized = _normalize_category(name)
+    if not normalized:
+        return None
+    if normalized in _NORMALIZED_CATEGORIES:
+        return _NORMALIZED_CATEGORIES[normalized]
+    prefixed = [cat for key, cat in _NORMALIZED_CATEGORIES.items()
+                if key.startswith(normalized) or normalized.startswith(key)]
+    if len(prefixed) == 1:
+        return prefixed[0]
+    close = difflib.get_close_matches(normalized, list(_NORMALIZED_CATEGORIES), n=1, cutoff=0.6)
+    return _NORMALIZED_CATEGORIES[close[0]] if close else None
+
+def parse_keyword_line(line):
+    """
+    '카테고리: 키워드1, 키워드2, ...' 형태의 한 줄을 (카테고리, [키워드, ...])로 변환합니다.
+    카테고리 이름은 match_category로 맞추며, 목록 기호와 강조 표시(**)는 무시합니다.
+    형식이 맞지 않거나 알 수 없는 카테고리이면 None을 반환합니다.
+    """
+    match = re.match(r'^([^:：]+)[:：]\s*(.*)', _LINE_PREFIX_RE.sub("", line))
+    if not match:
+        return None
+    cat = match_category(match.group(1))
+    if cat is None:
+        return None
+    keywords = [kw.strip(" *") for kw in match.group(2).split(",") if kw.strip(" *")]
+    return cat, keywords
+
+def parse_keywords(output_text):
+    """
+    키워드 응답 전체를 {카테고리: [키워드, ...]}로 변환합니다. 나오지 않은 카테고리는 빈 리스트입니다.
+    같은 카테고리가 여러 번 나오면 키워드가 더 많은 줄을 씁니다.
+    """
+    keywords_dict = {}
+    lines = output_text.splitlines()
+    for line in lines:
+        parsed = parse_keyword_line(line)
+        if parsed:
+            cat, keywords = parsed
+            if len(keywords) > len(keywords_dict.get(cat, [])):
+                keywords_dict[cat] = keywords
+    return {cat: keywords_dict.get(cat, []) for cat in CATEGORIES}
+
+def incomplete_categories(keywords_dict):
+    """키워드가 없거나 MIN_KEYWORDS개보다 적은 카테고리 (CATEGORIES 순서)"""
+    return [cat for cat in CATEGORIES if len(keywords_dict.get(cat) or []) < MIN_KEYWORDS]
+
+def build_repair_prompt(text, categories):
+    return (
+        f'{text}에 입력된 역사적 사건을 “{", ".join(categories)}” 각각에 대해 관련된 키워드 12개를 생성하시오. '
+        "결과는 각 줄이 '카테고리: 키워드1, 키워드2, ..., 키워드12' 형태여야 하며, 카테고리 이름은 위에 적힌 그대로 써야 합니다."
+    )
+
+def repair_keywords(text, keywords_dict, api_key="", max_tokens=1024):
+    """
+    키워드가 없거나 부족한 카테고리만 한 번의 작은 요청으로 다시 받아 keywords_dict를 보완합니다.
+    보완 요청으로도 얻지 못한 카테고리는 그대로 둡니다 (키워드가 없는 카테고리는 위키 작성을 건너뜁니다).
+    Returns:
+        보완된 새 딕셔너리 (CATEGORIES 순서)
+    """
+    missing = incomplete_categories(keywords_dict)
+    if not missing:
+        return keywords_dict
+    output_text = llm_client.generate_text(api_key, build_repair_prompt(text, missing), max_tokens,
+                                           temperature=0.8, label="키워드 보완")
+    return _merge_repair(keywords_dict, missing, parse_keywords(output_text))
+
+async def arepair_keywords(text, keywords_dict, api_key="", max_tokens=1024):
+    """repair_keywords의 asyncio 버전입니다."""
+    missing = incomplete_categories(keywords_dict)
+    if not missing:
+        return keywords_dict
+    output_text = await llm_client.agenerate_text(api_key, build_repair_prompt(text, missing), max_tokens,
+                                                  temperature=0.8, label="키워드 보완")
+    return _merge_repair(keywords_dict, missing, parse_keywords(output_text))
+
+def _merge_repair(keywords_dict, missing, repaired):
+    merged = {cat: keywords_dict.get(cat) or [] for cat in CATEGORIES}
+    for cat in missing:
+        if len(repaired[cat]) > len(merged[cat]):
+            merged[cat] = repaired[cat]
+    return merged
+
+def build_structured_keyword_prompt(text):
+    return (
+        f'{text}에 입력된 역사적 사건을 “{", ".join(CATEGORIES)}” 각각에 대해 관련된 키워드 12개를 생성하시오. '
+        '결과는 카테고리마다 {"category": 카테고리, "keywords": [키워드1, ..., 키워드12]} 형태의 항목을 담은 JSON 배열이어야 합니다.'
+    )
+
+def parse_keyword_items(items):
+    """
+    KEYWORD_SCHEMA 형태의 JSON 응답을 {카테고리: [키워드, ...]}로 변환합니다 (parse_keywords와 같은 형태).
+    형식이 틀린 항목은 무시하고, 나오지 않은 카테고리는 빈 리스트입니다.
+    """
+    keywords_dict = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or not isinstance(item.get("keywords"), list):
+            continue
+        cat = match_category(str(item.get("category", "")))
+        keywords = [str(kw).strip() for kw in item["keywords"] if str(kw).strip()]
+        if cat and len(keywords) > len(keywords_dict.get(cat, [])):
+            keywords_dict[cat] = keywords
+    return {cat: keywords_dict.get(cat, []) for cat in CATEGORIES}
+
+def summarize_event_structured(text, api_type="Gemini", api_key="", max_tokens=1024):
+    """
+    summarize_event의 구조화 출력 버전입니다. 키워드를 자유 텍스트 대신 JSON 응답 스키마(KEYWORD_SCHEMA)로 받습니다.
+    응답을 해석할 수 없거나 빠진/부족한 카테고리는 repair_keywords로 보완합니다.
+    """
+    if api_type != "Gemini":
+        raise ValueError("지원되지 않는 API 타입입니다. 현재는 Gemini만 지원합니다.")
+    try:
+        items = llm_client.generate_json(api_key, build_structured_keyword_prompt(text), KEYWORD_SCHEMA, max_tokens,
+                                         temperature=0.8, label="키워드")
+    except llm_client.StructuredOutputError as e:
+        print("키워드 JSON 응답 해석 실패, 전체 보완 요청:", e)
+        items = []
+    return repair_keywords(text, parse_keyword_items(items), api_key, max_tokens)
+
+def keywords_input_hash(text, max_tokens):
+    """키워드 추출 입력의 해시. 같으면 저장된 keywords_dict를 그대로 재사용할 수 있습니다."""
+    return llm_client.input_hash(build_keyword_prompt(text), max_tokens)
 
 def summarize_event(text, api_type="Gemini", api_key="", max_tokens=1024):
     """
     입력된 역사적 사건 텍스트를 기반으로 7개 카테고리(개요, 배경, 전개/경과, 결과, 영향, 여담, 대중 매체)
     각각 관련된 키워드 12개를 생성하라는 프롬프트를 Gemini API에 전달하고, 
     각 카테고리별 키워드 리스트를 딕셔너리로 반환합니다.
+    응답에서 빠졌거나 키워드가 부족한 카테고리는 repair_keywords로 한 번 더 요청해 보완합니다.
     
     예시 결과: {"개요": [키워드1, 키워드2, ... , 키워드12], ...}
     """
-    prompt = (
-        f'{text}에 입력된 역사적 사건을 “개요, 배경, 전개, 결과, 영향, 여담, 대중 매체에서 다루는 이 사건” '
-        "각각에 대해 관련된 키워드 12개를 생성하시오. 결과는 각 줄이 '카테고리: 키워드1, 키워드2, ..., 키워드12' 형태여야 합니다."
-    )
+    prompt = build_keyword_prompt(text)
     
     if api_type == "Gemini":
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                max_output_tokens=max_tokens,
-                temperature=0.8
-            )
-        )
-        output_text = response.text
+        output_text = llm_client.generate_text(api_key, prompt, max_tokens, temperature=0.8, label="키워드")
     else:
         raise ValueError("지원되지 않는 API 타입입니다. 현재는 Gemini만 지원합니다.")
+    return repair_keywords(text, parse_keywords(output_text), api_key, max_tokens)
+
+async def asummarize_event(text, api_type="Gemini", api_key="", max_tokens=1024):
+    """summarize_event의 asyncio 버전입니다. 결과 형식은 같습니다."""
+    prompt = build_keyword_prompt(text)
     
-    categories = ["개요", "배경", "전개/경과", "결과", "영향", "여담", "대중 매체에서 다루는 이 사건"]
-    keywords_dict = {}
-    lines = output_text.splitlines()
-    for line in lines:
-        match = re.match(r'^\s*([^:]+)\s*:\s*(.*)', line)
-        if match:
-            cat = match.group(1).strip()
-            keywords = [kw.strip() for kw in match.group(2).split(",") if kw.strip()]
-            if cat in categories:
-                keywords_dict[cat] = keywords
-    for cat in categories:
-        if cat not in keywords_dict:
-            keywords_dict[cat] = []
-    return keywords_dict
+    if api_type != "Gemini":
+        raise ValueError("지원되지 않는 API 타입입니다. 현재는 Gemini만 지원합니다.")
+    output_text = await llm_client.agenerate_text(api_key, prompt, max_tokens, temperature=0.8, label="키워드")
+    return await arepair_keywords(text, parse_keywords(output_text), api_key, max_tokens)
+
+def summarize_event_stream(text, api_type="Gemini", api_key="", max_tokens=1024):
+    """
+    summarize_event의 스트리밍 버전입니다. 키워드 응답을 스트리밍으로 받으면서
+    한 줄이 완성될 때마다 (카테고리, 키워드 리스트)를 바로 yield하므로,
+    호출 측은 나머지 줄을 기다리지 않고 해당 카테고리의 위키 작성을 시작할 수 있습니다.
+    같은 카테고리가 여러 번 나오면 처음 것만 사용합니다. 키워드가 MIN_KEYWORDS개보다 적은 줄은 바로 내보내지 않고,
+    끝까지 나오지 않았거나 부족한 카테고리를 스트림이 끝난 뒤 한 번의 보완 요청(repair_keywords)으로 받아 yield합니다.
+    보완 후에도 키워드가 없는 카테고리는 빈 리스트로 yield합니다.
+    """
+    prompt = build_keyword_prompt(text)
+    
+    if api_type != "Gemini":
+        raise ValueError("지원되지 않는 API 타입입니다. 현재는 Gemini만 지원합니다.")
+    
+    seen = {}
+    incomplete = {}
+    buffer = ""
+    for chunk in llm_client.generate_text_stream(api_key, prompt, max_tokens, temperature=0.8, label="키워드"):
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            parsed = _accept_line(line, seen, incomplete)
+            if parsed:
+                yield parsed
+    parsed = _accept_line(buffer, seen, incomplete)
+    if parsed:
+        yield parsed
+    remaining = [cat for cat in CATEGORIES if cat not in seen]
+    if remaining:
+        repaired = repair_keywords(text, {**incomplete, **seen}, api_key, max_tokens)
+        for cat in remaining:
+            yield cat, repaired[cat]
+
+def _accept_line(line, seen, incomplete):
+    # 키워드가 충분한 처음 줄이면 (카테고리, 키워드)를, 아니면 None (부족한 줄은 incomplete에 모아 둠)
+    parsed = parse_keyword_line(line)
+    if not parsed or parsed[0] in seen:
+        return None
+    cat, keywords = parsed
+    if len(keywords) < MIN_KEYWORDS:
+        if len(keywords) > len(incomplete.get(cat, [])):
+            incomplete[cat] = keywords
+        return None
+    seen[cat] = keywords
+    return parsed
 
 if __name__ == "__main__":
+    import sys
+    if "--fake" in sys.argv:
+        # API 키 없이 로컬 가짜 백엔드로 실행
+        import fake_llm
+        llm_client.set_backend(fake_llm.FakeBackend())
     test_text = "이 사건은 19세기 말에 발생한 가상의 전쟁으로, 여러 국가가 참여하여 복잡한 전개를 보였다."
     result = summarize_event(test_text, api_type="Gemini", api_key="YOUR_API_KEY", max_tokens=1024)
     print(result)
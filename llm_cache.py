@@ -0,0 +1,186 @@
+# llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "llm_cache.sqlite3")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024   # 256MB
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60     # 30일
+
+class ResponseCache:
+    """
+    (프롬프트, 모델, temperature, max_tokens)의 해시를 키로 LLM 응답 텍스트를 저장하는 SQLite 캐시입니다.
+    - 나이 기반 제거: max_age초보다 오래된 항목은 조회 시 무시되고 정리 시 삭제됩니다.
+    - 크기 기반 제거: 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 삭제합니다.
+    - hits / misses / stores / evictions 카운터를 제공합니다.
+    여러 스레드에서 공유할 수 있으며, WAL 모드라 여러 프로세스가 같은 파일을 써도 됩니다.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+        self.evict()
+
+    @staticmethod
+    def make_key(prompt, model, temperature, max_tokens):
+        payload = json.dumps([prompt, model, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """캐시된 응답 텍스트를 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self.stores += 1
+            self._evict_locked(now)
+
+    def evict(self):
+        """만료된 항목을 지우고, 크기 한도를 넘으면 LRU 순서로 삭제합니다."""
+        with self._lock:
+            self._evict_locked(time.time())
+
+    def _evict_locked(self, now):
+        cursor = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age,))
+        self.evictions += max(cursor.rowcount, 0)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 한도의 90%까지 줄여서 매 저장마다 제거가 반복되지 않도록 합니다.
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= target:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# 프로세스 전역 캐시 설정 (설정 패널의 "응답 캐시 사용" / "캐시 새로고침"과 연결)
+_cache = None
+_cache_lock = threading.Lock()
+_enabled = True
+_refresh = False
+_options = {}
+
+def configure(enabled=True, refresh=False, **options):
+    """
+    enabled=False이면 캐시를 읽지도 쓰지도 않습니다(우회).
+    refresh=True이면 캐시를 읽지 않고 새로 생성한 응답으로 덮어씁니다(새로고침).
+    options(path, max_bytes, max_age)가 바뀌면 다음 호출 때 캐시를 다시 엽니다.
+    """
+    global _enabled, _refresh, _options, _cache
+    with _cache_lock:
+        _enabled = enabled
+        _refresh = refresh
+        if options != _options:
+            _options = options
+            if _cache is not None:
+                _cache.close()
+                _cache = None
+
+def get_cache():
+    """현재 설정의 공유 ResponseCache를 반환합니다. 캐시가 꺼져 있으면 None."""
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(**_options)
+    return _cache
+
+def lookup(prompt, model, temperature, max_tokens):
+    """
+    캐시에서 응답을 찾습니다.
+    Returns:
+        (key, value): 캐시를 쓰지 않으면 key는 None, 적중하지 않았거나 새로고침 중이면 value는 None
+    """
+    cache = get_cache()
+    if cache is None:
+        return None, None
+    key = ResponseCache.make_key(prompt, model, temperature, max_tokens)
+    if _refresh:
+        return key, None
+    return key, cache.get(key)
+
+def store(key, value):
+    cache = get_cache()
+    if cache is not None and key is not None and value:
+        cache.put(key, value)
+
+def stats():
+    cache = get_cache()
+    if cache is None:
+        return {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "entries": 0, "bytes": 0}
+    return cache.stats()
+
+if __name__ == "__main__":
+    import sys
+    cache = ResponseCache()
+    if len(sys.argv) > 1 and sys.argv[1] == "clear":
+        cache.clear()
+    print(cache.stats())
@@ -0,0 +1,822 @@
+# llm_client.py
+import contextlib
+import hashlib
+import itertools
+import json
+import re
+import threading
+
+import hedging
+import llm_cache
+import metrics
+import scheduler
+import singleflight
+import token_budget
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+# 응답이 출력 길이 한도로 끊겼을 때 나머지를 이어쓰기로 요청하는 최대 횟수
+MAX_CONTINUATIONS = 4
+# 이어쓰기 프롬프트에 넣는 끊긴 응답의 끝부분 길이 (글자)
+CONTINUATION_CONTEXT_CHARS = 1500
+# 이어쓴 응답의 앞부분이 끊긴 응답의 끝과 겹칠 때 한 번만 남기는 겹침 길이 범위 (글자)
+STITCH_MIN_OVERLAP = 8
+STITCH_MAX_OVERLAP = 200
+
+# 제공자 측 컨텍스트 캐시 (여러 요청이 공유하는 프롬프트 앞부분을 한 번만 올려 두고 참조)
+CONTEXT_CACHE_MIN_TOKENS = 1024  # 앞부분이 이보다 짧으면(추정) 만들지 않음 (제공자의 최소 크기, 저장 비용)
+CONTEXT_CACHE_TTL = 600          # 초. 사용이 끝나면 바로 삭제하며, 삭제하지 못해도 이 시간 뒤에 만료
+
+# 프로세스 전체에서 공유하는 클라이언트 레지스트리: (API 키, HTTP 옵션) -> genai.Client
+# genai.Client는 내부 HTTP 커넥션 풀을 유지하므로, 재사용하면 호출마다 TCP/TLS 연결을 새로 맺지 않습니다.
+_clients = {}
+_clients_lock = threading.Lock()
+_default_http_options = {}
+
+def _sdk():
+    """
+    google-genai SDK를 처음 필요할 때 가져옵니다.
+    SDK import는 수백 ms가 걸리므로 모듈 로드 시점이 아니라 클라이언트를 만들 때 (또는 warmup()에서) 가져옵니다.
+    """
+    from google import genai
+    from google.genai import types
+    return genai, types
+
+def prepare(api_key=None):
+    """
+    SDK import와 (api_key가 주어지면) 공유 클라이언트 생성을 지금 스레드에서 해 둡니다.
+    실패해도 첫 요청 때 다시 시도하므로 무시합니다.
+    """
+    try:
+        _sdk()
+        if api_key:
+            get_client(api_key)
+    except Exception:
+        pass
+
+def warmup(api_key=None):
+    """
+    prepare()를 백그라운드 스레드에서 실행합니다. GUI가 창을 띄운 뒤 호출하면 첫 요청 때 기다리지 않습니다.
+    """
+    thread = threading.Thread(target=prepare, args=(api_key,), name="llm_warmup", daemon=True)
+    thread.start()
+    return thread
+
+def _options_key(http_options):
+    """딕셔너리 값(headers 등)을 포함한 HTTP 옵션을 해시 가능한 키로 변환합니다."""
+    items = []
+    for name, value in sorted(http_options.items()):
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        items.append((name, value))
+    return tuple(items)
+
+def set_default_http_options(**http_options):
+    """
+    get_client()에 옵션을 주지 않았을 때 사용할 기본 HTTP 옵션(base_url, timeout 등)을 지정합니다.
+    이미 만들어진 클라이언트에는 영향을 주지 않습니다.
+    """
+    global _default_http_options
+    _default_http_options = dict(http_options)
+
+def get_client(api_key, **http_options):
+    """
+    API 키와 HTTP 옵션에 해당하는 공유 genai.Client를 반환합니다. 없으면 한 번만 생성합니다.
+    여러 스레드에서 동시에 호출해도 같은 키에 대해서는 하나의 클라이언트만 만들어집니다.
+    http_options는 types.HttpOptions의 인자(base_url, timeout, api_version, headers 등)입니다.
+    """
+    options = http_options or _default_http_options
+    key = (api_key, _options_key(options))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            genai, types = _sdk()
+            if options:
+                client = genai.Client(api_key=api_key, http_options=types.HttpOptions(**options))
+            else:
+                client = genai.Client(api_key=api_key)
+            _clients[key] = client
+    return client
+
+def close_clients():
+    """레지스트리의 모든 클라이언트를 닫고 비웁니다. (프로그램 종료 시 또는 API 키 변경 시)"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+class LLMResponse:
+    """백엔드 공통 응답 형식. 스트리밍에서는 조각마다 하나씩 만들어지며 text는 그 조각의 텍스트입니다."""
+    def __init__(self, text="", finish_reason=None, input_tokens=0, output_tokens=0, total_tokens=0, continuations=0,
+                 cached_tokens=0):
+        self.text = text
+        self.finish_reason = finish_reason  # "STOP", "MAX_TOKENS" 등 (스트리밍에서는 마지막 조각에만)
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.total_tokens = total_tokens
+        self.continuations = continuations  # 이어쓰기로 붙인 응답 수
+        self.cached_tokens = cached_tokens  # input_tokens 중 컨텍스트 캐시에서 읽은 토큰 수
+
+class StructuredOutputError(ValueError):
+    """JSON 모드 응답을 해석할 수 없을 때 (출력 길이 한도로 잘렸거나 형식이 틀림) 발생합니다. response: 받은 응답"""
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response = response
+
+class GeminiBackend:
+    """
+    google-genai SDK를 사용하는 백엔드입니다.
+    모든 백엔드는 name, cache_namespace, generate(), generate_stream()과 asyncio 버전 agenerate()를 같은 형태로 제공하며,
+    JSON 응답 스키마를 지원하는 백엔드는 generate_json()을 제공하고 generate_stream()에 schema도 받습니다.
+    컨텍스트 캐시를 지원하는 백엔드는 create_context() / delete_context()를 제공하고, generate / generate_stream /
+    agenerate에 cached_context(create_context가 반환한 이름)를 주면 prompt를 캐시된 앞부분 뒤에 이어지는 부분으로 보냅니다.
+    """
+    name = "Gemini"
+    cache_namespace = ""  # 기존 캐시 항목과 호환되도록 Gemini는 모델 이름을 그대로 캐시 키에 사용
+
+    def __init__(self, api_key, **http_options):
+        self.client = get_client(api_key, **http_options)
+
+    @staticmethod
+    def _config(max_tokens, temperature, schema=None, cached_context=None):
+        _, types = _sdk()
+        options = {}
+        if schema is not None:
+            options.update(response_mime_type="application/json", response_schema=schema)
+        if cached_context is not None:
+            options["cached_content"] = cached_context
+        return types.GenerateContentConfig(max_output_tokens=max_tokens, temperature=temperature, **options)
+
+    @staticmethod
+    def _to_response(response, text=None):
+        usage = getattr(response, "usage_metadata", None)
+        finish_reason = None
+        if getattr(response, "candidates", None):
+            reason = response.candidates[0].finish_reason
+            if reason is not None:
+                finish_reason = getattr(reason, "name", str(reason))
+        return LLMResponse(
+            text=response.text if text is None else text,
+            finish_reason=finish_reason,
+            input_tokens=getattr(usage, "prompt_token_count", None) or 0,
+            output_tokens=getattr(usage, "candidates_token_count", None) or 0,
+            total_tokens=getattr(usage, "total_token_count", None) or 0,
+            # 명시적 컨텍스트 캐시와 (지원 모델의) 암시적 앞부분 캐시 적중이 모두 여기에 보고됨
+            cached_tokens=getattr(usage, "cached_content_token_count", None) or 0,
+        )
+
+    def create_context(self, prefix, model, ttl):
+        """prefix를 제공자 측 캐시(cached content)로 올리고 그 이름을 반환합니다."""
+        _, types = _sdk()
+        cache = self.client.caches.create(
+            model=model, config=types.CreateCachedContentConfig(contents=[prefix], ttl=f"{int(ttl)}s")
+        )
+        return cache.name
+
+    def delete_context(self, name):
+        self.client.caches.delete(name=name)
+
+    def generate(self, prompt, model, max_tokens, temperature, cached_context=None):
+        response = self.client.models.generate_content(
+            model=model, contents=prompt, config=self._config(max_tokens, temperature, cached_context=cached_context)
+        )
+        return self._to_response(response)
+
+    def generate_json(self, prompt, model, max_tokens, temperature, schema):
+        # 응답 텍스트는 schema(OpenAPI 형식 dict)를 따르는 JSON 문자열
+        response = self.client.models.generate_content(
+            model=model, contents=prompt, config=self._config(max_tokens, temperature, schema)
+        )
+        return self._to_response(response)
+
+    def generate_stream(self, prompt, model, max_tokens, temperature, cached_context=None, schema=None):
+        stream = self.client.models.generate_content_stream(
+            model=model, contents=prompt,
+            config=self._config(max_tokens, temperature, schema=schema, cached_context=cached_context)
+        )
+        try:
+            for chunk in stream:
+                yield self._to_response(chunk, text=chunk.text or "")
+        finally:
+            # 중간에 멈추면(취소 등) HTTP 스트림을 바로 닫음
+            stream.close()
+
+    async def agenerate(self, prompt, model, max_tokens, temperature, cached_context=None):
+        # 같은 클라이언트의 비동기 API(client.aio): 요청 중에 스레드를 점유하지 않고, 태스크를 취소하면 요청도 중단됨
+        response = await self.client.aio.models.generate_content(
+            model=model, contents=prompt, config=self._config(max_tokens, temperature, cached_context=cached_context)
+        )
+        return self._to_response(response)
+
+# 설정되어 있으면 API 키와 무관하게 모든 호출이 이 백엔드로 갑니다 (오프라인 테스트, 벤치마크용)
+_backend_override = None
+
+def set_backend(backend):
+    """모든 호출에 사용할 백엔드를 지정합니다. None이면 기본(API 키별 GeminiBackend)으로 돌아갑니다."""
+    global _backend_override
+    _backend_override = backend
+
+def get_backend(api_key):
+    if _backend_override is not None:
+        return _backend_override
+    return GeminiBackend(api_key)
+
+class Provider:
+    """요청을 보낼 곳(백엔드와 모델)입니다. 헤징의 응답 시간 기록과 차단기는 name별로 따로 관리됩니다."""
+    def __init__(self, backend, model):
+        self.backend = backend
+        self.model = model
+        self.name = f"{backend.name}/{model}"
+
+# 보조 제공자 (설정 패널의 "보조 모델"과 연결): 느린 요청의 헤징과 장애 조치 대상
+_fallback_model = None
+_fallback_backend = None
+
+def configure_fallback(model=None, backend=None):
+    """
+    보조 제공자를 지정합니다. model만 주면 같은 백엔드(API 키)의 다른 모델, backend를 주면 그 백엔드로 보냅니다.
+    둘 다 None이면 느린 요청은 같은 제공자로 헤징하고, 장애 조치는 하지 않습니다.
+    보조 제공자가 보낸 응답도 원래 요청의 응답 캐시 키로 저장됩니다.
+    """
+    global _fallback_model, _fallback_backend
+    _fallback_model = model or None
+    _fallback_backend = backend
+
+def _providers(primary):
+    """[기본 제공자, 보조 제공자 또는 None]"""
+    if _fallback_model is None and _fallback_backend is None:
+        return [primary, None]
+    secondary = Provider(_fallback_backend or primary.backend, _fallback_model or primary.model)
+    return [primary, secondary if secondary.name != primary.name else None]
+
+def _provider_prompt(provider, primary, prompt, cached_context, prefix):
+    # 컨텍스트 캐시는 만든 제공자(백엔드, 모델)에서만 참조할 수 있으므로 다른 제공자에는 전체 프롬프트를 보냄
+    if provider is primary:
+        return prompt, cached_context
+    return prefix + prompt, None
+
+def _finish_failed(recorder, error, track):
+    if track.abandoned:
+        recorder.finish(abandoned=True)
+    else:
+        recorder.finish(error=error if isinstance(error, Exception) else "cancelled")
+
+# 컨텍스트 캐시 설정 (설정 패널의 "컨텍스트 캐시 사용"과 연결)
+_context_cache_enabled = True
+_context_cache_min_tokens = CONTEXT_CACHE_MIN_TOKENS
+# 컨텍스트 캐시를 지원하지 않는 (백엔드, 모델): 이 프로세스에서는 다시 시도하지 않고 전체 프롬프트를 보냄
+_context_unsupported = set()
+# 기능 자체가 없다는 응답 (없는 엔드포인트/모델, 미구현, "not supported" 메시지)
+_UNSUPPORTED_STATUS = {404, 501}
+_UNSUPPORTED_RE = re.compile(r"not supported|unsupported|does not support", re.IGNORECASE)
+
+def _context_unsupported_error(error):
+    """
+    컨텍스트 캐시를 이 (백엔드, 모델)에서 쓸 수 없다는 오류이면 True.
+    앞부분이 최소 캐시 크기보다 작다는 400 등 요청 하나에 대한 거부는 False (그 앞부분만 전체 프롬프트로 보냄)
+    """
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code in _UNSUPPORTED_STATUS or bool(_UNSUPPORTED_RE.search(str(error)))
+
+def configure_context_cache(enabled=True, min_tokens=CONTEXT_CACHE_MIN_TOKENS):
+    global _context_cache_enabled, _context_cache_min_tokens
+    _context_cache_enabled = enabled
+    _context_cache_min_tokens = min_tokens
+
+class SharedContext:
+    """
+    여러 요청이 공유하는 프롬프트 앞부분(prefix)입니다. generate(..., context=ctx)의 prompt는 그 뒤에 이어지는 부분이며,
+    응답 캐시 키와 입력 해시는 항상 prefix + prompt 전체로 계산하므로 컨텍스트 캐시를 쓰는지와 무관합니다.
+    제공자 측 캐시는 실제 API 요청이 처음 필요할 때 한 번만 만들고 close()에서 삭제합니다.
+    만들 수 없으면 (꺼져 있음, 앞부분이 짧음, 지원하지 않는 백엔드/모델, 오류) 전체 프롬프트를 그대로 보냅니다.
+    여러 스레드에서 공유할 수 있습니다.
+    """
+    def __init__(self, prefix, model=DEFAULT_MODEL):
+        self.prefix = prefix
+        self.model = model
+        self._lock = threading.Lock()
+        self._attempted = False
+        self._backend = None
+        self._name = None
+
+    def handle(self, backend, model):
+        """backend/model 요청에 참조할 캐시 이름. 쓸 수 없으면 None"""
+        if model != self.model:
+            return None
+        with self._lock:
+            if not self._attempted:
+                self._attempted = True
+                self._name = self._create(backend)
+                self._backend = backend
+            return self._name
+
+    def _create(self, backend):
+        key = (backend.name, backend.cache_namespace, self.model)
+        if not _context_cache_enabled or key in _context_unsupported or not hasattr(backend, "create_context"):
+            return None
+        estimated = scheduler.estimate_tokens(self.prefix)
+        if estimated < _context_cache_min_tokens:
+            return None
+        recorder = metrics.start_call("컨텍스트 캐시")
+        try:
+            name = scheduler.get_scheduler().call(
+                lambda: backend.create_context(self.prefix, self.model, CONTEXT_CACHE_TTL),
+                estimated_tokens=estimated, on_retry=recorder.retry
+            )
+        except scheduler.Cancelled:
+            recorder.finish(error="cancelled")
+            raise
+        except Exception as e:
+            recorder.finish(error=e)
+            # _context_cache_min_tokens는 글자 수로 어림한 값이라 제공자가 앞부분이 작다고 거부할 수 있으며,
+            # 그 경우는 이 앞부분만 건너뛰고 다음 (긴) 사건에서는 다시 시도함
+            if not scheduler.is_retryable(e) and _context_unsupported_error(e):
+                _context_unsupported.add(key)
+            print("컨텍스트 캐시를 만들 수 없어 전체 프롬프트로 요청합니다:", e)
+            return None
+        recorder.finish()
+        return name
+
+    def discard(self, name):
+        """만료되었거나 거부된 캐시를 버리고, 이후 요청은 전체 프롬프트로 보냅니다."""
+        with self._lock:
+            if self._name == name:
+                self._name = None
+        self._delete(name)
+
+    def close(self):
+        with self._lock:
+            name, self._name = self._name, None
+        if name:
+            self._delete(name)
+
+    def _delete(self, name):
+        try:
+            self._backend.delete_context(name)
+        except Exception as e:
+            # 삭제하지 못한 캐시는 CONTEXT_CACHE_TTL 뒤에 만료됨
+            print("컨텍스트 캐시 삭제 실패:", e)
+
+@contextlib.contextmanager
+def shared_context(prefix, model=DEFAULT_MODEL):
+    """with 블록 안의 요청들이 prefix를 공유하는 SharedContext. 블록이 끝나면 제공자 측 캐시를 삭제합니다."""
+    context = SharedContext(prefix, model)
+    try:
+        yield context
+    finally:
+        context.close()
+
+def _full_prompt(prompt, context):
+    return context.prefix + prompt if context is not None else prompt
+
+def _cache_model(backend, model):
+    return f"{backend.cache_namespace}/{model}" if backend.cache_namespace else model
+
+# 실행 중인 같은 요청을 하나로 합침 (응답 캐시를 꺼도 동작). 끝난 요청의 응답은 llm_cache가 재사용합니다.
+_inflight = singleflight.group("llm")
+
+def _flight_key(kind, prompt, cache_model, temperature, max_tokens):
+    """같은 응답을 돌려줄 요청이면 같은 키 (응답 캐시 키와 같은 매개변수, 프롬프트는 정규화)"""
+    return singleflight.make_key(kind, prompt, cache_model, temperature, max_tokens)
+
+def _shared_response(label, response):
+    # 다른 호출이 받은 응답을 함께 쓴 호출: 토큰을 쓰지 않았으므로 텍스트만 담아 기록
+    shared = LLMResponse(text=response.text, finish_reason=response.finish_reason)
+    metrics.start_call(label).finish(shared, coalesced=True)
+    return shared
+
+def input_hash(prompt, max_tokens, temperature=0.8, model=DEFAULT_MODEL):
+    """
+    요청 입력의 내용 해시입니다. 저장된 중간 결과(키워드, 섹션)를 다시 써도 되는지 판단할 때 사용하며,
+    응답 캐시 키와 같은 방식으로 계산합니다.
+    """
+    return llm_cache.ResponseCache.make_key(prompt, model, temperature, max_tokens)
+
+_CONTINUATION_HEAD = "\n\n아래는 위 요청에 대한 응답의 끝부분으로, 출력 길이 제한 때문에 중간에 끊겼습니다.\n---\n"
+_CONTINUATION_TAIL = "\n---\n끊긴 지점 바로 다음 글자부터 이어서 작성하세요. 이미 작성된 내용을 반복하거나 요약하지 마세요."
+
+def build_continuation_prompt(prompt, partial):
+    """출력 길이 한도로 끊긴 응답의 나머지만 요청하는 프롬프트 (원래 요청 + 끊긴 응답의 끝부분)"""
+    return f"{prompt}{_CONTINUATION_HEAD}{partial[-CONTINUATION_CONTEXT_CHARS:]}{_CONTINUATION_TAIL}"
+
+def parse_continuation_prompt(prompt):
+    """build_continuation_prompt로 만든 프롬프트이면 (원래 프롬프트, 끊긴 응답의 끝부분), 아니면 None"""
+    if not prompt.endswith(_CONTINUATION_TAIL) or _CONTINUATION_HEAD not in prompt:
+        return None
+    original, partial = prompt[:-len(_CONTINUATION_TAIL)].rsplit(_CONTINUATION_HEAD, 1)
+    return original, partial
+
+def stitch(partial, continuation):
+    """
+    이어쓴 응답을 앞부분에 붙입니다. 모델이 끊긴 부분의 끝을 조금 반복하고 시작하면
+    (STITCH_MIN_OVERLAP ~ STITCH_MAX_OVERLAP 글자) 겹친 부분을 한 번만 남깁니다.
+    """
+    longest = min(len(partial), len(continuation), STITCH_MAX_OVERLAP)
+    for size in range(longest, STITCH_MIN_OVERLAP - 1, -1):
+        if partial.endswith(continuation[:size]):
+            return partial + continuation[size:]
+    return partial + continuation
+
+def _combine(response, part):
+    return LLMResponse(
+        text=stitch(response.text, part.text),
+        finish_reason=part.finish_reason,
+        input_tokens=response.input_tokens + part.input_tokens,
+        output_tokens=response.output_tokens + part.output_tokens,
+        total_tokens=response.total_tokens + part.total_tokens,
+        continuations=response.continuations + 1,
+        cached_tokens=response.cached_tokens + part.cached_tokens,
+    )
+
+def _continuation_label(label):
+    return f"{label} (이어쓰기)"
+
+def _collect(stream):
+    """
+    스트림을 끝까지 받아 응답 하나로 합칩니다 (토큰 수와 종료 이유는 마지막 조각의 값).
+    도중에 현재 작업이 취소되면 스트림(HTTP 연결)을 닫고 Cancelled를 발생시킵니다.
+    """
+    parts = []
+    last = None
+    try:
+        for chunk in stream:
+            scheduler.check_cancelled()
+            parts.append(chunk.text)
+            last = chunk
+    except BaseException:
+        _close_stream(stream)
+        raise
+    response = last or LLMResponse()
+    response.text = "".join(parts)
+    return response
+
+def _sender(provider, prompt, max_tokens, temperature, schema=None, cached_context=None):
+    backend, model = provider.backend, provider.model
+    if scheduler.current_cancel_token() is not None:
+        # 취소할 수 있는 작업(GUI 작업, 헤징 요청)의 호출은 스트리밍으로 받아, 취소되면 다음 조각에서 연결을 닫음
+        # (한 번에 받는 호출은 보낸 뒤에는 멈출 수 없어 끝까지 생성되고 과금됨)
+        options = {"schema": schema} if schema is not None else {}
+        if cached_context is not None:
+            options["cached_context"] = cached_context
+        return lambda: _collect(backend.generate_stream(prompt, model, max_tokens, temperature, **options))
+    if schema is not None:
+        return lambda: backend.generate_json(prompt, model, max_tokens, temperature, schema)
+    if cached_context is not None:
+        return lambda: backend.generate(prompt, model, max_tokens, temperature, cached_context=cached_context)
+    return lambda: backend.generate(prompt, model, max_tokens, temperature)
+
+def _request(backend, prompt, model, max_tokens, temperature, label, schema=None, cached_context=None, prefix=""):
+    """
+    캐시를 거치지 않고 스케줄러를 통해 요청하고 계측합니다. schema가 주어지면 JSON 모드로 요청하고,
+    cached_context가 주어지면 prompt를 그 컨텍스트 캐시(내용은 prefix) 뒤에 이어지는 부분으로 보냅니다.
+    요청은 hedging을 거치므로 느리면 보조 제공자(없으면 같은 제공자)로 한 번 더 나가고, 일시적 오류가 계속되면
+    보조 제공자로 넘어갑니다. 보조 제공자에는 컨텍스트 캐시 대신 prefix + prompt 전체를 보냅니다.
+    """
+    primary = Provider(backend, model)
+    request_scheduler = scheduler.get_scheduler()
+
+    def attempt(provider, track):
+        part, context_name = _provider_prompt(provider, primary, prompt, cached_context, prefix)
+        recorder = metrics.start_call(label, provider.name, track.role)
+        estimated = scheduler.estimate_tokens(part)
+        send = track(_sender(provider, part, max_tokens, temperature, schema, context_name))
+        try:
+            response = request_scheduler.call(send, estimated_tokens=estimated, on_retry=recorder.retry)
+        except BaseException as e:
+            _finish_failed(recorder, e, track)
+            raise
+        recorder.finish(response, abandoned=track.abandoned)
+        request_scheduler.settle(estimated, response.total_tokens)
+        return response
+
+    return hedging.get_hedger().call(attempt, _providers(primary), "json" if schema is not None else "call")
+
+def _fall_back(error, context, name):
+    # 컨텍스트 캐시를 참조한 요청이 재시도로 해결되지 않는 오류(만료, 거부)로 실패하면 캐시를 버리고 전체 프롬프트로 다시 보냄
+    if isinstance(error, scheduler.Cancelled) or scheduler.is_retryable(error):
+        return False
+    print("컨텍스트 캐시를 참조한 요청 실패, 전체 프롬프트로 다시 요청합니다:", error)
+    context.discard(name)
+    return True
+
+def _context_request(backend, prompt, model, max_tokens, temperature, label, context):
+    """context가 있으면 제공자 측 캐시를 참조해 prompt(나머지 부분)만 보내고, 쓸 수 없으면 전체 프롬프트를 보냅니다."""
+    name = context.handle(backend, model) if context is not None else None
+    if name is None:
+        return _request(backend, _full_prompt(prompt, context), model, max_tokens, temperature, label)
+    try:
+        return _request(backend, prompt, model, max_tokens, temperature, label, cached_context=name,
+                        prefix=context.prefix)
+    except Exception as e:
+        if not _fall_back(e, context, name):
+            raise
+    return _request(backend, _full_prompt(prompt, context), model, max_tokens, temperature, label)
+
+def generate(api_key, prompt, max_tokens, temperature=0.8, model=DEFAULT_MODEL, label="", budget_key=None,
+             max_continuations=MAX_CONTINUATIONS, context=None):
+    """
+    현재 백엔드로 응답을 생성하여 LLMResponse로 반환합니다.
+    같은 (프롬프트, 모델, temperature, max_tokens)의 응답이 llm_cache에 있으면 API를 호출하지 않습니다.
+    실제 호출은 scheduler를 거치므로 분당 한도 안에서 나가고, 429/5xx 오류는 백오프 후 재시도됩니다.
+    호출 결과는 label(카테고리 이름 등)과 함께 metrics의 현재 실행에 기록됩니다.
+    응답이 출력 길이 한도로 끊기면(finish_reason MAX_TOKENS) 나머지만 이어쓰기로 최대 max_continuations번 요청해
+    붙이며, 캐시에는 이어 붙인 전체 텍스트가 저장됩니다.
+    budget_key(카테고리 등)가 주어지면 요청마다 max_tokens 대신 token_budget이 학습한 예산으로 요청합니다.
+    캐시 키는 항상 max_tokens 기준이므로 예산이 바뀌어도 캐시와 입력 해시는 그대로 유효합니다.
+    context(SharedContext)가 주어지면 prompt는 context.prefix 뒤에 이어지는 부분이며, 앞부분은 가능하면
+    제공자 측 컨텍스트 캐시로 참조합니다 (응답 캐시 키는 전체 프롬프트 기준).
+    같은 요청이 (다른 스레드나 스트림에서) 이미 실행 중이면 API를 호출하지 않고 그 응답을 함께 받습니다.
+    """
+    backend = get_backend(api_key)
+    full_prompt, cache_model = _full_prompt(prompt, context), _cache_model(backend, model)
+    cache_key, cached = llm_cache.lookup(full_prompt, cache_model, temperature, max_tokens)
+    if cached is not None:
+        response = LLMResponse(text=cached, finish_reason="STOP")
+        metrics.start_call(label).finish(response, cache_hit=True)
+        return response
+
+    def run():
+        request_tokens = token_budget.request_tokens(budget_key, max_tokens)
+        response = _context_request(backend, prompt, model, request_tokens, temperature, label, context)
+        while response.finish_reason == "MAX_TOKENS" and response.continuations < max_continuations:
+            part = _context_request(backend, build_continuation_prompt(prompt, response.text), model, request_tokens,
+                                    temperature, _continuation_label(label), context)
+            response = _combine(response, part)
+        token_budget.record(budget_key, response.output_tokens)
+        llm_cache.store(cache_key, response.text)
+        return response
+
+    response, shared = _inflight.run(_flight_key("text", full_prompt, cache_model, temperature, max_tokens), run)
+    return _shared_response(label, response) if shared else response
+
+def generate_text(api_key, prompt, max_tokens, temperature=0.8, model=DEFAULT_MODEL, label="", budget_key=None,
+                  context=None):
+    """generate()의 응답 텍스트만 반환합니다."""
+    return generate(api_key, prompt, max_tokens, temperature, model, label, budget_key, context=context).text
+
+def _schema_cache_model(backend, model, schema):
+    # 같은 프롬프트라도 스키마가 다르면 다른 응답이므로 스키마 해시를 캐시 키의 모델 이름에 붙임
+    digest = hashlib.sha1(json.dumps(schema, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+    return f"{_cache_model(backend, model)}#json-{digest}"
+
+def generate_json(api_key, prompt, schema, max_tokens, temperature=0.8, model=DEFAULT_MODEL, label=""):
+    """
+    JSON 응답 스키마(schema, OpenAPI 형식 dict)를 지정해 요청하고, 응답을 파싱한 객체를 반환합니다.
+    캐시, 스케줄러, 계측, 실행 중인 같은 요청 합치기는 generate()와 같습니다. 잘린 JSON은 이어 붙일 수 없으므로
+    이어쓰기를 하지 않으며, 응답이 올바른 JSON이 아니면 (출력 길이 한도로 잘린 경우 포함) StructuredOutputError를
+    발생시키고 캐시에 저장하지 않습니다. 함께 받은 호출도 각자 파싱한 (공유하지 않는) 객체를 받습니다.
+    """
+    backend = get_backend(api_key)
+    cache_model = _schema_cache_model(backend, model, schema)
+    cache_key, cached = llm_cache.lookup(prompt, cache_model, temperature, max_tokens)
+    if cached is not None:
+        response = LLMResponse(text=cached, finish_reason="STOP")
+        metrics.start_call(label).finish(response, cache_hit=True)
+        return json.loads(cached)
+
+    def run():
+        response = _request(backend, prompt, model, max_tokens, temperature, label, schema=schema)
+        try:
+            json.loads(response.text or "")
+        except ValueError as e:
+            raise StructuredOutputError(
+                f"JSON 응답을 해석할 수 없습니다 (finish_reason={response.finish_reason}): {e}", response
+            ) from e
+        llm_cache.store(cache_key, response.text)
+        return response
+
+    response, shared = _inflight.run(_flight_key("json", prompt, cache_model, temperature, max_tokens), run)
+    if shared:
+        _shared_response(label, response)
+    return json.loads(response.text)
+
+async def _arequest(backend, prompt, model, max_tokens, temperature, label, cached_context=None, prefix=""):
+    """_request()의 asyncio 버전입니다. 헤징에서 진 요청은 태스크를 취소합니다."""
+    primary = Provider(backend, model)
+    request_scheduler = scheduler.get_scheduler()
+
+    async def attempt(provider, track):
+        part, context_name = _provider_prompt(provider, primary, prompt, cached_context, prefix)
+        recorder = metrics.start_call(label, provider.name, track.role)
+        estimated = scheduler.estimate_tokens(part)
+        if context_name is not None:
+            send = lambda: provider.backend.agenerate(part, provider.model, max_tokens, temperature,
+                                                      cached_context=context_name)
+        else:
+            send = lambda: provider.backend.agenerate(part, provider.model, max_tokens, temperature)
+        try:
+            response = await request_scheduler.call_async(track.awrap(send), estimated_tokens=estimated,
+                                                          on_retry=recorder.retry)
+        except BaseException as e:
+            _finish_failed(recorder, e, track)
+            raise
+        recorder.finish(response)
+        request_scheduler.settle(estimated, response.total_tokens)
+        return response
+
+    return await hedging.get_hedger().acall(attempt, _providers(primary), "call")
+
+async def _acontext_request(backend, prompt, model, max_tokens, temperature, label, context):
+    """_context_request()의 asyncio 버전입니다. 컨텍스트 캐시 생성은 한 번뿐이므로 스레드에서 실행합니다."""
+    name = None
+    if context is not None:
+        import asyncio
+        name = await asyncio.to_thread(context.handle, backend, model)
+    if name is None:
+        return await _arequest(backend, _full_prompt(prompt, context), model, max_tokens, temperature, label)
+    try:
+        return await _arequest(backend, prompt, model, max_tokens, temperature, label, cached_context=name,
+                               prefix=context.prefix)
+    except Exception as e:
+        if not _fall_back(e, context, name):
+            raise
+    return await _arequest(backend, _full_prompt(prompt, context), model, max_tokens, temperature, label)
+
+async def agenerate(api_key, prompt, max_tokens, temperature=0.8, model=DEFAULT_MODEL, label="", budget_key=None,
+                    max_continuations=MAX_CONTINUATIONS, context=None):
+    """
+    generate()의 asyncio 버전입니다. 캐시, 스케줄러(분당 한도, 재시도), 계측, 이어쓰기는 generate()와 같으며
+    응답을 기다리는 동안 스레드를 점유하지 않습니다. 태스크를 취소하면 대기/재시도/요청이 모두 중단됩니다.
+    공유 클라이언트의 비동기 커넥션은 이벤트 루프에 묶이므로 오래 실행되는 하나의 루프에서 사용하세요.
+    실행 중인 같은 요청과 합쳐져 기다리는 동안 태스크를 취소해도 그 요청은 계속됩니다.
+    """
+    backend = get_backend(api_key)
+    full_prompt, cache_model = _full_prompt(prompt, context), _cache_model(backend, model)
+    cache_key, cached = llm_cache.lookup(full_prompt, cache_model, temperature, max_tokens)
+    if cached is not None:
+        response = LLMResponse(text=cached, finish_reason="STOP")
+        metrics.start_call(label).finish(response, cache_hit=True)
+        return response
+
+    async def run():
+        request_tokens = token_budget.request_tokens(budget_key, max_tokens)
+        response = await _acontext_request(backend, prompt, model, request_tokens, temperature, label, context)
+        while response.finish_reason == "MAX_TOKENS" and response.continuations < max_continuations:
+            part = await _acontext_request(backend, build_continuation_prompt(prompt, response.text), model,
+                                           request_tokens, temperature, _continuation_label(label), context)
+            response = _combine(response, part)
+        token_budget.record(budget_key, response.output_tokens)
+        llm_cache.store(cache_key, response.text)
+        return response
+
+    key = _flight_key("text", full_prompt, cache_model, temperature, max_tokens)
+    response, shared = await _inflight.arun(key, run)
+    return _shared_response(label, response) if shared else response
+
+async def agenerate_text(api_key, prompt, max_tokens, temperature=0.8, model=DEFAULT_MODEL, label="", budget_key=None,
+                         context=None):
+    """agenerate()의 응답 텍스트만 반환합니다."""
+    return (await agenerate(api_key, prompt, max_tokens, temperature, model, label, budget_key, context=context)).text
+
+def _close_stream(stream):
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+def _stream_request(backend, prompt, model, max_tokens, temperature, label, cached_context=None, prefix=""):
+    """
+    캐시를 거치지 않고 스트리밍으로 한 번 요청하여 응답 조각(LLMResponse)을 차례로 yield합니다.
+    첫 조각을 받기 전의 오류만 scheduler가 재시도합니다 (이미 내보낸 텍스트는 되돌릴 수 없으므로).
+    헤징과 장애 조치도 첫 조각까지만 적용됩니다. 첫 조각이 늦으면 다른 스트림을 하나 더 열고,
+    먼저 첫 조각이 온 스트림을 쓰며 나머지는 닫습니다.
+    """
+    primary = Provider(backend, model)
+    request_scheduler = scheduler.get_scheduler()
+
+    def attempt(provider, track):
+        part, context_name = _provider_prompt(provider, primary, prompt, cached_context, prefix)
+        recorder = metrics.start_call(label, provider.name, track.role)
+        estimated = scheduler.estimate_tokens(part)
+
+        def open_stream():
+            if context_name is not None:
+                stream = iter(provider.backend.generate_stream(part, provider.model, max_tokens, temperature,
+                                                               cached_context=context_name))
+            else:
+                stream = iter(provider.backend.generate_stream(part, provider.model, max_tokens, temperature))
+            return stream, next(stream, None)
+
+        try:
+            stream, first = request_scheduler.call(track(open_stream), estimated_tokens=estimated,
+                                                   on_retry=recorder.retry)
+        except BaseException as e:
+            _finish_failed(recorder, e, track)
+            raise
+        recorder.first_token()
+        return recorder, estimated, stream, first
+
+    def discard(opened):
+        recorder, _, stream, _ = opened
+        _close_stream(stream)
+        recorder.finish(abandoned=True)
+
+    recorder, estimated, stream, first = hedging.get_hedger().call(attempt, _providers(primary), "stream",
+                                                                   discard=discard)
+    last = None
+    try:
+        for chunk in itertools.chain([first] if first is not None else [], stream):
+            scheduler.check_cancelled()
+            last = chunk
+            yield chunk
+    except BaseException as e:
+        _close_stream(stream)
+        recorder.finish(last, error=e if isinstance(e, Exception) else "cancelled")
+        raise
+    recorder.finish(last)
+    request_scheduler.settle(estimated, last.total_tokens if last else 0)
+
+def _context_stream(backend, prompt, model, max_tokens, temperature, label, context):
+    """_context_request()의 스트리밍 버전입니다. 첫 조각을 받기 전에 실패한 경우에만 전체 프롬프트로 다시 요청합니다."""
+    name = context.handle(backend, model) if context is not None else None
+    if name is None:
+        yield from _stream_request(backend, _full_prompt(prompt, context), model, max_tokens, temperature, label)
+        return
+    started = False
+    try:
+        for chunk in _stream_request(backend, prompt, model, max_tokens, temperature, label, cached_context=name,
+                                     prefix=context.prefix):
+            started = True
+            yield chunk
+        return
+    except Exception as e:
+        if started or not _fall_back(e, context, name):
+            raise
+    yield from _stream_request(backend, _full_prompt(prompt, context), model, max_tokens, temperature, label)
+
+def generate_text_stream(api_key, prompt, max_tokens, temperature=0.8, model=DEFAULT_MODEL, label="", budget_key=None,
+                         max_continuations=MAX_CONTINUATIONS, context=None):
+    """
+    응답을 스트리밍으로 받아 도착하는 텍스트 조각을 차례로 yield합니다.
+    캐시에 있으면 전체 텍스트를 한 번에 yield하고, 스트림을 끝까지 받은 경우에만 캐시에 저장합니다.
+    응답이 출력 길이 한도로 끊기면 이어쓰기 스트림을 열어 계속 yield합니다. 이어쓰기의 앞부분은
+    STITCH_MAX_OVERLAP 글자까지 모았다가 앞 내용과 겹친 부분을 빼고 내보냅니다.
+    현재 작업이 취소되면(scheduler.cancellation) 다음 조각을 기다리지 않고 스트림을 닫은 뒤 Cancelled를 발생시킵니다.
+    budget_key, context는 generate()와 같습니다.
+    같은 요청이 이미 실행 중이면 새 스트림을 열지 않고, 그 요청이 끝난 뒤 전체 텍스트를 한 번에 yield합니다.
+    """
+    backend = get_backend(api_key)
+    full_prompt, cache_model = _full_prompt(prompt, context), _cache_model(backend, model)
+    cache_key, cached = llm_cache.lookup(full_prompt, cache_model, temperature, max_tokens)
+    if cached is not None:
+        metrics.start_call(label).finish(LLMResponse(text=cached, finish_reason="STOP"), cache_hit=True)
+        yield cached
+        return
+    flight_key = _flight_key("text", full_prompt, cache_model, temperature, max_tokens)
+    while True:
+        flight = _inflight.join(flight_key)
+        if flight.leader:
+            break
+        try:
+            response = flight.wait()
+        except singleflight.LeaderGone:
+            continue
+        yield _shared_response(label, response).text
+        return
+    request_tokens = token_budget.request_tokens(budget_key, max_tokens)
+    text = ""
+    output_tokens = 0
+    part_prompt, part_label = prompt, label
+    try:
+        for continuation in range(max_continuations + 1):
+            last = None
+            # 이어쓰기는 앞부분을 모아 겹침을 확인한 뒤 내보냄 (첫 요청은 바로 내보냄)
+            pending = "" if continuation else None
+            for chunk in _context_stream(backend, part_prompt, model, request_tokens, temperature, part_label,
+                                         context):
+                last = chunk
+                if not chunk.text:
+                    continue
+                if pending is None:
+                    text += chunk.text
+                    yield chunk.text
+                    continue
+                pending += chunk.text
+                if len(pending) >= STITCH_MAX_OVERLAP:
+                    piece = stitch(text, pending)[len(text):]
+                    pending = None
+                    text += piece
+                    yield piece
+            if pending:
+                piece = stitch(text, pending)[len(text):]
+                text += piece
+                yield piece
+            output_tokens += last.output_tokens if last else 0
+            if last is None or last.finish_reason != "MAX_TOKENS":
+                break
+            part_prompt, part_label = build_continuation_prompt(prompt, text), _continuation_label(label)
+    except BaseException as e:
+        # 스트림을 끝까지 받지 않고 닫은 경우(GeneratorExit)도 취소로 보고, 기다리던 호출이 다시 요청함
+        flight.reject(e)
+        raise
+    token_budget.record(budget_key, output_tokens)
+    llm_cache.store(cache_key, text)
+    flight.resolve(LLMResponse(text=text, finish_reason=last.finish_reason if last else None))
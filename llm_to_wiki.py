@@ -1,42 +1,477 @@
 # llm_to_wiki.py
-from google import genai
-from google.genai import types
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import llm_client
+import scheduler
 
-def expand_category(text, category, keywords, api_key, max_tokens=8192):
+# 카테고리 서술 한 건의 기본 최대 출력 토큰 수 (실제 요청은 token_budget이 학습한 예산으로 나감)
+DEFAULT_MAX_TOKENS = 8192
+# 구조화 출력(JSON) 모드에서 카테고리 서술을 나누어 보내는 기본 요청 수
+DEFAULT_SECTION_BATCHES = 2
+
+class ExpansionError(Exception):
+    """
+    일부 카테고리의 위키 작성이 실패했을 때, 나머지 카테고리를 모두 생성한 뒤 발생합니다.
+    errors: {카테고리: 예외}
+    partial: 성공한 카테고리의 문서 ({카테고리: 문서}, 키워드 순서 유지)
+    keywords: 사용한 전체 키워드 ({카테고리: [키워드, ...]})
+    article_inputs: 성공한 카테고리의 입력 해시
+    partial과 article_inputs를 저장해 두면 다음 실행(expand_event_incremental)에서 실패한 카테고리만 다시 생성합니다.
+    """
+    def __init__(self, errors, partial, keywords, article_inputs):
+        details = ", ".join(f"{category}: {error}" for category, error in errors.items())
+        super().__init__(f"카테고리 {len(errors)}개 생성 실패 ({details})")
+        self.errors = errors
+        self.partial = partial
+        self.keywords = keywords
+        self.article_inputs = article_inputs
+
+def _partial_failure(text, keywords_dict, wiki_articles, errors, max_tokens):
+    partial = {category: wiki_articles[category] for category in keywords_dict if category in wiki_articles}
+    done = {category: keywords_dict[category] for category in partial}
+    return ExpansionError(errors, partial, dict(keywords_dict), article_input_hashes(text, done, max_tokens))
+
+def build_event_context(text):
+    """
+    카테고리 서술 요청들이 공유하는 앞부분(지시문 + 이벤트 설명)입니다. 카테고리마다 글자 하나까지 같으므로
+    제공자 측 컨텍스트 캐시(llm_client.SharedContext)나 암시적 앞부분 캐시로 한 번만 처리될 수 있습니다.
+    """
+    return (
+        "아래 이벤트 설명을 바탕으로, 맨 끝에 주어지는 카테고리에 대해 주어진 키워드를 사용하여 한국어로 위키피디아와 같이 "
+        "역사적 사건을 서술하는 문장을 생성해 주세요. 주요 키워드는 대괄호로 감싸고, 몇몇 주석은 소괄호로 표시하여 각주로 포함시켜 주세요. "
+        "카테고리 이름과 이벤트 설명은 출력에 포함되어선 안됩니다. 이 사건이 가상의 사건임을 언급해서는 안됩니다. "
+        "\\n을 통해 개행을 해주세요. 개행을 너무 자주해서는 안됩니다.\n\n"
+        f"이벤트 설명 : \"{text}\"\n\n"
+    )
+
+def build_category_request(category, keywords):
+    """build_event_context 뒤에 붙는 카테고리별 부분"""
+    return f"카테고리 : \"{category}\"\n키워드 : [{', '.join(keywords)}]"
+
+def build_category_prompt(text, category, keywords):
+    return build_event_context(text) + build_category_request(category, keywords)
+
+def _category_request(text, category, keywords, context):
+    # 공유 컨텍스트가 있으면 카테고리별 부분만, 없으면 전체 프롬프트 (응답 캐시 키는 어느 쪽이든 전체 프롬프트 기준)
+    if context is not None:
+        return build_category_request(category, keywords)
+    return build_category_prompt(text, category, keywords)
+
+def expand_category(text, category, keywords, api_key, max_tokens=8192, context=None):
     """
     주어진 원본 텍스트와 해당 카테고리의 12개 키워드를 토대로, Namuwiki 스타일의 상세 문서를 생성합니다.
     주요 키워드는 []로 감싸고, 일부 주석은 ()로 표기하며 (반드시 몇 개의 주석 포함),
     '전개' 카테고리의 경우 여러 부분으로 나눌 수 있도록 합니다.
     최종 출력은 한글로 작성되어야 합니다.
+    context: 같은 사건의 카테고리들이 공유하는 llm_client.SharedContext (build_event_context(text)를 앞부분으로 가짐)
+    """
+    prompt = _category_request(text, category, keywords, context)
+    # 카테고리별로 학습한 출력 예산으로 요청하고, 예산을 넘어 끊기면 나머지를 이어쓰기로 받아 붙임
+    result_text = llm_client.generate_text(api_key, prompt, max_tokens, temperature=0.8, label=category,
+                                           budget_key=category, context=context)
+    return result_text
+
+async def aexpand_category(text, category, keywords, api_key, max_tokens=8192, context=None):
+    """expand_category의 asyncio 버전입니다."""
+    prompt = _category_request(text, category, keywords, context)
+    return await llm_client.agenerate_text(api_key, prompt, max_tokens, temperature=0.8, label=category,
+                                           budget_key=category, context=context)
+
+def expand_category_stream(text, category, keywords, api_key, max_tokens=8192, on_delta=None, context=None):
+    """
+    expand_category의 스트리밍 버전입니다. 텍스트 조각이 도착할 때마다
+    on_delta(category, 지금까지의 텍스트)를 호출하고, 완성된 전체 텍스트를 반환합니다.
     """
-    prompt = f"이벤트 설명 : \"{text}\"를 바탕으로, 카테고리 \"{category}\"에 대해, 다음 키워드를 사용하여: [{', '.join(keywords)}], 한국어로 위키피디아와 같이 역사적 사건을 서술하는 문장을 생성해 주세요. 주요 키워드는 대괄호로 감싸고, 몇몇 주석은 소괄호로 표시하여 각주로 포함시켜 주세요. {category}와 {text}는 출력에 포함되어선 안됩니다. 이 사건이 가상의 사건임을 언급해서는 안됩니다. \\n을 통해 개행을 해주세요. 개행을 너무 자주해서는 안됩니다."
+    prompt = _category_request(text, category, keywords, context)
+    parts = []
+    for chunk in llm_client.generate_text_stream(api_key, prompt, max_tokens, temperature=0.8, label=category,
+                                                 budget_key=category, context=context):
+        parts.append(chunk)
+        if on_delta:
+            on_delta(category, "".join(parts))
+    return "".join(parts)
 
+def section_schema(categories):
+    """구조화 출력 모드의 섹션 응답 스키마: [{"category": 카테고리, "text": 본문}, ...]"""
+    return {
+        "type": "ARRAY",
+        "items": {
+            "type": "OBJECT",
+            "properties": {
+                "category": {"type": "STRING", "enum": list(categories)},
+                "text": {"type": "STRING"},
+            },
+            "required": ["category", "text"],
+        },
+    }
 
-    client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            max_output_tokens=max_tokens,
-            temperature=0.8
-        )
+def build_sections_prompt(text, keywords_dict):
+    listing = "\n".join(f"- {category}: [{', '.join(keywords)}]" for category, keywords in keywords_dict.items())
+    return (
+        f"이벤트 설명 : \"{text}\"를 바탕으로, 아래의 각 카테고리에 대해 주어진 키워드를 사용하여 "
+        f"한국어로 위키피디아와 같이 역사적 사건을 서술하는 문장을 생성해 주세요.\n{listing}\n"
+        "주요 키워드는 대괄호로 감싸고, 몇몇 주석은 소괄호로 표시하여 각주로 포함시켜 주세요. "
+        "카테고리 이름과 이벤트 설명은 본문에 포함되어선 안됩니다. 이 사건이 가상의 사건임을 언급해서는 안됩니다. "
+        "\\n을 통해 개행을 해주세요. 개행을 너무 자주해서는 안됩니다. "
+        '결과는 카테고리마다 {"category": 카테고리, "text": 본문} 형태의 항목을 담은 JSON 배열이어야 합니다.'
     )
-    result_text = response.text
-    return result_text
 
-def expand_event_to_wiki(text, keywords_dict, api_key, max_tokens=8192):
+def split_batches(categories, batches):
+    """categories를 순서를 유지한 채 최대 batches개의 비슷한 크기 묶음으로 나눕니다."""
+    batches = max(1, min(batches, len(categories)))
+    size, extra = divmod(len(categories), batches)
+    groups = []
+    start = 0
+    for index in range(batches):
+        end = start + size + (1 if index < extra else 0)
+        groups.append(categories[start:end])
+        start = end
+    return [group for group in groups if group]
+
+def expand_batch(text, keywords_dict, api_key, max_tokens=8192):
     """
-    각 카테고리별 키워드 리스트(keywords_dict)와 원본 텍스트를 바탕으로 상세 위키 문서를 생성합니다.
+    keywords_dict의 카테고리 여러 개를 JSON 응답 스키마로 한 번에 요청합니다.
     Returns:
-        dict: 각 카테고리별 상세 문서 (문자열)
+        {카테고리: 문서} - 응답에 없거나 비어 있는 카테고리, 해석할 수 없는 응답의 카테고리는 빠진 채로 반환
+    """
+    categories = list(keywords_dict)
+    try:
+        items = llm_client.generate_json(api_key, build_sections_prompt(text, keywords_dict), section_schema(categories),
+                                         max_tokens, temperature=0.8, label=" + ".join(categories))
+    except llm_client.StructuredOutputError as e:
+        print("섹션 JSON 응답 해석 실패, 카테고리별로 다시 생성:", e)
+        return {}
+    sections = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        category, body = item.get("category"), item.get("text")
+        if category in keywords_dict and isinstance(body, str) and body.strip() and category not in sections:
+            sections[category] = body
+    return sections
+
+def category_input_hash(text, category, keywords, max_tokens=8192):
+    """카테고리 서술 입력(원본 텍스트, 카테고리, 키워드, max_tokens)의 해시"""
+    return llm_client.input_hash(build_category_prompt(text, category, keywords), max_tokens)
+
+def article_input_hashes(text, keywords_dict, max_tokens=8192):
+    return {
+        category: category_input_hash(text, category, keywords, max_tokens)
+        for category, keywords in keywords_dict.items()
+    }
+
+def _expand_concurrently(category_items, expand, concurrency, progress_callback=None, total=None):
     """
+    category_items에서 (카테고리, 키워드)가 나오는 즉시 스레드 풀에 제출하고 모든 결과를 모읍니다.
+    category_items는 리스트뿐 아니라 스트리밍 제너레이터여도 되며, 완료된 카테고리는 다음 항목을 기다리는 동안에도 수집됩니다.
+    progress_callback은 호출한 스레드에서만 호출됩니다.
+    한 카테고리가 실패해도 나머지는 계속 생성하며, 취소(scheduler.Cancelled)되면 대기 중인 요청을 취소하고 예외를 전달합니다.
+    Returns:
+        (wiki_articles, errors): 성공한 카테고리의 문서 (제출 순서 유지), 실패한 카테고리의 예외
+    """
+    executor = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="expand_category")
+    futures = {}
+    pending = set()
     wiki_articles = {}
-    for category, keywords in keywords_dict.items():
-        detailed_article = expand_category(text, category, keywords, api_key, max_tokens)
-        wiki_articles[category] = detailed_article
+    errors = {}
+
+    def collect(future):
+        pending.discard(future)
+        category = futures[future]
+        try:
+            wiki_articles[category] = future.result()
+        except scheduler.Cancelled:
+            raise
+        except Exception as e:
+            errors[category] = e
+            return
+        if progress_callback:
+            progress_callback(category, len(wiki_articles), total or len(futures))
+
+    try:
+        for category, keywords in category_items:
+            # 호출 스레드의 컨텍스트(스케줄러 우선순위 등)를 작업 스레드로 전달
+            future = executor.submit(contextvars.copy_context().run, expand, category, keywords)
+            futures[future] = category
+            pending.add(future)
+            for done in [f for f in pending if f.done()]:
+                collect(done)
+        for future in as_completed(list(pending)):
+            collect(future)
+    except BaseException:
+        # 대기 중인 요청은 취소하고, 이미 전송된 요청의 결과는 기다리지 않고 버립니다.
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    ordered = {category: wiki_articles[category] for category in futures.values() if category in wiki_articles}
+    return ordered, errors
+
+def _expander(text, api_key, max_tokens, on_delta, context=None):
+    def expand(category, keywords):
+        if not keywords:
+            # 보완 요청 후에도 키워드가 없는 카테고리는 LLM을 호출하지 않고 빈 섹션으로 둠
+            return ""
+        if on_delta:
+            return expand_category_stream(text, category, keywords, api_key, max_tokens, on_delta=on_delta,
+                                          context=context)
+        return expand_category(text, category, keywords, api_key, max_tokens, context=context)
+    return expand
+
+def _event_context(text, keywords_dict=None):
+    """
+    카테고리 요청들이 이벤트 설명을 공유하는 llm_client.shared_context. 요청할 카테고리가 하나 이하이면
+    공유할 것이 없으므로 None을 내놓습니다 (keywords_dict가 None이면 스트리밍처럼 아직 모르는 경우).
+    """
+    if keywords_dict is not None and sum(1 for keywords in keywords_dict.values() if keywords) < 2:
+        return contextlib.nullcontext()
+    return llm_client.shared_context(build_event_context(text))
+
+def expand_event_to_wiki(text, keywords_dict, api_key, max_tokens=8192, concurrency=1, progress_callback=None,
+                         on_delta=None):
+    """
+    각 카테고리별 키워드 리스트(keywords_dict)와 원본 텍스트를 바탕으로 상세 위키 문서를 생성합니다.
+    concurrency가 2 이상이면 최대 concurrency개의 카테고리를 스레드 풀에서 동시에 생성합니다.
+    키워드가 없는 카테고리는 호출하지 않고 빈 문자열로 둡니다.
+    일부 카테고리가 실패하면 나머지를 모두 생성한 뒤 성공한 결과를 담은 ExpansionError를 발생시킵니다.
+    progress_callback이 주어지면 카테고리 하나가 끝날 때마다 (카테고리, 완료 수, 전체 수)로 호출됩니다.
+    on_delta가 주어지면 스트리밍 모드로 생성하며, 텍스트가 도착할 때마다 on_delta(카테고리, 지금까지의 텍스트)를 호출합니다.
+    Returns:
+        dict: 각 카테고리별 상세 문서 (문자열), keywords_dict의 카테고리 순서를 유지
+    """
+    total = len(keywords_dict)
+    with _event_context(text, keywords_dict) as context:
+        expand = _expander(text, api_key, max_tokens, on_delta, context)
+        if concurrency <= 1 or total <= 1:
+            wiki_articles = {}
+            errors = {}
+            for category, keywords in keywords_dict.items():
+                try:
+                    detailed_article = expand(category, keywords)
+                except scheduler.Cancelled:
+                    raise
+                except Exception as e:
+                    errors[category] = e
+                    continue
+                wiki_articles[category] = detailed_article
+                if progress_callback:
+                    progress_callback(category, len(wiki_articles), total)
+        else:
+            wiki_articles, errors = _expand_concurrently(keywords_dict.items(), expand, min(concurrency, total),
+                                                         progress_callback, total)
+    if errors:
+        raise _partial_failure(text, keywords_dict, wiki_articles, errors, max_tokens)
     return wiki_articles
 
+def expand_event_structured(text, keywords_dict, api_key, max_tokens=8192, section_batches=DEFAULT_SECTION_BATCHES,
+                            concurrency=1, progress_callback=None, on_delta=None):
+    """
+    expand_event_to_wiki의 구조화 출력 버전입니다. 카테고리마다 한 번씩(이벤트 설명을 매번 다시 보내며) 요청하는 대신
+    카테고리를 section_batches개의 묶음으로 나누어 묶음마다 JSON 응답 스키마로 한 번 요청하고,
+    묶음 요청은 최대 concurrency개까지 동시에 보냅니다. max_tokens는 묶음 요청 한 건의 최대 출력 토큰 수입니다.
+    응답에서 빠졌거나 잘린 카테고리는 expand_category로 하나씩 다시 생성하며, 키워드가 없는 카테고리는 건너뜁니다.
+    섹션은 묶음 응답이 끝나야 도착하므로 on_delta는 섹션마다 완성된 텍스트로 한 번 호출됩니다.
+    일부 카테고리가 끝내 실패하면 나머지를 모두 생성한 뒤 ExpansionError를 발생시킵니다.
+    Returns:
+        dict: 각 카테고리별 상세 문서 (문자열), keywords_dict의 카테고리 순서를 유지
+    """
+    total = len(keywords_dict)
+    wiki_articles = {}
+
+    def finish(category, article):
+        wiki_articles[category] = article
+        if on_delta and article:
+            on_delta(category, article)
+        if progress_callback:
+            progress_callback(category, len(wiki_articles), total)
+
+    active = {category: keywords for category, keywords in keywords_dict.items() if keywords}
+    for category in keywords_dict:
+        if category not in active:
+            finish(category, "")
+    groups = split_batches(list(active), section_batches)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(groups) or 1)),
+                                  thread_name_prefix="expand_batch")
+    try:
+        futures = {
+            executor.submit(contextvars.copy_context().run, expand_batch, text,
+                            {category: active[category] for category in group}, api_key, max_tokens): group
+            for group in groups
+        }
+        for future in as_completed(futures):
+            try:
+                sections = future.result()
+            except scheduler.Cancelled:
+                raise
+            except Exception as e:
+                # 묶음 요청 자체가 실패하면 그 묶음의 카테고리를 카테고리별 요청으로 다시 생성
+                print("묶음 요청 실패, 카테고리별로 다시 생성:", e)
+                sections = {}
+            for category in futures[future]:
+                if category in sections:
+                    finish(category, sections[category])
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+    missing = {category: keywords for category, keywords in active.items() if category not in wiki_articles}
+    if missing:
+        done_before = len(wiki_articles)
+        offset_progress = None
+        if progress_callback:
+            def offset_progress(category, done, _total):
+                progress_callback(category, done_before + done, total)
+        try:
+            wiki_articles.update(expand_event_to_wiki(text, missing, api_key, max_tokens=max_tokens,
+                                                      concurrency=concurrency, progress_callback=offset_progress))
+        except ExpansionError as e:
+            raise _partial_failure(text, keywords_dict, {**wiki_articles, **e.partial}, e.errors, max_tokens) from e
+        if on_delta:
+            for category in missing:
+                on_delta(category, wiki_articles[category])
+    return {category: wiki_articles[category] for category in keywords_dict}
+
+async def aexpand_event_to_wiki(text, keywords_dict, api_key, max_tokens=8192, concurrency=1, progress_callback=None,
+                               semaphore=None):
+    """
+    expand_event_to_wiki의 asyncio 버전입니다. 스레드 없이 하나의 이벤트 루프에서 카테고리를 동시에 생성합니다.
+    동시에 보내는 요청 수는 semaphore로 제한합니다 (기본: 이 호출 전용 asyncio.Semaphore(concurrency)).
+    여러 문서를 동시에 생성할 때 같은 semaphore를 넘기면 전체 동시 요청 수를 함께 제한할 수 있습니다.
+    일부 카테고리가 실패하면 나머지를 모두 생성한 뒤 ExpansionError를 발생시키고,
+    이 코루틴이 취소되면 나머지 카테고리 요청을 취소하고 예외를 전달합니다.
+    Returns:
+        dict: 각 카테고리별 상세 문서 (문자열), keywords_dict의 카테고리 순서를 유지
+    """
+    import asyncio
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+    total = len(keywords_dict)
+    wiki_articles = {}
+    errors = {}
+    context = None
+    if sum(1 for keywords in keywords_dict.values() if keywords) >= 2:
+        context = llm_client.SharedContext(build_event_context(text))
+
+    async def expand(category, keywords):
+        if not keywords:
+            wiki_articles[category] = ""
+        else:
+            try:
+                async with semaphore:
+                    wiki_articles[category] = await aexpand_category(text, category, keywords, api_key, max_tokens,
+                                                                     context=context)
+            except scheduler.Cancelled:
+                raise
+            except Exception as e:
+                errors[category] = e
+                return
+        if progress_callback:
+            progress_callback(category, len(wiki_articles), total)
+
+    tasks = [asyncio.ensure_future(expand(category, keywords)) for category, keywords in keywords_dict.items()]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        if context is not None:
+            # 제공자 측 캐시 삭제 (동기 API이므로 스레드에서)
+            await asyncio.to_thread(context.close)
+    if errors:
+        raise _partial_failure(text, keywords_dict, wiki_articles, errors, max_tokens)
+    return {category: wiki_articles[category] for category in keywords_dict}
+
+def expand_event_incremental(text, keywords_dict, api_key, previous=None, max_tokens=8192, concurrency=1,
+                             progress_callback=None, on_delta=None, section_batches=None):
+    """
+    이전 실행에서 저장한 결과를 재사용하여, 입력이 바뀐 카테고리만 다시 생성합니다.
+    section_batches가 주어지면 바뀐 카테고리를 구조화 출력 모드(expand_event_structured)로 생성합니다.
+    previous: {"articles": {카테고리: 문서}, "article_inputs": {카테고리: 입력 해시}} (예: wiki_site에 저장된 글)
+    입력 해시가 같은 카테고리는 LLM을 호출하지 않고 이전 문서를 그대로 쓰며,
+    progress_callback / on_delta도 재사용한 카테고리에 대해 바로 호출됩니다.
+    일부 카테고리가 실패하면 재사용한 문서까지 partial에 담은 ExpansionError를 발생시킵니다.
+    Returns:
+        (wiki_articles, article_inputs, regenerated): wiki_articles와 article_inputs는 keywords_dict의 카테고리 순서를 유지,
+        regenerated는 새로 생성한 카테고리 리스트
+    """
+    previous = previous or {}
+    old_articles = previous.get("articles", {})
+    old_inputs = previous.get("article_inputs", {})
+    article_inputs = article_input_hashes(text, keywords_dict, max_tokens)
+    reused = {
+        category: old_articles[category]
+        for category, digest in article_inputs.items()
+        if category in old_articles and old_inputs.get(category) == digest
+    }
+    changed = {category: keywords for category, keywords in keywords_dict.items() if category not in reused}
+
+    total = len(keywords_dict)
+    for done, (category, article) in enumerate(reused.items(), 1):
+        if on_delta:
+            on_delta(category, article)
+        if progress_callback:
+            progress_callback(category, done, total)
+
+    offset_progress = None
+    if progress_callback:
+        def offset_progress(category, done, _total):
+            progress_callback(category, len(reused) + done, total)
+    generated = {}
+    if changed:
+        try:
+            if section_batches:
+                generated = expand_event_structured(text, changed, api_key, max_tokens=max_tokens,
+                                                    section_batches=section_batches, concurrency=concurrency,
+                                                    progress_callback=offset_progress, on_delta=on_delta)
+            else:
+                generated = expand_event_to_wiki(text, changed, api_key, max_tokens=max_tokens,
+                                                 concurrency=concurrency, progress_callback=offset_progress,
+                                                 on_delta=on_delta)
+        except ExpansionError as e:
+            raise _partial_failure(text, keywords_dict, {**reused, **e.partial}, e.errors, max_tokens) from e
+    wiki_articles = {
+        category: reused[category] if category in reused else generated[category]
+        for category in keywords_dict
+    }
+    return wiki_articles, article_inputs, list(changed)
+
+def expand_event_pipelined(text, keyword_stream, api_key, max_tokens=8192, concurrency=1, progress_callback=None,
+                           on_delta=None, total=None):
+    """
+    키워드 추출과 위키 작성을 겹쳐서 실행합니다.
+    keyword_stream(예: llm.summarize_event_stream)에서 카테고리 한 줄이 나올 때마다 바로 해당 카테고리의
+    위키 작성을 스레드 풀에 제출하므로, 2단계가 1단계가 끝나기를 기다리지 않습니다.
+    concurrency=1이어도 키워드 스트림 수신과 위키 작성 1건은 동시에 진행됩니다.
+    total은 진행률 표시에 쓸 전체 카테고리 수입니다.
+    일부 카테고리가 실패하면 나머지를 모두 생성한 뒤 ExpansionError를 발생시킵니다 (키워드 추출 자체의 실패는 그대로 전달).
+    Returns:
+        (keywords_dict, wiki_articles): 둘 다 키워드 스트림에 카테고리가 나온 순서를 유지
+    """
+    keywords_dict = {}
+
+    def record(items):
+        for category, keywords in items:
+            keywords_dict[category] = keywords
+            yield category, keywords
+
+    with _event_context(text) as context:
+        expand = _expander(text, api_key, max_tokens, on_delta, context)
+        wiki_articles, errors = _expand_concurrently(record(keyword_stream), expand, concurrency, progress_callback,
+                                                     total)
+    if errors:
+        raise _partial_failure(text, keywords_dict, wiki_articles, errors, max_tokens)
+    return keywords_dict, wiki_articles
+
 if __name__ == "__main__":
+    import sys
+    if "--fake" in sys.argv:
+        # API 키 없이 로컬 가짜 백엔드로 실행
+        import fake_llm
+        llm_client.set_backend(fake_llm.FakeBackend())
     test_text = "이 사건은 19세기 말에 발생한 가상의 전쟁으로, 여러 국가가 참여하여 복잡한 전개를 보였다."
     keywords_dict = {
         "개요": ["전쟁", "가상", "참여", "국가", "복잡", "개요", "19세기", "말", "사건", "역사", "예시", "분석"],
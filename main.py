@@ -1,20 +1,32 @@
 # main.py
-import sys, os, json
+import sys, os, json, threading
 from datetime import datetime
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QDockWidget, QVBoxLayout,
     QHBoxLayout, QLineEdit, QPlainTextEdit, QPushButton, QLabel,
-    QSpinBox, QComboBox, QMessageBox
+    QSpinBox, QComboBox, QMessageBox, QCheckBox, QListWidget, QListWidgetItem, QListView
+)
+from PySide6.QtCore import (
+    Qt, QObject, Signal, Slot, QRunnable, QThreadPool, QTimer, QAbstractListModel, QModelIndex
 )
-from PySide6.QtCore import Qt, QObject, Signal, Slot, QThread
 from PySide6.QtGui import QIcon, QDesktopServices
 from PySide6.QtCore import QUrl
 
-import llm
-import llm_to_wiki
-import wiki
-
 SETTINGS_FILE = "settings.json"
+# 동시에 실행할 생성 작업 수 기본값 (LLM 호출은 모든 작업이 같은 스케줄러의 분당 한도를 나눠 씀)
+DEFAULT_MAX_JOBS = 2
+# 내장 위키 서버 포트 기본값 (wiki_server.DEFAULT_PORT와 같음, wiki_server는 서버를 켤 때만 불러옴)
+DEFAULT_SERVER_PORT = 8000
+# 생성 파이프라인 모듈은 쓰는 곳에서 import하고, 창을 띄운 뒤 warmup()이 백그라운드에서 미리 불러옴.
+# 시작할 때 설정 화면을 채우느라 그 모듈들을 불러오지 않도록 기본값은 여기에 같은 값을 둠
+PIPELINE_MODULES = ("scheduler", "metrics", "hedging", "llm_client", "llm_cache", "token_budget", "llm",
+                    "llm_to_wiki", "singleflight", "wiki", "search_index", "wiki_site")
+DEFAULT_SITE_DIR = "site"                    # wiki_site.DEFAULT_SITE_DIR
+DEFAULT_ARTICLE_MAX_TOKENS = 8192            # llm_to_wiki.DEFAULT_MAX_TOKENS
+DEFAULT_SECTION_BATCHES = 2                  # llm_to_wiki.DEFAULT_SECTION_BATCHES
+DEFAULT_REQUESTS_PER_MINUTE = 15             # scheduler.DEFAULT_REQUESTS_PER_MINUTE
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000        # scheduler.DEFAULT_TOKENS_PER_MINUTE
+CATEGORY_COUNT = 7                           # len(llm.CATEGORIES)
 
 def load_settings():
     if os.path.exists(SETTINGS_FILE):
@@ -23,7 +35,11 @@ def load_settings():
                 return json.load(f)
         except Exception as e:
             print("설정 불러오기 실패:", e)
-    return {"api_key": "", "max_tokens": 2048, "api_type": "Gemini"}
+    return {"api_key": "", "max_tokens": 2048, "api_type": "Gemini", "concurrency": 4,
+            "cache_enabled": True, "cache_refresh": False, "streaming": True, "max_jobs": DEFAULT_MAX_JOBS,
+            "article_max_tokens": DEFAULT_ARTICLE_MAX_TOKENS, "adaptive_tokens": True,
+            "requests_per_minute": DEFAULT_REQUESTS_PER_MINUTE,
+            "tokens_per_minute": DEFAULT_TOKENS_PER_MINUTE}
 
 def save_settings(settings):
     try:
@@ -32,41 +48,416 @@ def save_settings(settings):
     except Exception as e:
         print("설정 저장 실패:", e)
 
-# Worker 클래스: 긴 프로세스를 별도 스레드에서 실행하며 진행 상태를 알림
+def warmup(api_key):
+    """
+    생성 파이프라인 모듈과 google-genai SDK(api_key가 있으면 공유 클라이언트까지)를 백그라운드 스레드 하나에서 미리 불러와
+    첫 전송 때 기다리지 않게 합니다. 실패해도 작업을 시작할 때 다시 불러오므로 무시합니다.
+    """
+    def run():
+        try:
+            for name in PIPELINE_MODULES:
+                __import__(name)
+            import llm_client
+            llm_client.prepare(api_key)
+        except Exception:
+            pass
+    thread = threading.Thread(target=run, name="gui_warmup", daemon=True)
+    thread.start()
+    return thread
+
+# Worker 클래스: 긴 프로세스를 작업 스레드에서 실행하며 진행 상태를 알림
+# (객체는 GUI 스레드에 있고 run()만 스레드 풀에서 실행되므로 시그널은 GUI 스레드로 전달됨)
 class WikiWorker(QObject):
-    finished = Signal(str)  # event_title 전달
+    finished = Signal(str, str)  # event_title, 생성된 페이지 경로 전달
     error = Signal(str)
+    cancelled = Signal()
     progress = Signal(str)
+    section_text = Signal(str, str)  # 스트리밍 중 (카테고리, 지금까지의 텍스트)
+    keywords_ready = Signal(str, dict)  # event_title, 사용된 카테고리별 키워드
     
-    def __init__(self, event_title, event_text, parent=None):
+    def __init__(self, event_title, event_text, keyword_overrides=None, parent=None):
         super().__init__(parent)
         self.event_title = event_title
         self.event_text = event_text
+        # 사용자가 직접 수정한 카테고리별 키워드 ({카테고리: [키워드, ...]})
+        self.keyword_overrides = keyword_overrides or {}
+        # 취소하면 대기 중/재시도 대기 중인 LLM 호출과 스트리밍 수신이 바로 중단됨
+        import scheduler
+        self.cancel_token = scheduler.CancelToken()
+    
+    def cancel(self):
+        self.cancel_token.cancel()
     
     @Slot()
     def run(self):
+        import llm_to_wiki, metrics, scheduler
+        settings = load_settings()
+        self.status = ""
+        # 단계별/호출별 시간, 토큰 수, 캐시 적중, 재시도를 기록하고 호출이 끝날 때마다 진행 상태에 반영
+        self.run_metrics = metrics.RunMetrics(self.event_title, on_update=lambda run: self.emit_progress(self.status))
+        error = None
         try:
-            self.progress.emit("main.py = 요청 전송중 (0%)")
-            settings = load_settings()
-            api_key = settings.get("api_key", "")
-            max_tokens = settings.get("max_tokens", 2048)
-            api_type = settings.get("api_type", "Gemini")
-            
-            self.progress.emit("내용 생성중 (25%)")
-            keywords_dict = llm.summarize_event(self.event_text, api_type=api_type, api_key=api_key, max_tokens=max_tokens)
-            
-            self.progress.emit("위키 작성중 (50%)")
-            detailed_articles = llm_to_wiki.expand_event_to_wiki(self.event_text, keywords_dict, api_key, max_tokens=8192)
-            
-            self.progress.emit("위키 생성중 (75%)")
-            wiki.generate_wiki_html(self.event_title, self.event_text, detailed_articles, output_file="wiki.html")
-            
-            self.progress.emit("100% 완료")
-            self.finished.emit(self.event_title)
+            with metrics.activate(self.run_metrics), scheduler.cancellation(self.cancel_token):
+                self.generate(settings)
+        except scheduler.Cancelled:
+            error = "취소됨"
+        except llm_to_wiki.ExpansionError as e:
+            error = f"{e}\n완료된 카테고리는 저장되었습니다. 다시 생성하면 실패한 카테고리만 생성합니다."
         except Exception as e:
-            self.error.emit(str(e))
+            error = str(e)
+        self.run_metrics.finish(error=error)
+        self.save_metrics(settings)
+        if self.cancel_token.cancelled:
+            self.cancelled.emit()
+            return
+        if error:
+            self.error.emit(error)
+            return
+        self.progress.emit(f"100% 완료\n{self.run_metrics.summary_line()}")
+        self.keywords_ready.emit(self.event_title, self.keywords_dict)
+        self.finished.emit(self.event_title, self.page_file)
+    
+    def generate(self, settings):
+        import singleflight
+        self.emit_progress("main.py = 요청 전송중 (0%)")
+        self.configure_llm(settings)
+        # 같은 사건(사이트, 제목, 설명, 수정한 키워드, 생성 설정)을 다른 작업이 생성 중이면 새로 생성하지 않고
+        # 그 작업이 쓴 페이지를 함께 사용 (그 작업이 취소되면 이 작업이 이어서 생성)
+        options = {name: settings.get(name) for name in
+                   ("api_type", "max_tokens", "article_max_tokens", "structured_output", "section_batches")}
+        key = singleflight.make_key("gui", settings.get("site_dir", DEFAULT_SITE_DIR), self.event_title,
+                                    self.event_text, self.keyword_overrides, options)
+        articles = singleflight.group("article")
+        while True:
+            flight = articles.join(key)
+            if flight.leader:
+                break
+            self.emit_progress("같은 사건을 생성 중인 작업을 기다리는 중 (25%)")
+            try:
+                self.page_file, self.keywords_dict = flight.wait()
+                return
+            except singleflight.LeaderGone:
+                continue
+        flight.run(lambda: self.generate_page(settings))
+    
+    def configure_llm(self, settings):
+        import hedging, llm_cache, llm_client, scheduler, token_budget
+        # 모든 단계가 같은 공유 클라이언트(커넥션 풀)를 사용하도록 미리 생성
+        llm_client.get_client(settings.get("api_key", ""))
+        llm_cache.configure(
+            enabled=settings.get("cache_enabled", True),
+            refresh=settings.get("cache_refresh", False)
+        )
+        token_budget.configure(enabled=settings.get("adaptive_tokens", True))
+        # 긴 사건 설명은 카테고리 요청들이 공유하는 컨텍스트 캐시로 한 번만 올림 (만들 수 없으면 전체 프롬프트)
+        llm_client.configure_context_cache(enabled=settings.get("context_cache", True))
+        # 느린 요청은 최근 응답 시간 분위수를 넘으면 보조 모델(없으면 같은 모델)로 한 번 더 보내고, 오류가 계속되면 보조 모델로
+        hedging.configure(enabled=settings.get("hedging", True))
+        llm_client.configure_fallback(model=settings.get("fallback_model", ""))
+        # 모든 LLM 호출이 거치는 스케줄러의 분당 한도 (GUI 요청은 기본적으로 최우선)
+        scheduler.configure(
+            requests_per_minute=settings.get("requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE),
+            tokens_per_minute=settings.get("tokens_per_minute", DEFAULT_TOKENS_PER_MINUTE)
+        )
+    
+    def generate_page(self, settings):
+        """사건 페이지를 생성해 쓰고 (페이지 경로, 사용한 키워드)를 반환합니다."""
+        import llm, llm_to_wiki, scheduler, wiki, wiki_site
+        api_key = settings.get("api_key", "")
+        max_tokens = settings.get("max_tokens", 2048)
+        # 카테고리 서술의 최대 출력 토큰 수 (입력 해시와 캐시 키의 기준, 실제 요청은 학습한 예산으로)
+        article_max_tokens = settings.get("article_max_tokens", DEFAULT_ARTICLE_MAX_TOKENS)
+        api_type = settings.get("api_type", "Gemini")
+        concurrency = settings.get("concurrency", 4)
+        streaming = settings.get("streaming", True)
+        # 구조화 출력 모드: 키워드를 JSON으로 받고, 카테고리 서술을 section_batches번의 묶음 요청으로 생성
+        section_batches = None
+        if settings.get("structured_output", False):
+            section_batches = settings.get("section_batches", DEFAULT_SECTION_BATCHES)
+        
+        # 사건마다 제목으로 만든 고정 slug의 페이지를 사이트 폴더에 씀 (공유 스타일시트, 문서 목록)
+        site_dir = settings.get("site_dir", DEFAULT_SITE_DIR)
+        slug = wiki_site.slugify(self.event_title)
+        wiki_site.ensure_site(site_dir)
+        self.page_file = wiki_site.page_path(site_dir, slug)
+        # 같은 사건을 이전에 생성했다면 저장된 중간 결과(키워드, 섹션, 입력 해시, 렌더링 조각)를 재사용
+        previous = wiki_site.find_article(site_dir, slug)
+        keywords_input = llm.keywords_input_hash(self.event_text, max_tokens)
+        sections = dict((previous or {}).get("sections", {}))
+        
+        self.emit_progress("내용 생성 및 위키 작성중 (25%)")
+        writer = None
+        on_delta = None
+        if streaming:
+            # 섹션 텍스트가 도착하는 즉시 GUI와 사건 페이지에 반영 (바뀐 섹션만 다시 렌더링)
+            writer = wiki.IncrementalWikiWriter(self.event_title, self.event_text, output_file=self.page_file,
+                                                section_cache=sections, **wiki_site.PAGE_OPTIONS)
+            def on_delta(category, text):
+                writer.update(category, text)
+                self.section_text.emit(category, text)
+        with self.run_metrics.stage("generate"):
+            try:
+                if previous and previous.get("keywords_input") == keywords_input:
+                    # 입력 텍스트가 그대로이면 키워드 추출을 건너뛰고, 키워드가 바뀐 카테고리만 다시 생성
+                    keywords_dict = {cat: self.keyword_overrides.get(cat, keywords)
+                                     for cat, keywords in previous.get("keywords", {}).items()}
+                    detailed_articles, article_inputs, regenerated = llm_to_wiki.expand_event_incremental(
+                        self.event_text, keywords_dict, api_key, previous=previous, max_tokens=article_max_tokens,
+                        concurrency=concurrency, progress_callback=self.report_category_done, on_delta=on_delta,
+                        section_batches=section_batches
+                    )
+                elif section_batches:
+                    keywords_dict = llm.summarize_event_structured(self.event_text, api_type=api_type, api_key=api_key,
+                                                                   max_tokens=max_tokens)
+                    keywords_dict = {cat: self.keyword_overrides.get(cat, keywords) for cat, keywords in keywords_dict.items()}
+                    detailed_articles, article_inputs, regenerated = llm_to_wiki.expand_event_incremental(
+                        self.event_text, keywords_dict, api_key, max_tokens=article_max_tokens, concurrency=concurrency,
+                        progress_callback=self.report_category_done, on_delta=on_delta, section_batches=section_batches
+                    )
+                else:
+                    # 키워드 응답을 스트리밍으로 받으며, 카테고리 한 줄이 완성될 때마다 해당 위키 작성을 바로 시작
+                    keyword_stream = llm.summarize_event_stream(self.event_text, api_type=api_type, api_key=api_key, max_tokens=max_tokens)
+                    keyword_stream = ((cat, self.keyword_overrides.get(cat, keywords)) for cat, keywords in keyword_stream)
+                    keywords_dict, detailed_articles = llm_to_wiki.expand_event_pipelined(
+                        self.event_text, keyword_stream, api_key, max_tokens=article_max_tokens,
+                        concurrency=concurrency, progress_callback=self.report_category_done,
+                        on_delta=on_delta, total=len(llm.CATEGORIES)
+                    )
+                    article_inputs = llm_to_wiki.article_input_hashes(self.event_text, keywords_dict, max_tokens=article_max_tokens)
+            except llm_to_wiki.ExpansionError as e:
+                # 성공한 카테고리는 입력 해시와 함께 저장해 두어, 다시 생성하면 실패한 카테고리만 LLM으로 생성
+                self.keywords_dict = e.keywords
+                wiki_site.publish(site_dir, slug, self.event_title, self.event_text, e.keywords, e.partial,
+                                  previous=previous, keywords_input=keywords_input, article_inputs=e.article_inputs)
+                wiki_site.update_index(site_dir, {slug: self.event_title})
+                raise
+        self.keywords_dict = keywords_dict
+        # 캐시 적중만으로 끝난 경우에도 취소한 작업은 페이지를 쓰지 않음
+        scheduler.check_cancelled()
+        
+        self.emit_progress("위키 생성중 (75%)")
+        with self.run_metrics.stage("render"):
+            artifacts = {"keywords_input": keywords_input, "article_inputs": article_inputs}
+            if writer:
+                writer.finish(detailed_articles)
+                wiki_site.save_article(site_dir, slug, self.event_title, self.event_text, keywords_dict,
+                                       detailed_articles, sections=sections, **artifacts)
+            else:
+                wiki_site.publish(site_dir, slug, self.event_title, self.event_text, keywords_dict, detailed_articles,
+                                  previous=previous, **artifacts)
+            wiki_site.update_index(site_dir, {slug: self.event_title})
+        return self.page_file, self.keywords_dict
+    
+    def emit_progress(self, status):
+        # 진행 단계 문구와 현재 실행의 계측 요약(호출 수, 토큰, 캐시, 재시도, 경과 시간)을 함께 표시
+        self.status = status
+        self.progress.emit(f"{status}\n{self.run_metrics.summary_line()}")
+    
+    def save_metrics(self, settings):
+        import metrics
+        try:
+            metrics.write_run_log(self.run_metrics, settings.get("log_dir", metrics.DEFAULT_LOG_DIR))
+            if settings.get("prometheus_file"):
+                metrics.write_prometheus(settings["prometheus_file"])
+        except OSError as e:
+            print("실행 기록 저장 실패:", e)
+    
+    def report_category_done(self, category, done, total):
+        # 25% ~ 75% 구간을 카테고리 완료 수에 비례하여 표시 (작업 스레드에서 호출됨)
+        percent = 25 + 50 * done // total
+        self.emit_progress(f"위키 작성중 ({percent}%) - {category} 완료 ({done}/{total})")
+
+class WikiJob(QRunnable):
+    """WikiWorker.run()을 QThreadPool에서 실행합니다."""
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+        self.setAutoDelete(False)
+    
+    def run(self):
+        self.worker.run()
+
+# 저장소(job_store)의 행을 페이지 단위로 필요할 때만 불러오는 목록 모델 (최신 항목이 맨 위)
+# 뷰가 끝까지 스크롤하면 fetchMore()로 다음 페이지를 읽으므로, 기록이 많아도 시작할 때는 첫 페이지만 읽음
+class PagedListModel(QAbstractListModel):
+    PAGE_SIZE = 100
+    KEY = "job_id"  # 행을 정렬하고 다음 페이지의 기준으로 쓰는 키 (내림차순)
+    
+    def __init__(self, fetch_page, parent=None):
+        super().__init__(parent)
+        self.fetch_page = fetch_page  # fetch_page(before, limit) → 행(dict) 리스트
+        self.rows = []
+        self.has_more = True
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.has_more
+    
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        page = self.fetch_page(self.rows[-1][self.KEY] if self.rows else None, self.PAGE_SIZE)
+        self.has_more = len(page) == self.PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+    
+    def row_data(self, row):
+        return self.rows[row] if 0 <= row < len(self.rows) else None
+    
+    def row_of(self, key):
+        """key인 행의 번호. 아직 불러오지 않은 행이면 -1"""
+        lo, hi = 0, len(self.rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.rows[mid][self.KEY] > key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.rows) and self.rows[lo][self.KEY] == key else -1
+    
+    def prepend(self, row):
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.rows.insert(0, row)
+        self.endInsertRows()
+    
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self.endRemoveRows()
+
+# 작업 목록 모델: 저장된 작업 기록에, 실행 중인 작업(entries)은 메모리의 상태와 진행 문구를 덮어 표시
+class JobListModel(PagedListModel):
+    def __init__(self, store, entries, parent=None):
+        super().__init__(store.jobs, parent)
+        self.entries = entries  # job_id → 끝나지 않은 JobEntry
+    
+    def data(self, index, role=Qt.DisplayRole):
+        row = self.row_data(index.row())
+        if row is None or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        entry = self.entries.get(row["job_id"])
+        state, progress_text = (entry.state, entry.progress_text) if entry else (row["state"], row["progress"])
+        created = datetime.fromtimestamp(row["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        if role == Qt.ToolTipRole:
+            # 진행 문구 전체(계측 요약 포함)와 입력 텍스트 앞부분
+            return f"{progress_text}\n\n[{created}] 입력: {row['text']}".strip()
+        # 진행 문구의 첫 줄(단계, %)만 목록에 표시
+        status = progress_text.splitlines()[0] if progress_text else ""
+        return f"{created[5:16]} [{state}] {row['title']}" + (f" — {status}" if status else "")
+    
+    def job_changed(self, job_id, **fields):
+        """작업의 표시를 갱신합니다. fields는 불러온 행에 반영할 저장된 값 (끝난 작업의 상태 등)"""
+        row = self.row_of(job_id)
+        if row < 0:
+            return
+        self.rows[row].update(fields)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+# 생성된 문서 목록 모델: 최근에 생성한 페이지가 맨 위
+class ResultListModel(PagedListModel):
+    KEY = "result_id"
+    
+    def __init__(self, store, parent=None):
+        super().__init__(store.results, parent)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        row = self.row_data(index.row())
+        if row is None:
+            return None
+        if role == Qt.DisplayRole:
+            return row["title"]
+        if role == Qt.ToolTipRole:
+            return row["path"]
+        return None
+    
+    def add_result(self, result):
+        # 같은 페이지를 다시 생성하면 저장소처럼 이전 행을 지우고 맨 위에 넣음
+        for row, existing in enumerate(self.rows):
+            if existing["path"] == result["path"]:
+                self.remove_row(row)
+                break
+        self.prepend(result)
+
+# 작업 목록의 한 항목: 실행 중인 작업의 상태/진행/미리보기를 보관하고, 상태가 바뀌면 저장소와 목록에 반영 (GUI 스레드)
+class JobEntry(QObject):
+    def __init__(self, worker, job_id, view):
+        super().__init__(view)
+        self.worker = worker
+        self.job = WikiJob(worker)
+        self.job_id = job_id
+        self.view = view
+        self.state = "대기"
+        self.progress_text = "대기 중..."
+        self.preview_sections = {}
+        self.done = False
+        worker.progress.connect(self.on_progress)
+        worker.section_text.connect(self.on_section_text)
+        worker.keywords_ready.connect(view.show_keywords)
+        worker.finished.connect(self.on_finished)
+        worker.error.connect(self.on_error)
+        worker.cancelled.connect(self.on_cancelled)
+        self.refresh()
+    
+    def refresh(self, **fields):
+        self.view.job_model.job_changed(self.job_id, **fields)
+        self.view.job_updated(self)
+    
+    @Slot(str)
+    def on_progress(self, progress_text):
+        if self.done:
+            return
+        if not self.worker.cancel_token.cancelled and self.state != "진행":
+            self.state = "진행"
+            self.view.store.set_state(self.job_id, self.state)
+        self.progress_text = progress_text
+        self.refresh()
+    
+    @Slot(str, str)
+    def on_section_text(self, category, text):
+        self.preview_sections[category] = text
+        self.view.job_updated(self)
+    
+    @Slot(str, str)
+    def on_finished(self, event_title, page_file):
+        result = self.finish("완료", "[출력이 완료되었습니다.]\n" + self.progress_text.split("\n", 1)[-1],
+                             page_path=os.path.abspath(page_file))
+        self.view.process_finished(result)
+    
+    @Slot(str)
+    def on_error(self, error_msg):
+        self.finish("오류", f"오류 발생: {error_msg}", error=error_msg)
+    
+    @Slot()
+    def on_cancelled(self):
+        self.finish("취소됨", "취소되었습니다.")
+    
+    def cancel(self):
+        if self.done:
+            return
+        self.worker.cancel()
+        if self.view.pool.tryTake(self.job):
+            # 아직 시작하지 않은 작업은 대기열에서 바로 제거
+            self.on_cancelled()
+        else:
+            self.state = "취소 중"
+            self.refresh()
+    
+    def finish(self, state, progress_text, page_path=None, error=None):
+        """끝난 상태를 저장소와 목록에 반영합니다. 결과 페이지가 있으면 결과 목록의 행을 반환합니다."""
+        self.done = True
+        self.state = state
+        self.progress_text = progress_text
+        result = self.view.store.finish(self.job_id, state, progress_text, page_path=page_path, error=error)
+        self.refresh(state=state, progress=progress_text, page_path=page_path, error=error)
+        self.view.job_done(self)
+        return result
 
-# 중앙 영역 위젯: 이벤트 제목, 입력 이력, 텍스트 입력창, 진행 상태 표시
+# 중앙 영역 위젯: 이벤트 제목, 작업 목록(입력 이력), 텍스트 입력창, 진행 상태 표시
 class MainCentralWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -78,12 +469,47 @@ class MainCentralWidget(QWidget):
         layout.addWidget(QLabel("Event Title"))
         layout.addWidget(self.title_edit)
         
-        # 상단: 입력 이력 (read-only)
-        self.history_view = QPlainTextEdit()
-        self.history_view.setReadOnly(True)
-        self.history_view.setStyleSheet("background-color: #ffffff;")
-        layout.addWidget(QLabel("입력 이력"))
-        layout.addWidget(self.history_view, stretch=1)
+        # 작업 목록: 전송할 때마다 작업이 추가되어 최대 max_jobs개까지 동시에 실행되고 나머지는 대기
+        # 모든 작업은 job_store에 기록되어 다시 시작해도 남으며, 목록은 보이는 만큼만 페이지 단위로 불러옴
+        # 선택한 작업의 진행 상태와 미리보기(끝난 작업은 입력 텍스트)가 아래에 표시됨
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(load_settings().get("max_jobs", DEFAULT_MAX_JOBS))
+        # 작업 기록 저장소는 SQLite만 쓰는 가벼운 모듈이라 목록을 채우려고 창을 만들 때 불러옴
+        import job_store
+        self.store = job_store.get_store()
+        # 이전 실행이 도중에 종료되어 끝나지 않은 채 남은 작업
+        self.store.mark_interrupted()
+        self.jobs = {}  # job_id → 끝나지 않은 JobEntry
+        self.job_model = JobListModel(self.store, self.jobs, self)
+        self.job_list = QListView()
+        self.job_list.setUniformItemSizes(True)
+        self.job_list.setModel(self.job_model)
+        self.job_list.setStyleSheet("background-color: #ffffff;")
+        self.cancel_btn = QPushButton("선택 작업 취소")
+        self.cancel_btn.setEnabled(False)
+        layout.addWidget(QLabel("작업 목록 (두 번 누르면 생성된 페이지를 엶)"))
+        layout.addWidget(self.job_list, stretch=1)
+        layout.addWidget(self.cancel_btn)
+        self.job_list.selectionModel().currentRowChanged.connect(self.show_selected_job)
+        self.job_list.doubleClicked.connect(self.open_job_page)
+        self.cancel_btn.clicked.connect(self.cancel_selected_job)
+        
+        # 스트리밍 모드에서 도착 중인 섹션 텍스트 미리보기 (read-only)
+        self.preview_view = QPlainTextEdit()
+        self.preview_view.setReadOnly(True)
+        self.preview_view.setStyleSheet("background-color: #ffffff;")
+        layout.addWidget(QLabel("생성 미리보기"))
+        layout.addWidget(self.preview_view, stretch=1)
+        
+        # 키워드 편집: 생성이 끝나면 사용된 키워드가 표시되며,
+        # 같은 제목으로 다시 전송하면 키워드를 수정한 카테고리만 다시 생성됨
+        self.keywords_edit = QPlainTextEdit()
+        self.keywords_edit.setPlaceholderText("카테고리: 키워드1, 키워드2, ...")
+        self.keywords_edit.setFixedHeight(100)
+        self.keywords_title = ""
+        self.generated_keywords = {}
+        layout.addWidget(QLabel("키워드 (수정 후 다시 전송하면 바뀐 섹션만 다시 생성)"))
+        layout.addWidget(self.keywords_edit)
         
         # 하단: 텍스트 입력창과 전송 버튼
         bottom_layout = QHBoxLayout()
@@ -109,39 +535,105 @@ class MainCentralWidget(QWidget):
         if not event_title or not event_text:
             QMessageBox.warning(self, "입력 오류", "이벤트 제목과 텍스트를 모두 입력하세요.")
             return
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.history_view.appendPlainText(f"[{now}] 입력: {event_text}")
-        self.progress_label.setText("진행 중...")
-        self.submit_btn.setEnabled(False)
         
-        # 워커 스레드 생성 및 실행
-        self.thread = QThread()
-        self.worker = WikiWorker(event_title, event_text)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress.connect(self.update_progress)
-        self.worker.finished.connect(self.process_finished)
-        self.worker.error.connect(self.process_error)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.start()
+        import job_store
+        # 작업을 기록하고 목록 맨 위에 추가한 뒤 스레드 풀에 제출 (실행 중인 작업이 있어도 바로 다음 입력을 받을 수 있음)
+        self.pool.setMaxThreadCount(load_settings().get("max_jobs", DEFAULT_MAX_JOBS))
+        worker = WikiWorker(event_title, event_text, keyword_overrides=self.keyword_overrides(event_title))
+        job_id = self.store.add(event_title, event_text)
+        row = self.store.get(job_id)
+        row["text"] = row["text"][:job_store.SNIPPET_CHARS]
+        entry = JobEntry(worker, job_id, self)
+        self.jobs[job_id] = entry
+        self.job_model.prepend(row)
+        self.job_list.setCurrentIndex(self.job_model.index(0))
+        self.job_list.scrollToTop()
+        self.pool.start(entry.job)
     
-    @Slot(str)
-    def update_progress(self, progress_text):
-        self.progress_label.setText(progress_text)
+    def selected_row(self):
+        return self.job_model.row_data(self.job_list.currentIndex().row())
     
-    @Slot(str)
-    def process_finished(self, event_title):
-        self.progress_label.setText("[출력이 완료되었습니다.]")
-        self.submit_btn.setEnabled(True)
-        self.parent().add_wiki_button(event_title)
+    def selected_job(self):
+        row = self.selected_row()
+        return self.jobs.get(row["job_id"]) if row else None
     
-    @Slot(str)
-    def process_error(self, error_msg):
-        self.progress_label.setText("")
-        self.history_view.appendPlainText(f"오류 발생: {error_msg}")
-        self.submit_btn.setEnabled(True)
+    @Slot(QModelIndex, QModelIndex)
+    def show_selected_job(self, current, previous):
+        row = self.selected_row()
+        if row is None:
+            return
+        entry = self.jobs.get(row["job_id"])
+        if entry:
+            self.job_updated(entry)
+            return
+        # 끝난 작업: 저장된 진행 문구와 입력 텍스트 전체 (미리보기는 실행 중에만 메모리에 있음)
+        job = self.store.get(row["job_id"])
+        if job is None:
+            return
+        created = datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        self.progress_label.setText(job["progress"] or f"[{job['state']}]")
+        self.preview_view.setPlainText(f"[{created}] 입력: {job['text']}")
+        self.cancel_btn.setEnabled(False)
+    
+    @Slot(QModelIndex)
+    def open_job_page(self, index):
+        row = self.job_model.row_data(index.row())
+        if row and row["page_path"]:
+            QDesktopServices.openUrl(self.window().page_url(row["page_path"]))
+    
+    @Slot()
+    def cancel_selected_job(self):
+        entry = self.selected_job()
+        if entry:
+            entry.cancel()
+    
+    def job_updated(self, entry):
+        # 선택한 작업의 진행 상태와 미리보기만 표시
+        if entry is not self.selected_job():
+            return
+        self.progress_label.setText(entry.progress_text)
+        self.preview_view.setPlainText("\n\n".join(
+            f"[{cat}]\n{content}" for cat, content in entry.preview_sections.items()
+        ))
+        self.cancel_btn.setEnabled(not entry.done)
+    
+    def job_done(self, entry):
+        # 끝난 작업은 저장소에 기록되었으므로 워커와 항목을 정리 (목록은 저장된 행으로 표시)
+        del self.jobs[entry.job_id]
+        entry.worker.deleteLater()
+        entry.deleteLater()
+    
+    def keyword_overrides(self, event_title):
+        """키워드 편집란에서 지난번 생성 결과와 달라진 카테고리의 키워드만 골라냅니다 (같은 제목일 때만)."""
+        if event_title != self.keywords_title:
+            return {}
+        import llm
+        overrides = {}
+        for line in self.keywords_edit.toPlainText().splitlines():
+            parsed = llm.parse_keyword_line(line)
+            if parsed and parsed[1] != self.generated_keywords.get(parsed[0]):
+                overrides[parsed[0]] = parsed[1]
+        return overrides
+    
+    @Slot(str, dict)
+    def show_keywords(self, event_title, keywords_dict):
+        self.keywords_title = event_title
+        self.generated_keywords = dict(keywords_dict)
+        self.keywords_edit.setPlainText("\n".join(
+            f"{cat}: {', '.join(keywords)}" for cat, keywords in keywords_dict.items()
+        ))
+    
+    def process_finished(self, result):
+        self.parent().add_result(result)
+    
+    def shutdown(self):
+        # 창을 닫으면 대기 중인 작업은 버리고 실행 중인 작업은 취소한 뒤 끝날 때까지 기다림
+        # (끝나지 않은 작업은 "중단됨"으로 기록)
+        self.pool.clear()
+        for entry in self.jobs.values():
+            entry.worker.cancel()
+        self.pool.waitForDone()
+        self.store.mark_interrupted()
 
 # 설정 패널 위젯 (좌측 DockWidget 내)
 class SettingsWidget(QWidget):
@@ -168,21 +660,167 @@ class SettingsWidget(QWidget):
         self.max_token_spin.setValue(2048)
         self.layout.addWidget(self.max_token_spin)
         
+        # 카테고리 서술의 최대 출력 토큰 수와 예산 자동 조절 (지난 응답 길이로 요청 크기를 줄이고, 끊기면 이어쓰기)
+        self.layout.addWidget(QLabel("문서 Max Tokens (카테고리당)"))
+        self.article_token_spin = QSpinBox()
+        self.article_token_spin.setRange(256, 65536)
+        self.article_token_spin.setSingleStep(1024)
+        self.article_token_spin.setValue(DEFAULT_ARTICLE_MAX_TOKENS)
+        self.layout.addWidget(self.article_token_spin)
+        self.adaptive_tokens_check = QCheckBox("토큰 예산 자동 조절")
+        self.adaptive_tokens_check.setChecked(True)
+        self.layout.addWidget(self.adaptive_tokens_check)
+        
+        # 동시 요청 수 설정 (카테고리 확장 병렬도)
+        self.layout.addWidget(QLabel("동시 요청 수"))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 7)
+        self.concurrency_spin.setValue(4)
+        self.layout.addWidget(self.concurrency_spin)
+        
+        # 동시 작업 수 (여러 사건을 동시에 생성, 초과분은 작업 목록에서 대기)
+        self.layout.addWidget(QLabel("동시 작업 수"))
+        self.max_jobs_spin = QSpinBox()
+        self.max_jobs_spin.setRange(1, 8)
+        self.max_jobs_spin.setValue(DEFAULT_MAX_JOBS)
+        self.layout.addWidget(self.max_jobs_spin)
+        
+        # 분당 요청/토큰 한도 (스케줄러가 이 한도 바로 아래로 호출을 조절)
+        self.layout.addWidget(QLabel("분당 요청 수 (RPM)"))
+        self.rpm_spin = QSpinBox()
+        self.rpm_spin.setRange(1, 100000)
+        self.rpm_spin.setValue(DEFAULT_REQUESTS_PER_MINUTE)
+        self.layout.addWidget(self.rpm_spin)
+        self.layout.addWidget(QLabel("분당 토큰 수 (TPM)"))
+        self.tpm_spin = QSpinBox()
+        self.tpm_spin.setRange(1000, 100000000)
+        self.tpm_spin.setSingleStep(10000)
+        self.tpm_spin.setValue(DEFAULT_TOKENS_PER_MINUTE)
+        self.layout.addWidget(self.tpm_spin)
+        
+        # 응답 캐시 설정: 끄면 캐시 우회, 새로고침은 캐시를 읽지 않고 덮어씀
+        self.cache_check = QCheckBox("응답 캐시 사용")
+        self.cache_check.setChecked(True)
+        self.layout.addWidget(self.cache_check)
+        self.cache_refresh_check = QCheckBox("캐시 새로고침")
+        self.layout.addWidget(self.cache_refresh_check)
+        # 제공자 측 컨텍스트 캐시: 긴 사건 설명을 카테고리 요청마다 다시 보내지 않고 한 번 올려 두고 참조
+        self.context_cache_check = QCheckBox("컨텍스트 캐시 사용")
+        self.context_cache_check.setChecked(True)
+        self.layout.addWidget(self.context_cache_check)
+        
+        # 느린 요청 헤징과 장애 조치: 보조 모델이 비어 있으면 같은 모델로 헤징하고 장애 조치는 하지 않음
+        self.hedging_check = QCheckBox("느린 요청 헤징")
+        self.hedging_check.setChecked(True)
+        self.layout.addWidget(self.hedging_check)
+        self.layout.addWidget(QLabel("보조 모델 (헤징/장애 조치)"))
+        self.fallback_model_edit = QLineEdit()
+        self.fallback_model_edit.setPlaceholderText("예: gemini-2.0-flash-lite")
+        self.layout.addWidget(self.fallback_model_edit)
+        
+        # 스트리밍 모드: 섹션을 받는 즉시 미리보기와 사건 페이지에 반영
+        self.streaming_check = QCheckBox("스트리밍 모드")
+        self.streaming_check.setChecked(True)
+        self.layout.addWidget(self.streaming_check)
+        
+        # 구조화 출력 모드: 키워드를 JSON으로 받고, 카테고리 서술을 몇 번의 묶음 요청으로 생성 (호출 수와 입력 토큰 절감)
+        self.structured_check = QCheckBox("구조화 출력 (JSON 묶음 요청)")
+        self.layout.addWidget(self.structured_check)
+        self.layout.addWidget(QLabel("묶음 요청 수"))
+        self.section_batches_spin = QSpinBox()
+        self.section_batches_spin.setRange(1, CATEGORY_COUNT)
+        self.section_batches_spin.setValue(DEFAULT_SECTION_BATCHES)
+        self.layout.addWidget(self.section_batches_spin)
+        
+        # 내장 위키 서버: 생성된 사이트를 HTTP로 제공하고 문서 버튼/검색 결과를 서버 주소로 엶
+        self.server_check = QCheckBox("위키 서버 실행")
+        self.layout.addWidget(self.server_check)
+        self.server_public_check = QCheckBox("다른 컴퓨터에서 접속 허용")
+        self.layout.addWidget(self.server_public_check)
+        self.layout.addWidget(QLabel("서버 포트"))
+        self.server_port_spin = QSpinBox()
+        self.server_port_spin.setRange(1024, 65535)
+        self.server_port_spin.setValue(DEFAULT_SERVER_PORT)
+        self.layout.addWidget(self.server_port_spin)
+        self.server_url_label = QLabel("")
+        self.server_url_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.layout.addWidget(self.server_url_label)
+        
         # 저장 버튼
         self.save_btn = QPushButton("설정 저장")
         self.layout.addWidget(self.save_btn)
         
-        # 버튼 추가 영역 (Wiki 버튼들이 추가될 영역)
-        self.button_area = QVBoxLayout()
-        self.layout.addLayout(self.button_area)
+        # 문서 검색: 생성된 모든 문서의 제목/키워드/본문에서 검색, 결과를 누르면 해당 페이지를 엶
+        self.layout.addWidget(QLabel("문서 검색"))
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("검색어 입력 후 Enter")
+        self.layout.addWidget(self.search_edit)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(150)
+        self.layout.addWidget(self.search_results)
+        self.search_edit.returnPressed.connect(self.run_search)
+        self.search_results.itemClicked.connect(self.open_search_result)
+        
+        # 생성된 문서 목록: 최근에 생성한 페이지부터 보이는 만큼만 불러오며, 누르면 해당 페이지를 엶
+        self.layout.addWidget(QLabel("생성된 문서"))
+        import job_store
+        self.result_model = ResultListModel(job_store.get_store(), self)
+        self.result_list = QListView()
+        self.result_list.setUniformItemSizes(True)
+        self.result_list.setModel(self.result_model)
+        self.result_list.setMinimumHeight(120)
+        self.layout.addWidget(self.result_list, stretch=1)
+        self.result_list.clicked.connect(self.open_result)
         
-        self.layout.addStretch()
         self.save_btn.clicked.connect(self.save_settings)
     
+    def run_search(self):
+        query = self.search_edit.text().strip()
+        self.search_results.clear()
+        if not query:
+            return
+        import search_index
+        site_dir = load_settings().get("site_dir", DEFAULT_SITE_DIR)
+        results = search_index.search(site_dir, query, limit=20)
+        if not results:
+            self.search_results.addItem("검색 결과가 없습니다.")
+        for result in results:
+            item = QListWidgetItem(result["title"])
+            item.setData(Qt.UserRole, result["path"])
+            item.setToolTip(result["path"])
+            self.search_results.addItem(item)
+    
+    def open_search_result(self, item):
+        path = item.data(Qt.UserRole)
+        if path:
+            QDesktopServices.openUrl(self.window().page_url(path))
+    
+    def open_result(self, index):
+        row = self.result_model.row_data(index.row())
+        if row:
+            QDesktopServices.openUrl(self.window().page_url(row["path"]))
+    
     def load_settings(self):
         settings = load_settings()
         self.api_key_edit.setText(settings.get("api_key", ""))
         self.max_token_spin.setValue(settings.get("max_tokens", 2048))
+        self.article_token_spin.setValue(settings.get("article_max_tokens", DEFAULT_ARTICLE_MAX_TOKENS))
+        self.adaptive_tokens_check.setChecked(settings.get("adaptive_tokens", True))
+        self.concurrency_spin.setValue(settings.get("concurrency", 4))
+        self.max_jobs_spin.setValue(settings.get("max_jobs", DEFAULT_MAX_JOBS))
+        self.cache_check.setChecked(settings.get("cache_enabled", True))
+        self.cache_refresh_check.setChecked(settings.get("cache_refresh", False))
+        self.context_cache_check.setChecked(settings.get("context_cache", True))
+        self.hedging_check.setChecked(settings.get("hedging", True))
+        self.fallback_model_edit.setText(settings.get("fallback_model", ""))
+        self.streaming_check.setChecked(settings.get("streaming", True))
+        self.structured_check.setChecked(settings.get("structured_output", False))
+        self.section_batches_spin.setValue(settings.get("section_batches", DEFAULT_SECTION_BATCHES))
+        self.server_check.setChecked(settings.get("serve_wiki", False))
+        self.server_public_check.setChecked(settings.get("server_public", False))
+        self.server_port_spin.setValue(settings.get("server_port", DEFAULT_SERVER_PORT))
+        self.rpm_spin.setValue(settings.get("requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE))
+        self.tpm_spin.setValue(settings.get("tokens_per_minute", DEFAULT_TOKENS_PER_MINUTE))
         api_type = settings.get("api_type", "Gemini")
         index = self.api_combo.findText(api_type)
         if index != -1:
@@ -192,9 +830,27 @@ class SettingsWidget(QWidget):
         settings = {
             "api_key": self.api_key_edit.text().strip(),
             "max_tokens": self.max_token_spin.value(),
-            "api_type": self.api_combo.currentText()
+            "article_max_tokens": self.article_token_spin.value(),
+            "adaptive_tokens": self.adaptive_tokens_check.isChecked(),
+            "api_type": self.api_combo.currentText(),
+            "concurrency": self.concurrency_spin.value(),
+            "max_jobs": self.max_jobs_spin.value(),
+            "cache_enabled": self.cache_check.isChecked(),
+            "cache_refresh": self.cache_refresh_check.isChecked(),
+            "context_cache": self.context_cache_check.isChecked(),
+            "hedging": self.hedging_check.isChecked(),
+            "fallback_model": self.fallback_model_edit.text().strip(),
+            "streaming": self.streaming_check.isChecked(),
+            "structured_output": self.structured_check.isChecked(),
+            "section_batches": self.section_batches_spin.value(),
+            "serve_wiki": self.server_check.isChecked(),
+            "server_public": self.server_public_check.isChecked(),
+            "server_port": self.server_port_spin.value(),
+            "requests_per_minute": self.rpm_spin.value(),
+            "tokens_per_minute": self.tpm_spin.value()
         }
         save_settings(settings)
+        self.window().apply_server_settings(settings)
         QMessageBox.information(self, "저장", "설정이 저장되었습니다.")
 
 # 메인 윈도우
@@ -219,13 +875,55 @@ class MainWindow(QMainWindow):
         self.settings_dock.setMinimumWidth(50)
         self.settings_dock.setMaximumWidth(250)
         
+        self.wiki_server = None
         self.settings_widget.load_settings()
+        self.apply_server_settings(load_settings())
         self.apply_styles()
     
-    def add_wiki_button(self, event_title):
-        btn = QPushButton(event_title)
-        btn.clicked.connect(lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.abspath("wiki.html"))))
-        self.settings_widget.button_area.addWidget(btn)
+    def closeEvent(self, event):
+        self.central_widget.shutdown()
+        self.stop_server()
+        super().closeEvent(event)
+    
+    def apply_server_settings(self, settings):
+        """설정에 따라 내장 위키 서버를 켜거나 끕니다. 사이트 폴더, 주소, 포트가 바뀌었으면 다시 시작합니다."""
+        site_dir = settings.get("site_dir", DEFAULT_SITE_DIR)
+        wanted = None
+        if settings.get("serve_wiki", False):
+            host = "0.0.0.0" if settings.get("server_public", False) else "127.0.0.1"
+            wanted = (os.path.abspath(site_dir), host, settings.get("server_port", DEFAULT_SERVER_PORT))
+        server = self.wiki_server
+        current = (server.site_dir, server.host, server.port) if server is not None else None
+        if wanted == current:
+            return
+        self.stop_server()
+        if wanted is None:
+            return
+        # http.server는 ssl, email 등을 함께 불러오므로 서버를 켤 때만 가져옴 (GUI 시작 시간에서 제외)
+        import wiki_server, wiki_site
+        try:
+            wiki_site.ensure_site(site_dir)
+            self.wiki_server = wiki_server.WikiServer(site_dir, host=wanted[1], port=wanted[2], quiet=True).start()
+        except OSError as e:
+            QMessageBox.warning(self, "위키 서버", f"위키 서버를 시작할 수 없습니다: {e}")
+            return
+        self.settings_widget.server_url_label.setText(self.wiki_server.url)
+    
+    def stop_server(self):
+        if self.wiki_server is not None:
+            self.wiki_server.stop()
+            self.wiki_server = None
+            self.settings_widget.server_url_label.setText("")
+    
+    def page_url(self, path):
+        """위키 서버가 실행 중이면 서버 주소, 아니면 로컬 파일 주소"""
+        url = self.wiki_server.url_for(path) if self.wiki_server is not None else None
+        return QUrl(url) if url else QUrl.fromLocalFile(os.path.abspath(path))
+    
+    def add_result(self, result):
+        # 생성된 문서 목록 맨 위에 추가 (누를 때 서버가 실행 중이면 서버 주소로 엶)
+        if result:
+            self.settings_widget.result_model.add_result(result)
     
     def apply_styles(self):
         style_sheet = """
@@ -271,6 +969,8 @@ def main():
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    # 파이프라인 모듈과 google-genai SDK는 필요할 때 불러오므로, 창이 뜬 뒤 백그라운드에서 미리 불러와 첫 전송 때 기다리지 않게 함
+    QTimer.singleShot(0, lambda: warmup(load_settings().get("api_key", "")))
     sys.exit(app.exec())
 
 if __name__ == "__main__":
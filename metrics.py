@@ -0,0 +1,292 @@
+# metrics.py
+"""
+실행(run) 단위 계측입니다.
+- 단계별 소요 시간 (run.stage("render") 컨텍스트 매니저)
+- LLM 호출별 소요 시간, 첫 토큰까지 시간(TTFT), 입력/출력 토큰 수, 캐시 적중, 재시도 횟수
+  (입력 토큰 중 제공자 측 컨텍스트 캐시에서 읽은 토큰 수는 cached_tokens)
+- 호출을 보낸 제공자(provider)와 역할(role: primary / hedge / failover), 헤징에서 져서 버린 호출(abandoned)
+- 실행 중인 같은 요청에 합쳐져 API를 호출하지 않은 호출(coalesced, singleflight)
+실행 기록은 logs/runs.jsonl에 한 줄짜리 JSON으로 남기고, 프로세스 누적 값은 Prometheus 텍스트 형식으로 내보낼 수 있습니다.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+DEFAULT_LOG_DIR = "logs"
+
+_current_run = contextvars.ContextVar("wiki_run", default=None)
+
+class RunMetrics:
+    """
+    사건 하나를 생성하는 실행의 계측 기록입니다. 여러 스레드에서 동시에 기록할 수 있습니다.
+    on_update가 주어지면 LLM 호출이 하나 끝날 때마다 (호출한 스레드에서) on_update(run)을 호출합니다.
+    """
+    def __init__(self, title="", on_update=None):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.title = title
+        self.started_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self.stages = {}
+        self.calls = []
+        self.on_update = on_update
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            registry.observe_stage(name, elapsed)
+
+    def record_call(self, call):
+        with self._lock:
+            self.calls.append(call)
+        if self.on_update:
+            self.on_update(self)
+
+    def elapsed(self):
+        if self.finished_at:
+            return self.finished_at - self.started_at
+        return time.perf_counter() - self._start
+
+    def totals(self):
+        with self._lock:
+            calls = list(self.calls)
+        return {
+            "calls": len(calls),
+            "api_calls": sum(1 for c in calls if not c["cache_hit"] and not c.get("coalesced")),
+            "cache_hits": sum(1 for c in calls if c["cache_hit"]),
+            "coalesced": sum(1 for c in calls if c.get("coalesced")),
+            "retries": sum(c["retries"] for c in calls),
+            "errors": sum(1 for c in calls if c["error"]),
+            "hedges": sum(1 for c in calls if c.get("role") == "hedge"),
+            "failovers": sum(1 for c in calls if c.get("role") == "failover"),
+            "input_tokens": sum(c["input_tokens"] for c in calls),
+            "cached_tokens": sum(c.get("cached_tokens", 0) for c in calls),
+            "output_tokens": sum(c["output_tokens"] for c in calls),
+        }
+
+    def summary_line(self):
+        """GUI 진행 상태 표시용 한 줄 요약"""
+        t = self.totals()
+        cached = f"(캐시 {t['cached_tokens']:,})" if t["cached_tokens"] else ""
+        hedges = f" · 헤징 {t['hedges']}" if t["hedges"] else ""
+        failovers = f" · 장애 조치 {t['failovers']}" if t["failovers"] else ""
+        coalesced = f" · 합침 {t['coalesced']}" if t["coalesced"] else ""
+        return (f"호출 {t['api_calls']} · 캐시 {t['cache_hits']}{coalesced} · 재시도 {t['retries']}{hedges}{failovers} · "
+                f"토큰 {t['input_tokens']:,}{cached}→{t['output_tokens']:,} · {self.elapsed():.1f}s")
+
+    def finish(self, error=None):
+        self.finished_at = time.time()
+        self.error = error
+        registry.observe_run(error is None)
+
+    def to_dict(self):
+        with self._lock:
+            calls = list(self.calls)
+            stages = dict(self.stages)
+        return {
+            "run_id": self.run_id,
+            "title": self.title,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": round(self.elapsed(), 4),
+            "error": self.error,
+            "stages": {name: round(seconds, 4) for name, seconds in stages.items()},
+            "totals": self.totals(),
+            "calls": calls,
+        }
+
+class CallRecorder:
+    """llm_client가 LLM 호출 하나를 계측할 때 사용합니다. 현재 실행이 없어도 프로세스 누적 값은 기록됩니다."""
+    def __init__(self, label, run, provider=None, role="primary"):
+        self.label = label
+        self.run = run
+        self.provider = provider
+        self.role = role
+        self.retries = 0
+        self.ttft = None
+        self._start = time.perf_counter()
+
+    def retry(self, attempt=None, error=None, delay=None):
+        self.retries += 1
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self._start
+
+    def finish(self, response=None, cache_hit=False, error=None, abandoned=False, coalesced=False):
+        """
+        abandoned: 헤징에서 다른 요청이 먼저 끝나 취소했거나 응답을 버린 호출 (오류로 세지 않음)
+        coalesced: 실행 중인 같은 요청의 응답을 함께 받아 API를 호출하지 않은 호출
+        """
+        wall = time.perf_counter() - self._start
+        call = {
+            "label": self.label,
+            "wall": round(wall, 4),
+            "ttft": round(self.ttft if self.ttft is not None else wall, 4),
+            "input_tokens": getattr(response, "input_tokens", 0) or 0,
+            "cached_tokens": getattr(response, "cached_tokens", 0) or 0,
+            "output_tokens": getattr(response, "output_tokens", 0) or 0,
+            "finish_reason": getattr(response, "finish_reason", None),
+            "cache_hit": cache_hit,
+            "retries": self.retries,
+            "error": str(error) if error else None,
+            "provider": self.provider,
+            "role": self.role,
+            "abandoned": abandoned,
+            "coalesced": coalesced,
+        }
+        registry.observe_call(call)
+        if self.run is not None:
+            self.run.record_call(call)
+        return call
+
+@contextlib.contextmanager
+def activate(run):
+    """with 블록 안(및 copy_context로 넘긴 작업 스레드)의 LLM 호출을 run에 기록합니다."""
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+def current_run():
+    return _current_run.get()
+
+def start_call(label="", provider=None, role="primary"):
+    return CallRecorder(label, current_run(), provider, role)
+
+class Registry:
+    """Prometheus 텍스트 형식으로 내보낼 프로세스 누적 값"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {}          # (label, cache: hit / shared / miss) -> count
+        self.attempts = {}       # (role, outcome) -> count (캐시를 거치지 않은 호출)
+        self.tokens = {"input": 0, "cached": 0, "output": 0}
+        self.retries = 0
+        self.errors = 0
+        self.call_seconds = [0.0, 0]
+        self.ttft_seconds = [0.0, 0]
+        self.stage_seconds = {}  # stage -> [sum, count]
+        self.runs = {"ok": 0, "error": 0}
+        self.coalesced = {}      # singleflight 그룹 -> 실행 중인 작업에 합쳐진 수
+
+    def observe_call(self, call):
+        with self._lock:
+            cache = "hit" if call["cache_hit"] else "shared" if call.get("coalesced") else "miss"
+            key = (call["label"], cache)
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.tokens["input"] += call["input_tokens"]
+            self.tokens["cached"] += call.get("cached_tokens", 0)
+            self.tokens["output"] += call["output_tokens"]
+            self.retries += call["retries"]
+            self.errors += 1 if call["error"] else 0
+            if cache == "miss":
+                outcome = "abandoned" if call.get("abandoned") else "error" if call["error"] else "ok"
+                key = (call.get("role") or "primary", outcome)
+                self.attempts[key] = self.attempts.get(key, 0) + 1
+                self.call_seconds[0] += call["wall"]
+                self.call_seconds[1] += 1
+                self.ttft_seconds[0] += call["ttft"]
+                self.ttft_seconds[1] += 1
+
+    def observe_coalesced(self, group):
+        with self._lock:
+            self.coalesced[group] = self.coalesced.get(group, 0) + 1
+
+    def observe_stage(self, stage, seconds):
+        with self._lock:
+            entry = self.stage_seconds.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def observe_run(self, ok):
+        with self._lock:
+            self.runs["ok" if ok else "error"] += 1
+
+    def prometheus_text(self):
+        def esc(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        with self._lock:
+            lines = [
+                "# HELP wiki_llm_calls_total LLM calls by label and cache result (hit, shared in-flight, miss).",
+                "# TYPE wiki_llm_calls_total counter",
+            ]
+            for (label, cache), count in sorted(self.calls.items()):
+                lines.append(f'wiki_llm_calls_total{{label="{esc(label)}",cache="{cache}"}} {count}')
+            lines += [
+                "# HELP wiki_llm_tokens_total Tokens reported by the provider usage metadata.",
+                "# TYPE wiki_llm_tokens_total counter",
+                f'wiki_llm_tokens_total{{direction="input"}} {self.tokens["input"]}',
+                f'wiki_llm_tokens_total{{direction="output"}} {self.tokens["output"]}',
+                "# HELP wiki_llm_cached_tokens_total Input tokens served from provider-side context caches.",
+                "# TYPE wiki_llm_cached_tokens_total counter",
+                f'wiki_llm_cached_tokens_total {self.tokens["cached"]}',
+                "# HELP wiki_llm_retries_total Retried LLM attempts.",
+                "# TYPE wiki_llm_retries_total counter",
+                f"wiki_llm_retries_total {self.retries}",
+                "# HELP wiki_llm_errors_total LLM calls that failed after retries.",
+                "# TYPE wiki_llm_errors_total counter",
+                f"wiki_llm_errors_total {self.errors}",
+                "# HELP wiki_llm_attempts_total Uncached LLM calls by role (primary, hedge, failover) and outcome.",
+                "# TYPE wiki_llm_attempts_total counter",
+            ]
+            for (role, outcome), count in sorted(self.attempts.items()):
+                lines.append(f'wiki_llm_attempts_total{{role="{esc(role)}",outcome="{outcome}"}} {count}')
+            lines += [
+                "# HELP wiki_llm_call_seconds Wall time of uncached LLM calls.",
+                "# TYPE wiki_llm_call_seconds summary",
+                f"wiki_llm_call_seconds_sum {self.call_seconds[0]:.6f}",
+                f"wiki_llm_call_seconds_count {self.call_seconds[1]}",
+                "# HELP wiki_llm_ttft_seconds Time to first token of uncached LLM calls.",
+                "# TYPE wiki_llm_ttft_seconds summary",
+                f"wiki_llm_ttft_seconds_sum {self.ttft_seconds[0]:.6f}",
+                f"wiki_llm_ttft_seconds_count {self.ttft_seconds[1]}",
+                "# HELP wiki_stage_seconds Wall time per pipeline stage.",
+                "# TYPE wiki_stage_seconds summary",
+            ]
+            for stage, (total, count) in sorted(self.stage_seconds.items()):
+                lines.append(f'wiki_stage_seconds_sum{{stage="{esc(stage)}"}} {total:.6f}')
+                lines.append(f'wiki_stage_seconds_count{{stage="{esc(stage)}"}} {count}')
+            lines += [
+                "# HELP wiki_runs_total Finished article runs by status.",
+                "# TYPE wiki_runs_total counter",
+                f'wiki_runs_total{{status="ok"}} {self.runs["ok"]}',
+                f'wiki_runs_total{{status="error"}} {self.runs["error"]}',
+                "# HELP wiki_coalesced_total Duplicate requests served by an identical in-flight one, by group.",
+                "# TYPE wiki_coalesced_total counter",
+            ]
+            for group, count in sorted(self.coalesced.items()):
+                lines.append(f'wiki_coalesced_total{{group="{esc(group)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+_log_lock = threading.Lock()
+
+def write_run_log(run, directory=DEFAULT_LOG_DIR):
+    """실행 기록을 <directory>/runs.jsonl에 한 줄로 추가합니다."""
+    os.makedirs(directory, exist_ok=True)
+    line = json.dumps(run.to_dict(), ensure_ascii=False) + "\n"
+    with _log_lock, open(os.path.join(directory, "runs.jsonl"), "a", encoding="utf-8") as f:
+        f.write(line)
+
+def write_prometheus(path):
+    """현재 누적 값을 Prometheus 텍스트 형식 파일로 씁니다 (node_exporter textfile collector 등에서 수집)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(registry.prometheus_text())
+    os.replace(tmp_path, path)
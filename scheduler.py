@@ -0,0 +1,346 @@
+# scheduler.py
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+
+# 우선순위 값이 작을수록 먼저 처리됩니다. GUI 요청은 배치 요청보다 먼저 슬롯을 받습니다.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Gemini 2.0 Flash 무료 등급 기본 한도
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# httpx 등 네트워크 계층의 일시적 오류 (클래스 이름으로 판별하여 httpx를 직접 import하지 않음)
+RETRYABLE_ERROR_NAMES = {"TimeoutException", "NetworkError", "RemoteProtocolError", "ConnectError", "ReadTimeout"}
+
+# 취소 토큰이 있으면 대기 중인 호출이 이 간격으로 취소 여부를 확인합니다.
+CANCEL_POLL_INTERVAL = 0.2
+
+_priority = contextvars.ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+_cancel_token = contextvars.ContextVar("llm_cancel_token", default=None)
+
+@contextlib.contextmanager
+def priority(level):
+    """with 블록 안(및 copy_context로 넘긴 작업 스레드)에서 실행되는 LLM 호출의 우선순위를 지정합니다."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority():
+    return _priority.get()
+
+class Cancelled(Exception):
+    """작업이 취소되어 LLM 호출을 중단했습니다."""
+
+class CancelToken:
+    """작업 하나의 취소 신호. 여러 스레드에서 cancel() / cancelled를 사용할 수 있습니다."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout):
+        """timeout초 동안 기다리다 취소되면 True를 반환합니다."""
+        return self._event.wait(timeout)
+
+@contextlib.contextmanager
+def cancellation(token):
+    """
+    with 블록 안(및 copy_context로 넘긴 작업 스레드)의 LLM 호출을 token으로 취소할 수 있게 합니다.
+    취소되면 대기열의 호출, 재시도 대기, 스트리밍 수신이 Cancelled로 중단됩니다.
+    """
+    reset = _cancel_token.set(token)
+    try:
+        yield token
+    finally:
+        _cancel_token.reset(reset)
+
+def current_cancel_token():
+    return _cancel_token.get()
+
+def check_cancelled():
+    """현재 작업이 취소되었으면 Cancelled를 발생시킵니다."""
+    token = _cancel_token.get()
+    if token is not None and token.cancelled:
+        raise Cancelled("작업이 취소되었습니다.")
+
+def estimate_tokens(text):
+    """요청 토큰 수의 대략적인 추정치 (한국어 기준 약 2글자당 1토큰)"""
+    return len(text) // 2 + 1
+
+def is_retryable(error):
+    """429/5xx 응답이나 일시적인 네트워크 오류이면 True"""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+def retry_after(error):
+    """오류 응답에 서버가 지정한 재시도 대기 시간(retryDelay)이 있으면 초 단위로 반환합니다."""
+    match = re.search(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", str(error))
+    return float(match.group(1)) if match else 0.0
+
+class TokenBucket:
+    """분당 rate_per_minute만큼 채워지는 토큰 버킷. 잔량은 음수가 될 수 있습니다(사후 정산)."""
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """amount만큼 꺼낼 수 있을 때까지 남은 시간(초). 버킷 용량보다 큰 요청은 가득 찰 때까지만 기다립니다."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self.tokens -= amount
+
+class RequestScheduler:
+    """
+    모든 LLM 호출이 거쳐 가는 중앙 스케줄러입니다.
+    - 분당 요청 수 / 분당 토큰 수 토큰 버킷으로 한도 바로 아래에서 호출을 내보냅니다.
+    - 대기 중인 호출은 (우선순위, 도착 순서)의 힙으로 관리되어 GUI 요청이 배치 요청보다 먼저 나갑니다.
+    - 재시도 가능한 오류는 지수 백오프 + full jitter로 max_retries번까지 다시 시도합니다.
+    - 스레드(acquire/call)와 asyncio 코루틴(acquire_async/call_async)이 같은 대기열과 버킷을 함께 씁니다.
+    """
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.options = {
+            "requests_per_minute": requests_per_minute, "tokens_per_minute": tokens_per_minute,
+            "max_retries": max_retries, "base_delay": base_delay, "max_delay": max_delay,
+        }
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.calls = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        self._async_waiters = set()  # (이벤트 루프, asyncio.Event): 대기열이 바뀌면 깨울 코루틴
+
+    def _notify(self):
+        # self._cond를 잡은 상태에서 호출: 대기 중인 스레드와 코루틴을 모두 깨움
+        self._cond.notify_all()
+        for loop, wakeup in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # 이미 닫힌 루프
+
+    def acquire(self, estimated_tokens=0, priority=None):
+        """
+        우선순위 순서대로 차례가 오고 두 버킷에 여유가 생길 때까지 기다린 뒤 슬롯을 가져갑니다.
+        기다리는 동안 현재 작업이 취소되면 대기열에서 빠지고 Cancelled를 발생시킵니다.
+        """
+        if priority is None:
+            priority = current_priority()
+        token = current_cancel_token()
+        poll = CANCEL_POLL_INTERVAL if token is not None else None
+        ticket = (priority, next(self._seq))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    check_cancelled()
+                    wait = self._try_take(ticket, estimated_tokens, started)
+                    if wait == 0:
+                        return
+                    if wait is not None:
+                        self._cond.wait(min(wait, poll) if poll else wait)
+                    else:
+                        self._cond.wait(poll)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._notify()
+                raise
+
+    def _try_take(self, ticket, estimated_tokens, started):
+        """
+        self._cond를 잡은 상태에서 호출: ticket 차례이고 버킷에 여유가 있으면 슬롯을 가져가고 0을 반환합니다.
+        차례이지만 여유가 없으면 기다릴 시간(초), 차례가 아니면 None을 반환합니다.
+        """
+        if self._waiting[0] != ticket:
+            return None
+        now = time.monotonic()
+        wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(estimated_tokens, now))
+        if wait > 0:
+            return wait
+        self.requests.consume(1, now)
+        self.tokens.consume(estimated_tokens, now)
+        heapq.heappop(self._waiting)
+        self.calls += 1
+        self.throttled_seconds += now - started
+        self._notify()
+        return 0
+
+    async def acquire_async(self, estimated_tokens=0, priority=None):
+        """
+        acquire()의 asyncio 버전입니다. 스레드를 막지 않고 차례와 버킷 여유를 기다립니다.
+        태스크가 취소되거나(asyncio) 현재 작업이 취소되면(CancelToken) 대기열에서 빠집니다.
+        """
+        import asyncio
+        if priority is None:
+            priority = current_priority()
+        token = current_cancel_token()
+        poll = CANCEL_POLL_INTERVAL if token is not None else None
+        ticket = (priority, next(self._seq))
+        started = time.monotonic()
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                check_cancelled()
+                with self._cond:
+                    waiter[1].clear()
+                    wait = self._try_take(ticket, estimated_tokens, started)
+                    if wait == 0:
+                        self._async_waiters.discard(waiter)
+                        return
+                if poll:
+                    wait = min(wait, poll) if wait else poll
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                self._notify()
+            raise
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """호출 후 실제 사용 토큰 수(입력+출력)로 토큰 버킷을 정산합니다."""
+        if not actual_tokens:
+            return
+        with self._cond:
+            self.tokens.consume(actual_tokens - estimated_tokens, time.monotonic())
+            self._notify()
+
+    def backoff_delay(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        return max(delay, retry_after(error))
+
+    def call(self, fn, estimated_tokens=0, priority=None, on_retry=None):
+        """
+        슬롯을 얻은 뒤 fn()을 실행하고 결과를 반환합니다.
+        재시도 가능한 오류이면 백오프 후 다시 슬롯을 얻어 재시도하고, 그 외 오류나 재시도 소진 시 예외를 전달합니다.
+        on_retry가 주어지면 재시도 전에 on_retry(시도 번호, 오류, 대기 시간)을 호출합니다.
+        현재 작업이 취소되면 슬롯 대기나 재시도 대기 중에도 바로 Cancelled를 발생시킵니다.
+        """
+        attempt = 0
+        while True:
+            check_cancelled()
+            self.acquire(estimated_tokens, priority)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                attempt += 1
+                with self._cond:
+                    self.retries += 1
+                if on_retry:
+                    on_retry(attempt, e, delay)
+                token = current_cancel_token()
+                if token is None:
+                    time.sleep(delay)
+                elif token.wait(delay):
+                    raise Cancelled("작업이 취소되었습니다.") from e
+
+    async def call_async(self, fn, estimated_tokens=0, priority=None, on_retry=None):
+        """
+        call()의 asyncio 버전입니다. fn은 코루틴을 반환하는 함수(예: lambda: backend.agenerate(...))입니다.
+        재시도 대기도 asyncio.sleep으로 기다리므로 태스크를 취소하면 바로 중단됩니다.
+        """
+        import asyncio
+        attempt = 0
+        while True:
+            check_cancelled()
+            await self.acquire_async(estimated_tokens, priority)
+            try:
+                return await fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                attempt += 1
+                with self._cond:
+                    self.retries += 1
+                if on_retry:
+                    on_retry(attempt, e, delay)
+                deadline = time.monotonic() + delay
+                while True:
+                    check_cancelled()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    await asyncio.sleep(min(remaining, CANCEL_POLL_INTERVAL) if current_cancel_token() else remaining)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "waiting": len(self._waiting),
+            }
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def configure(**options):
+    """
+    프로세스 전역 스케줄러를 새 한도로 교체합니다 (requests_per_minute, tokens_per_minute, max_retries 등).
+    한도가 지금과 같으면 기존 스케줄러(버킷 잔량, 통계)를 그대로 유지합니다.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        candidate = RequestScheduler(**options)
+        if _scheduler is None or _scheduler.options != candidate.options:
+            _scheduler = candidate
+    return _scheduler
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler()
+    return _scheduler
@@ -0,0 +1,238 @@
+# search_index.py
+"""
+생성된 위키 문서의 전문 검색 색인입니다.
+
+- 토큰화: NFC 정규화, 소문자화한 뒤 단어(\\w+)마다 글자 2-gram을 만듭니다 (한 글자 단어는 그 글자).
+  형태소 분석 없이도 조사가 붙은 한국어("전쟁은", "전쟁의")나 띄어쓰기 차이와 상관없이 부분 일치로 찾을 수 있습니다.
+- 저장: 사이트 폴더의 search.sqlite3에 (토큰 → 문서, 빈도) 역색인으로 저장합니다. WAL 모드라 검색 중에도 색인을 갱신할 수 있습니다.
+- 갱신: wiki_site.save_article이 글을 저장할 때마다 해당 문서의 색인만 다시 씁니다.
+- 순위: BM25. 제목과 키워드는 본문보다 높은 가중치를 가집니다.
+
+사용법:
+    python search_index.py query "검색어" [--site site] [--limit 10]
+    python search_index.py rebuild [--site site]
+"""
+import argparse
+import heapq
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+INDEX_FILE = "search.sqlite3"
+# 필드별 가중치: 토큰 빈도에 곱해집니다.
+FIELD_WEIGHTS = {"title": 3, "keywords": 2, "body": 1}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"\w+")
+
+def tokenize(text):
+    """텍스트를 글자 2-gram 토큰 리스트로 바꿉니다. 마크업 괄호([], ())와 문장 부호는 단어 경계로 취급됩니다."""
+    tokens = []
+    for word in _WORD_RE.findall(unicodedata.normalize("NFC", text).lower()):
+        if len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+class SearchIndex:
+    """
+    SQLite 역색인입니다. 여러 스레드에서 공유할 수 있습니다.
+    docs: 문서 (slug, 제목, 페이지 경로, 가중치 적용 토큰 수)
+    postings: (토큰, 문서) → 가중치 적용 빈도
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " doc_id INTEGER PRIMARY KEY,"
+            " slug TEXT UNIQUE NOT NULL,"
+            " title TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL,"
+            " doc_id INTEGER NOT NULL,"
+            " tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, doc_id)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS postings_doc ON postings(doc_id)")
+
+    @staticmethod
+    def term_counts(title, keywords, articles):
+        counts = Counter()
+        fields = [
+            ("title", title),
+            ("keywords", " ".join(kw for kws in keywords.values() for kw in kws)),
+            ("body", "\n".join(articles.values())),
+        ]
+        for field, text in fields:
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                counts[token] += weight
+        return counts
+
+    def add(self, slug, title, path, keywords, articles):
+        """문서 하나의 색인을 (다시) 씁니다. 같은 slug의 이전 색인은 지웁니다."""
+        counts = self.term_counts(title, keywords or {}, articles or {})
+        length = sum(counts.values())
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT doc_id FROM docs WHERE slug = ?", (slug,)).fetchone()
+                if row:
+                    doc_id = row[0]
+                    self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+                    self._conn.execute(
+                        "UPDATE docs SET title = ?, path = ?, length = ?, updated_at = ? WHERE doc_id = ?",
+                        (title, path, length, time.time(), doc_id)
+                    )
+                else:
+                    doc_id = self._conn.execute(
+                        "INSERT INTO docs (slug, title, path, length, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (slug, title, path, length, time.time())
+                    ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    ((term, doc_id, tf) for term, tf in counts.items())
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, slug):
+        with self._lock:
+            row = self._conn.execute("SELECT doc_id FROM docs WHERE slug = ?", (slug,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (row[0],))
+                self._conn.execute("DELETE FROM docs WHERE doc_id = ?", (row[0],))
+
+    def search(self, query, limit=10):
+        """
+        BM25 점수 순으로 상위 limit개 문서를 반환합니다.
+        Returns:
+            [{"slug", "title", "path", "score"}, ...]
+        """
+        terms = Counter(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            total_docs, avg_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            if not total_docs:
+                return []
+            scores = {}
+            for term, query_tf in terms.items():
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.doc_id = p.doc_id WHERE p.term = ?",
+                    (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (total_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + query_tf * idf * tf * (BM25_K1 + 1) / (tf + norm)
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            results = []
+            for doc_id, score in top:
+                slug, title, path = self._conn.execute(
+                    "SELECT slug, title, path FROM docs WHERE doc_id = ?", (doc_id,)
+                ).fetchone()
+                results.append({"slug": slug, "title": title, "path": path, "score": round(score, 4)})
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM docs")
+
+    def stats(self):
+        with self._lock:
+            docs = self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+            postings = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {"docs": docs, "postings": postings}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def index_path(site_dir):
+    return os.path.join(site_dir, INDEX_FILE)
+
+def get_index(site_dir):
+    """사이트 폴더별로 하나의 SearchIndex를 공유합니다."""
+    path = os.path.abspath(index_path(site_dir))
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = SearchIndex(path)
+        return index
+
+def add_record(site_dir, record, path):
+    """wiki_site에 저장된 글 하나를 색인합니다."""
+    get_index(site_dir).add(record["slug"], record["title"], path,
+                            record.get("keywords", {}), record.get("articles", {}))
+
+def search(site_dir, query, limit=10):
+    return get_index(site_dir).search(query, limit)
+
+def rebuild(site_dir):
+    """사이트에 저장된 모든 글로 색인을 처음부터 다시 만들고 문서 수를 반환합니다."""
+    import wiki_site
+    index = get_index(site_dir)
+    index.clear()
+    count = 0
+    for slug in wiki_site.stored_slugs(site_dir):
+        record = wiki_site.find_article(site_dir, slug)
+        if record:
+            add_record(site_dir, record, wiki_site.page_path(site_dir, slug))
+            count += 1
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="생성된 위키 문서를 검색합니다.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    query = sub.add_parser("query", help="검색어로 문서를 찾습니다.")
+    query.add_argument("text", help="검색어")
+    query.add_argument("--site", default="site", help="사이트 폴더 (기본: site)")
+    query.add_argument("--limit", type=int, default=10, help="결과 수 (기본: 10)")
+    rebuild_parser = sub.add_parser("rebuild", help="저장된 모든 글로 색인을 다시 만듭니다.")
+    rebuild_parser.add_argument("--site", default="site", help="사이트 폴더 (기본: site)")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        start = time.perf_counter()
+        count = rebuild(args.site)
+        print(f"{count}개 문서를 {time.perf_counter() - start:.2f}s에 색인했습니다.")
+        return 0
+    start = time.perf_counter()
+    results = search(args.site, args.text, args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for rank, result in enumerate(results, 1):
+        print(f"{rank:>3}. {result['title']}  ({result['score']:.2f})  {result['path']}")
+    print(f"{len(results)}건, {elapsed:.1f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
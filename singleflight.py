@@ -0,0 +1,202 @@
+# singleflight.py
+"""
+동시에 들어온 같은 작업을 하나로 합치는 single-flight입니다.
+
+같은 키의 작업이 이미 실행 중이면 새로 실행하지 않고 끝날 때까지 기다려 그 결과(또는 예외)를 함께 받습니다.
+끝난 작업은 바로 잊으므로, 결과를 저장해 두는 응답 캐시(llm_cache)와 달리 실행 중인 동안에만 합쳐집니다.
+
+- 앞서 실행한 호출(leader)이 취소되어 끝나면 기다리던 호출 중 하나가 새로 실행합니다
+  (한 작업의 취소가 같은 키를 기다리던 다른 작업을 실패시키지 않음).
+- 기다리는 호출도 자신의 작업이 취소되면(scheduler.cancellation, asyncio 태스크 취소) 바로 빠져나옵니다.
+- 스레드와 asyncio 코루틴이 같은 키로 합쳐질 수 있습니다.
+
+그룹은 이름별로 프로세스 전체에서 공유합니다 (group("llm"): LLM 호출, group("article"): 문서 생성).
+합쳐져 실행하지 않은 수는 그룹의 shared와 metrics의 wiki_coalesced_total에 집계됩니다.
+configure(enabled=False)로 끄면 모든 호출이 각자 실행합니다 (측정 비교용).
+"""
+import hashlib
+import json
+import threading
+import unicodedata
+
+import metrics
+import scheduler
+
+_enabled = True
+
+def configure(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+class LeaderGone(Exception):
+    """기다리던 작업이 취소되어 결과가 없습니다. 다시 join()하면 이 호출이 실행할 수 있습니다."""
+
+def _normalize(value):
+    if isinstance(value, str):
+        return unicodedata.normalize("NFC", value).strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+def make_key(*parts):
+    """parts(문자열은 NFC 정규화 후 앞뒤 공백 제거)의 해시. 같은 요청 매개변수는 항상 같은 키가 됩니다."""
+    payload = json.dumps(_normalize(parts), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _leader_cancelled(error):
+    # Cancelled(작업 취소), asyncio.CancelledError / GeneratorExit(Exception이 아님)로 끝난 실행은 결과가 아님
+    return isinstance(error, scheduler.Cancelled) or not isinstance(error, Exception)
+
+class Flight:
+    """
+    Group.join()이 반환하는 실행 하나에 대한 참여입니다.
+    leader이면 run(fn) (또는 resolve / reject)으로 결과를 알리고, 아니면 wait() / await_result()로 결과를 받습니다.
+    """
+    def __init__(self, group, key, future, leader):
+        self.group = group
+        self.key = key
+        self.leader = leader
+        self._future = future
+
+    def resolve(self, value):
+        self.group._land(self.key, self._future)
+        self._future.set_result(value)
+
+    def reject(self, error):
+        self.group._land(self.key, self._future)
+        self._future.set_exception(error)
+
+    def run(self, fn):
+        try:
+            value = fn()
+        except BaseException as e:
+            self.reject(e)
+            raise
+        self.resolve(value)
+        return value
+
+    async def arun(self, fn):
+        try:
+            value = await fn()
+        except BaseException as e:
+            self.reject(e)
+            raise
+        self.resolve(value)
+        return value
+
+    def _outcome(self):
+        error = self._future.exception()
+        if error is None:
+            self.group._shared()
+            return self._future.result()
+        if _leader_cancelled(error):
+            raise LeaderGone("같은 작업이 취소되었습니다.")
+        self.group._shared()
+        raise error
+
+    def wait(self):
+        """leader의 결과를 기다려 반환합니다. leader의 예외는 그대로 발생하고, leader가 취소되었으면 LeaderGone."""
+        from concurrent.futures import wait
+        poll = scheduler.CANCEL_POLL_INTERVAL if scheduler.current_cancel_token() is not None else None
+        while not self._future.done():
+            scheduler.check_cancelled()
+            wait([self._future], timeout=poll)
+        return self._outcome()
+
+    async def await_result(self):
+        """wait()의 asyncio 버전입니다. 이 태스크를 취소해도 leader의 실행은 계속됩니다."""
+        import asyncio
+        poll = scheduler.CANCEL_POLL_INTERVAL if scheduler.current_cancel_token() is not None else None
+        waiter = asyncio.wrap_future(self._future)
+        while not self._future.done():
+            scheduler.check_cancelled()
+            # asyncio.wait는 기다리던 퓨처를 취소하지 않음
+            await asyncio.wait({waiter}, timeout=poll)
+        return self._outcome()
+
+class Group:
+    """
+    키별로 실행 중인 작업을 하나만 두는 그룹입니다. 여러 스레드와 이벤트 루프에서 공유할 수 있습니다.
+    executed: 실제로 실행한 수, shared: 실행 중인 작업에 합쳐져 실행하지 않은 수
+    """
+    def __init__(self, name):
+        self.name = name
+        self.executed = 0
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def join(self, key):
+        """
+        key의 작업이 실행 중이면 그 결과를 기다릴 Flight, 아니면 이 호출이 실행할 (leader) Flight를 반환합니다.
+        key가 None이거나 합치기를 껐으면 항상 leader입니다.
+        """
+        # concurrent.futures는 logging을 함께 불러오므로 처음 쓸 때 가져옴 (llm 등의 import 시간에서 제외)
+        from concurrent.futures import Future
+        if key is None or not _enabled:
+            return Flight(self, key, Future(), leader=True)
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                return Flight(self, key, future, leader=False)
+            future = Future()
+            self._flights[key] = future
+            self.executed += 1
+            return Flight(self, key, future, leader=True)
+
+    def _land(self, key, future):
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def _shared(self):
+        with self._lock:
+            self.shared += 1
+        metrics.registry.observe_coalesced(self.name)
+
+    def run(self, key, fn):
+        """
+        key의 작업이 실행 중이면 그 결과를, 아니면 fn()을 실행한 결과를 반환합니다.
+        Returns:
+            (결과, 합쳐졌는지 여부)
+        """
+        while True:
+            flight = self.join(key)
+            if flight.leader:
+                return flight.run(fn), False
+            try:
+                return flight.wait(), True
+            except LeaderGone:
+                continue
+
+    async def arun(self, key, fn):
+        """run()의 asyncio 버전입니다. fn은 코루틴 함수입니다."""
+        while True:
+            flight = self.join(key)
+            if flight.leader:
+                return await flight.arun(fn), False
+            try:
+                return await flight.await_result(), True
+            except LeaderGone:
+                continue
+
+    def stats(self):
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared, "in_flight": len(self._flights)}
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+def group(name):
+    """이름에 해당하는 프로세스 공유 Group (없으면 만듦)"""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = Group(name)
+        return _groups[name]
+
+def stats():
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: g.stats() for name, g in groups.items()}
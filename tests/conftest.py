@@ -0,0 +1,25 @@
+# conftest.py
+"""
+테스트 공통 설정입니다. 저장소 최상위의 모듈을 import할 수 있게 하고,
+테스트마다 프로세스 전역 상태(스케줄러, 헤저, single-flight 설정)를 처음 상태로 되돌립니다.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hedging
+import scheduler
+import singleflight
+
+@pytest.fixture(autouse=True)
+def fresh_globals():
+    scheduler._scheduler = None
+    hedging._hedger = None
+    singleflight.configure(enabled=True)
+    yield
+    scheduler._scheduler = None
+    hedging._hedger = None
+    singleflight.configure(enabled=True)
@@ -0,0 +1,168 @@
+# test_hedging.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+import fake_llm
+import hedging
+import llm_client
+import scheduler
+
+WAIT = 10  # 초. 이벤트를 기다리는 최대 시간 (테스트가 멈추지 않도록 두는 한도일 뿐 동작은 시간에 의존하지 않음)
+
+def fake(**options):
+    return fake_llm.FakeBackend(time_scale=0, seed=1, **options)
+
+def warm(hedger, provider, kind="call"):
+    # 응답 시간 기록을 채워 첫 요청이 보내지는 즉시 헤징하게 함 (min_delay=0)
+    for _ in range(hedging.MIN_SAMPLES):
+        hedger.latency.record(f"{provider.name}|{kind}", 0.0)
+
+def wait_until(condition):
+    deadline = time.monotonic() + WAIT
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+class Attempts:
+    """llm_client처럼 track(fn)을 scheduler.call로 보내는 attempt. gates에 있는 역할은 문이 열릴 때까지 응답하지 않습니다."""
+    def __init__(self, gates=()):
+        self.gates = {role: threading.Event() for role in gates}
+        self.started = {role: threading.Event() for role in gates}
+
+    def __call__(self, provider, track):
+        def send():
+            if track.role in self.gates:
+                self.started[track.role].set()
+                assert self.gates[track.role].wait(WAIT)
+            return track.role, provider.backend.generate("사건", provider.model, 100, 0.8)
+        return scheduler.get_scheduler().call(track(send))
+
+    def release(self):
+        for gate in self.gates.values():
+            gate.set()
+
+def test_first_result_wins_and_loser_is_discarded():
+    scheduler.configure(requests_per_minute=100000, tokens_per_minute=10 ** 9)
+    primary, secondary = llm_client.Provider(fake(), "a"), llm_client.Provider(fake(), "b")
+    hedger = hedging.Hedger(min_delay=0)
+    warm(hedger, primary)
+    attempts = Attempts(gates=["primary"])
+    discarded = []
+    dropped = threading.Event()
+
+    def discard(result):
+        discarded.append(result)
+        dropped.set()
+
+    role, response = hedger.call(attempts, [primary, secondary], "call", discard=discard)
+    assert role == "hedge"
+    assert response.text
+    assert hedger.stats()["hedge_wins"] == 1
+
+    attempts.release()
+    assert dropped.wait(WAIT)
+    assert [role for role, _ in discarded] == ["primary"]
+
+def test_losing_hedge_does_not_take_a_slot():
+    # 슬롯이 하나뿐이면 헤징 요청은 슬롯을 기다리다가, 기본 요청이 이기면 보내지 않고 멈춤
+    request_scheduler = scheduler.configure(requests_per_minute=1, tokens_per_minute=10 ** 9)
+    primary, secondary = llm_client.Provider(fake(), "a"), llm_client.Provider(fake(), "b")
+    hedger = hedging.Hedger(min_delay=0)
+    warm(hedger, primary)
+    attempts = Attempts(gates=["primary"])
+    threading.Timer(0, lambda: (wait_until(lambda: request_scheduler.stats()["waiting"] == 1),
+                                attempts.release())).start()
+
+    role, _ = hedger.call(attempts, [primary, secondary], "call")
+    assert role == "primary"
+    assert hedger.hedges == 1
+    wait_until(lambda: request_scheduler.stats()["waiting"] == 0)
+    assert request_scheduler.stats()["calls"] == 1
+    assert secondary.backend.calls == 0
+
+def test_no_hedge_before_latency_is_known():
+    scheduler.configure(requests_per_minute=100000, tokens_per_minute=10 ** 9)
+    primary, secondary = llm_client.Provider(fake(), "a"), llm_client.Provider(fake(), "b")
+    hedger = hedging.Hedger(min_delay=0)
+
+    role, _ = hedger.call(Attempts(), [primary, secondary], "call")
+    assert role == "primary"
+    assert hedger.hedges == 0
+    assert secondary.backend.calls == 0
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_retryable_failure_fails_over(enabled):
+    scheduler.configure(requests_per_minute=100000, tokens_per_minute=10 ** 9, max_retries=0)
+    primary = llm_client.Provider(fake(error_rate=1.0, error_codes=(503,)), "a")
+    secondary = llm_client.Provider(fake(), "b")
+    hedger = hedging.Hedger(enabled=enabled, min_delay=60)
+    warm(hedger, primary)
+
+    role, response = hedger.call(Attempts(), [primary, secondary], "call")
+    assert role == "failover"
+    assert response.text
+    assert hedger.failovers == 1
+    assert primary.backend.calls == 1
+
+def test_permanent_failure_is_raised_without_failover():
+    scheduler.configure(requests_per_minute=100000, tokens_per_minute=10 ** 9)
+    primary = llm_client.Provider(fake(error_rate=1.0, error_codes=(400,)), "a")
+    secondary = llm_client.Provider(fake(), "b")
+    hedger = hedging.Hedger(enabled=False)
+
+    with pytest.raises(fake_llm.FakeAPIError):
+        hedger.call(Attempts(), [primary, secondary], "call")
+    assert secondary.backend.calls == 0
+
+def test_caller_cancellation_abandons_running_attempt():
+    scheduler.configure(requests_per_minute=100000, tokens_per_minute=10 ** 9)
+    primary = llm_client.Provider(fake(), "a")
+    hedger = hedging.Hedger(min_delay=60)
+    warm(hedger, primary)
+    attempts = Attempts(gates=["primary"])
+    discarded = threading.Event()
+    token = scheduler.CancelToken()
+    threading.Timer(0, lambda: (attempts.started["primary"].wait(WAIT), token.cancel())).start()
+
+    with pytest.raises(scheduler.Cancelled):
+        with scheduler.cancellation(token):
+            hedger.call(attempts, [primary, None], "call", discard=lambda result: discarded.set())
+    attempts.release()
+    assert discarded.wait(WAIT)
+
+def test_open_breaker_routes_to_secondary_first():
+    scheduler.configure(requests_per_minute=100000, tokens_per_minute=10 ** 9)
+    primary, secondary = llm_client.Provider(fake(), "a"), llm_client.Provider(fake(), "b")
+    hedger = hedging.Hedger(enabled=False, failure_threshold=2, cooldown=60)
+    hedger.breaker.failure(primary.name)
+    hedger.breaker.failure(primary.name)
+    assert hedger.breaker.open_names() == [primary.name]
+
+    role, _ = hedger.call(Attempts(), [primary, secondary], "call")
+    assert role == "failover"
+    assert primary.backend.calls == 0
+
+def test_acall_cancels_losing_task():
+    scheduler.configure(requests_per_minute=100000, tokens_per_minute=10 ** 9)
+    primary, secondary = llm_client.Provider(fake(), "a"), llm_client.Provider(fake(), "b")
+    hedger = hedging.Hedger(min_delay=0)
+    warm(hedger, primary)
+    cancelled = []
+
+    async def attempt(provider, track):
+        async def send():
+            if track.role == "primary":
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    cancelled.append(track.role)
+                    raise
+            return track.role, await provider.backend.agenerate("사건", provider.model, 100, 0.8)
+        return await scheduler.get_scheduler().call_async(track.awrap(send))
+
+    role, _ = asyncio.run(hedger.acall(attempt, [primary, secondary], "call"))
+    assert role == "hedge"
+    assert cancelled == ["primary"]
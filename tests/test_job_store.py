@@ -0,0 +1,108 @@
+# test_job_store.py
+import sqlite3
+
+import pytest
+
+import fake_llm
+import job_store
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+def event_text(index):
+    backend = fake_llm.FakeBackend(time_scale=0, output_tokens_mean=200)
+    return backend.generate(f"사건 {index}", "fake", 400, 0.8).text
+
+def test_jobs_are_paged_newest_first(path):
+    store = job_store.JobStore(path)
+    ids = [store.add(f"사건 {i}", f"본문 {i}") for i in range(250)]
+
+    pages = []
+    before = None
+    while True:
+        page = store.jobs(before=before, limit=100)
+        if not page:
+            break
+        pages.append([job["job_id"] for job in page])
+        before = page[-1]["job_id"]
+    assert [len(page) for page in pages] == [100, 100, 50]
+    assert sum(pages, []) == ids[::-1]
+
+def test_job_list_holds_snippet_and_get_holds_full_text(path):
+    store = job_store.JobStore(path)
+    text = event_text(0)
+    assert len(text) > job_store.SNIPPET_CHARS
+    job_id = store.add("사건", text)
+
+    assert store.jobs()[0]["text"] == text[:job_store.SNIPPET_CHARS]
+    assert store.get(job_id)["text"] == text
+    assert store.get(job_id + 1) is None
+
+def test_regenerated_page_moves_to_top_with_new_id(path):
+    store = job_store.JobStore(path)
+    first, second = store.add("가", "본문"), store.add("나", "본문")
+    a = store.finish(first, "완료", page_path="site/a.html")
+    b = store.finish(second, "완료", page_path="site/b.html")
+    again = store.finish(store.add("가", "본문"), "완료", page_path="site/a.html")
+
+    assert [r["path"] for r in store.results()] == ["site/a.html", "site/b.html"]
+    assert again["result_id"] > b["result_id"] > a["result_id"]
+    assert store.results(before=again["result_id"], limit=1)[0]["path"] == "site/b.html"
+    assert store.stats() == {"jobs": 3, "results": 2}
+
+def test_deleted_ids_are_not_reused(path):
+    store = job_store.JobStore(path)
+    job_id = store.add("사건", "본문")
+    result = store.finish(job_id, "완료", page_path="site/a.html")
+    # 가장 큰 id의 결과를 지운 뒤 같은 페이지를 다시 생성해도 새 id
+    again = store.finish(job_id, "완료", page_path="site/a.html")
+    assert again["result_id"] != result["result_id"]
+    store.close()
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+    store = job_store.JobStore(path)
+    assert store.add("다른 사건", "본문") != job_id
+
+def test_restart_marks_unfinished_jobs_interrupted(path):
+    store = job_store.JobStore(path)
+    done = store.add("끝남", "본문")
+    store.finish(done, "완료", page_path="site/a.html")
+    running = store.add("실행 중", "본문", state="실행 중")
+    queued = store.add("대기", "본문")
+    store.close()
+
+    store = job_store.JobStore(path)
+    assert store.mark_interrupted() == 2
+    assert store.get(running)["state"] == job_store.INTERRUPTED
+    assert store.get(queued)["state"] == job_store.INTERRUPTED
+    assert store.get(done)["state"] == "완료"
+    assert store.get(running)["finished_at"] is not None
+    assert store.mark_interrupted() == 0
+
+def test_legacy_tables_are_rebuilt_with_autoincrement(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (job_id INTEGER PRIMARY KEY, title TEXT NOT NULL, text TEXT NOT NULL,"
+            " state TEXT NOT NULL, progress TEXT NOT NULL DEFAULT '', page_path TEXT, error TEXT,"
+            " created_at REAL NOT NULL, finished_at REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE results (result_id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, title TEXT NOT NULL,"
+            " job_id INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO jobs (title, text, state, created_at) VALUES ('사건', '본문', '대기', 1.0)")
+        conn.execute("INSERT INTO results (path, title, job_id, updated_at) VALUES ('site/a.html', '사건', 1, 1.0)")
+
+    store = job_store.JobStore(path)
+    assert store.get(1)["title"] == "사건"
+    assert store.results()[0]["path"] == "site/a.html"
+    assert store.mark_interrupted() == 1
+    store.close()
+    with sqlite3.connect(path) as conn:
+        tables = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'"))
+        indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert "AUTOINCREMENT" in tables["jobs"] and "AUTOINCREMENT" in tables["results"]
+    assert not any(name.endswith("_old") for name in tables)
+    assert "jobs_unfinished" in indexes
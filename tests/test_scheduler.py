@@ -0,0 +1,156 @@
+# test_scheduler.py
+import threading
+import time
+
+import pytest
+
+import fake_llm
+import scheduler
+
+WAIT = 10  # 초. 스레드를 기다리는 최대 시간 (테스트가 멈추지 않도록 두는 한도)
+
+def unlimited(**options):
+    return scheduler.RequestScheduler(requests_per_minute=100000, tokens_per_minute=10 ** 9, base_delay=0, **options)
+
+def wait_until(condition):
+    deadline = time.monotonic() + WAIT
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def generate(backend):
+    return lambda: backend.generate("사건", "fake", 100, 0.8)
+
+class Flaky:
+    """처음 failures번은 code 오류를 내고 그 뒤로는 backend로 응답합니다."""
+    def __init__(self, failures, code=503):
+        self.backend = fake_llm.FakeBackend(time_scale=0, seed=1)
+        self.failures = failures
+        self.code = code
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise fake_llm.FakeAPIError(self.code, "injected error")
+        return self.backend.generate("사건", "fake", 100, 0.8)
+
+def test_retryable_errors_are_retried():
+    request_scheduler = unlimited(max_retries=3)
+    fn = Flaky(failures=2)
+    retries = []
+
+    response = request_scheduler.call(fn, on_retry=lambda attempt, error, delay: retries.append(attempt))
+    assert response.text
+    assert fn.calls == 3
+    assert retries == [1, 2]
+    assert request_scheduler.stats()["retries"] == 2
+
+def test_gives_up_after_max_retries():
+    request_scheduler = unlimited(max_retries=2)
+    backend = fake_llm.FakeBackend(time_scale=0, error_rate=1.0, error_codes=(429,))
+
+    with pytest.raises(fake_llm.FakeAPIError):
+        request_scheduler.call(generate(backend))
+    assert backend.calls == 3
+
+def test_permanent_error_is_not_retried():
+    request_scheduler = unlimited(max_retries=3)
+    fn = Flaky(failures=1, code=400)
+
+    with pytest.raises(fake_llm.FakeAPIError):
+        request_scheduler.call(fn)
+    assert fn.calls == 1
+
+@pytest.mark.parametrize("error, retryable", [
+    (fake_llm.FakeAPIError(429, "quota"), True),
+    (fake_llm.FakeAPIError(503, "unavailable"), True),
+    (fake_llm.FakeAPIError(400, "bad request"), False),
+    (ConnectionError("reset"), True),
+    (type("ReadTimeout", (Exception,), {})("timeout"), True),
+    (ValueError("bad"), False),
+])
+def test_is_retryable(error, retryable):
+    assert scheduler.is_retryable(error) is retryable
+
+def test_backoff_is_capped_and_honors_retry_delay():
+    request_scheduler = scheduler.RequestScheduler(base_delay=1.0, max_delay=4.0)
+    error = fake_llm.FakeAPIError(503, "unavailable")
+    for attempt in range(6):
+        assert 0 <= request_scheduler.backoff_delay(attempt, error) <= min(4.0, 2 ** attempt)
+    quota = fake_llm.FakeAPIError(429, "{'retryDelay': '7s'}")
+    assert request_scheduler.backoff_delay(0, quota) >= 7
+
+def test_cancelled_before_call_does_not_send():
+    request_scheduler = unlimited()
+    backend = fake_llm.FakeBackend(time_scale=0)
+    token = scheduler.CancelToken()
+    token.cancel()
+
+    with pytest.raises(scheduler.Cancelled):
+        with scheduler.cancellation(token):
+            request_scheduler.call(generate(backend))
+    assert backend.calls == 0
+
+def test_cancel_interrupts_retry_wait():
+    # 백오프가 길어도 재시도를 기다리는 중에 취소하면 바로 Cancelled
+    request_scheduler = scheduler.RequestScheduler(requests_per_minute=100000, base_delay=3600, max_delay=3600)
+    fn = Flaky(failures=1)
+    token = scheduler.CancelToken()
+
+    with pytest.raises(scheduler.Cancelled):
+        with scheduler.cancellation(token):
+            request_scheduler.call(fn, on_retry=lambda attempt, error, delay: token.cancel())
+    assert fn.calls == 1
+
+def test_cancel_interrupts_slot_wait():
+    request_scheduler = scheduler.RequestScheduler(requests_per_minute=1)
+    request_scheduler.acquire()
+    backend = fake_llm.FakeBackend(time_scale=0)
+    token = scheduler.CancelToken()
+    outcome = {}
+
+    def run():
+        try:
+            with scheduler.cancellation(token):
+                request_scheduler.call(generate(backend))
+        except scheduler.Cancelled as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    wait_until(lambda: request_scheduler.stats()["waiting"] == 1)
+    token.cancel()
+    thread.join(WAIT)
+
+    assert isinstance(outcome.get("error"), scheduler.Cancelled)
+    assert request_scheduler.stats()["waiting"] == 0
+    assert backend.calls == 0
+
+def test_interactive_priority_goes_first():
+    request_scheduler = scheduler.RequestScheduler(requests_per_minute=1)
+    request_scheduler.acquire()
+    order = []
+    threads = []
+
+    def run(level, name):
+        with scheduler.priority(level):
+            request_scheduler.acquire()
+        order.append(name)
+
+    for level, name in ((scheduler.PRIORITY_BATCH, "batch"), (scheduler.PRIORITY_INTERACTIVE, "gui")):
+        threads.append(threading.Thread(target=run, args=(level, name), daemon=True))
+        threads[-1].start()
+        wait_until(lambda: request_scheduler.stats()["waiting"] == len(threads))
+    # 슬롯을 하나씩 채워 대기 중인 호출을 차례로 내보냄
+    for released in (1, 2):
+        with request_scheduler._cond:
+            request_scheduler.requests.tokens = 1.0
+            request_scheduler._notify()
+        wait_until(lambda: len(order) == released)
+    assert order == ["gui", "batch"]
+
+def test_configure_keeps_scheduler_with_same_limits():
+    first = scheduler.configure(requests_per_minute=30)
+    assert scheduler.configure(requests_per_minute=30) is first
+    assert scheduler.configure(requests_per_minute=60) is not first
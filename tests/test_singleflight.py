@@ -0,0 +1,144 @@
+# test_singleflight.py
+import asyncio
+import threading
+import unicodedata
+
+import pytest
+
+import fake_llm
+import scheduler
+import singleflight
+
+WAIT = 10  # 초. 스레드를 기다리는 최대 시간 (테스트가 멈추지 않도록 두는 한도)
+
+def generate(backend, prompt):
+    return backend.generate(prompt, "fake", 100, 0.8).text
+
+def spy_joins(group, monkeypatch):
+    """group.join()이 leader가 아닌 Flight를 반환할 때마다 set되는 이벤트"""
+    joined = threading.Event()
+    join = group.join
+
+    def spy(key):
+        flight = join(key)
+        if not flight.leader:
+            joined.set()
+        return flight
+
+    monkeypatch.setattr(group, "join", spy)
+    return joined
+
+def run_in_thread(fn, *args):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["value"] = fn(*args)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, outcome
+
+def test_make_key_normalizes_text():
+    decomposed = unicodedata.normalize("NFD", "가")
+    assert singleflight.make_key(" 가 ", 1) == singleflight.make_key(decomposed, 1)
+    assert singleflight.make_key("가", 1) != singleflight.make_key("가", 2)
+
+def test_waiters_share_leader_result():
+    backend = fake_llm.FakeBackend(time_scale=0, seed=1)
+    group = singleflight.Group("test")
+    leader = group.join("k")
+    waiters = [group.join("k") for _ in range(3)]
+    assert leader.leader and not any(w.leader for w in waiters)
+
+    results = [run_in_thread(w.wait) for w in waiters]
+    expected = leader.run(lambda: generate(backend, "사건"))
+    for thread, outcome in results:
+        thread.join(WAIT)
+        assert outcome == {"value": expected}
+    assert backend.calls == 1
+    assert group.stats() == {"executed": 1, "shared": 3, "in_flight": 0}
+
+def test_leader_error_is_shared():
+    backend = fake_llm.FakeBackend(time_scale=0, error_rate=1.0, error_codes=(400,))
+    group = singleflight.Group("test")
+    leader, waiter = group.join("k"), group.join("k")
+
+    with pytest.raises(fake_llm.FakeAPIError):
+        leader.run(lambda: generate(backend, "사건"))
+    with pytest.raises(fake_llm.FakeAPIError):
+        waiter.wait()
+    assert backend.calls == 1
+
+def test_cancelled_leader_raises_leader_gone():
+    group = singleflight.Group("test")
+    leader, waiter = group.join("k"), group.join("k")
+    leader.reject(scheduler.Cancelled("작업이 취소되었습니다."))
+
+    with pytest.raises(singleflight.LeaderGone):
+        waiter.wait()
+    assert group.join("k").leader
+
+def test_waiter_is_promoted_when_leader_is_cancelled(monkeypatch):
+    backend = fake_llm.FakeBackend(time_scale=0, seed=1)
+    group = singleflight.Group("test")
+    joined = spy_joins(group, monkeypatch)
+    started, release = threading.Event(), threading.Event()
+    token = scheduler.CancelToken()
+
+    def leader_call():
+        started.set()
+        assert release.wait(WAIT)
+        scheduler.check_cancelled()
+        return generate(backend, "사건")
+
+    def cancelled_leader():
+        with scheduler.cancellation(token):
+            return group.run("k", leader_call)
+
+    leader_thread, leader_outcome = run_in_thread(cancelled_leader)
+    assert started.wait(WAIT)
+    waiter_thread, waiter_outcome = run_in_thread(group.run, "k", lambda: generate(backend, "사건"))
+    assert joined.wait(WAIT)
+    token.cancel()
+    release.set()
+
+    leader_thread.join(WAIT)
+    waiter_thread.join(WAIT)
+    assert isinstance(leader_outcome["error"], scheduler.Cancelled)
+    # 기다리던 호출이 새 leader가 되어 직접 실행함
+    assert waiter_outcome["value"] == (generate(backend, "사건"), False)
+    assert group.stats() == {"executed": 2, "shared": 0, "in_flight": 0}
+
+def test_cancelled_waiter_leaves_leader_running():
+    group = singleflight.Group("test")
+    leader, waiter = group.join("k"), group.join("k")
+    token = scheduler.CancelToken()
+    token.cancel()
+
+    with pytest.raises(scheduler.Cancelled):
+        with scheduler.cancellation(token):
+            waiter.wait()
+    assert group.stats()["in_flight"] == 1
+    leader.resolve("done")
+    assert group.stats()["in_flight"] == 0
+
+def test_async_waiter_shares_thread_leader():
+    group = singleflight.Group("test")
+    leader, waiter = group.join("k"), group.join("k")
+
+    async def main():
+        task = asyncio.ensure_future(waiter.await_result())
+        await asyncio.sleep(0)
+        leader.resolve("value")
+        return await task
+
+    assert asyncio.run(main()) == "value"
+
+def test_disabled_always_leads():
+    singleflight.configure(enabled=False)
+    group = singleflight.Group("test")
+    assert group.join("k").leader and group.join("k").leader
+    assert group.stats()["in_flight"] == 0
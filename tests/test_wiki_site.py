@@ -0,0 +1,60 @@
+# test_wiki_site.py
+import hashlib
+import json
+import os
+
+import pytest
+
+import fake_llm
+import llm
+import search_index
+import wiki_site
+
+def articles(title):
+    backend = fake_llm.FakeBackend(time_scale=0, output_tokens_mean=80)
+    return {category: backend.generate(f"{title} {category}", "fake", 200, 0.8).text for category in llm.CATEGORIES}
+
+def digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+@pytest.mark.parametrize("name", sorted(wiki_site.RESERVED_SLUGS))
+def test_reserved_names_are_hashed(name):
+    slug = wiki_site.slugify(name)
+    assert slug == f"{name}-{digest(name)}"
+    assert slug not in wiki_site.RESERVED_SLUGS
+    assert wiki_site.slugify(slug) == slug
+
+def test_windows_device_names_are_hashed_in_any_case():
+    assert wiki_site.slugify("CON") == f"con-{digest('CON')}"
+    assert wiki_site.slugify("Com1") == f"com1-{digest('Com1')}"
+
+def test_safe_slug_is_kept():
+    assert wiki_site.slugify("battle-of-1066") == "battle-of-1066"
+    assert wiki_site.slugify("indexes") == "indexes"
+
+def test_titles_differing_in_case_do_not_collide():
+    assert wiki_site.slugify("Index") != wiki_site.slugify("index")
+    assert wiki_site.slugify("가상의 전쟁") == f"가상의-전쟁-{digest('가상의 전쟁')}"
+
+def test_build_site_migrates_reserved_slug(tmp_path):
+    # 이전 버전은 "index"라는 제목의 글을 index.html에 써서 문서 목록을 덮어썼음
+    site = str(tmp_path / "site")
+    title = "index"
+    wiki_site.publish(site, title, title, "사건 설명", {}, articles(title))
+    assert os.path.exists(wiki_site.data_path(site, "index"))
+
+    assert wiki_site.build_site(site, workers=1) == 1
+    slug = wiki_site.slugify(title)
+    assert wiki_site.stored_slugs(site) == [slug]
+    assert wiki_site.load_article(site, slug)["slug"] == slug
+    assert os.path.exists(wiki_site.page_path(site, slug))
+    with open(os.path.join(site, wiki_site.MANIFEST), encoding="utf-8") as f:
+        assert list(json.load(f)) == [slug]
+    with open(os.path.join(site, wiki_site.INDEX), encoding="utf-8") as f:
+        assert f"{slug}.html" in f.read()
+    found = search_index.search(site, title)
+    assert [(hit["slug"], hit["path"]) for hit in found] == [(slug, wiki_site.page_path(site, slug))]
+
+    # 한 번 옮긴 글은 다시 옮기지 않음
+    assert wiki_site.build_site(site, workers=1) == 1
+    assert wiki_site.stored_slugs(site) == [slug]
@@ -0,0 +1,124 @@
+# token_budget.py
+"""
+카테고리별 출력 토큰 예산입니다.
+
+지난 응답의 출력 토큰 수를 카테고리별로 최근 WINDOW개까지 기억해 두고, 그 PERCENTILE 분위수에
+HEADROOM만큼 여유를 더한 값을 다음 요청의 max_output_tokens로 씁니다 (설정한 max_tokens를 넘지 않음).
+예산보다 긴 응답은 MAX_TOKENS로 끊기지만 llm_client가 나머지를 이어쓰기로 받아 붙이므로 내용이 잘리지 않습니다.
+기록은 JSON 파일(cache/token_budget.json)에 저장되어 다음 실행에도 이어집니다.
+"""
+import json
+import math
+import os
+import threading
+
+DEFAULT_BUDGET_PATH = os.path.join("cache", "token_budget.json")
+WINDOW = 50          # 카테고리별로 기억하는 최근 응답 수
+MIN_SAMPLES = 5      # 이보다 기록이 적으면 설정한 max_tokens를 그대로 사용
+PERCENTILE = 90
+HEADROOM = 1.25
+MIN_BUDGET = 512
+ROUND_TO = 256       # 예산이 조금씩 흔들리지 않도록 이 단위로 올림
+
+class TokenBudget:
+    """
+    {키(카테고리): [최근 출력 토큰 수, ...]}를 보관합니다. 여러 스레드에서 공유할 수 있습니다.
+    """
+    def __init__(self, path=DEFAULT_BUDGET_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._samples = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._samples = {key: list(values)[-WINDOW:] for key, values in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    @staticmethod
+    def _estimate(samples):
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, math.ceil(PERCENTILE / 100 * len(ordered)) - 1)]
+        budget = math.ceil(value * HEADROOM / ROUND_TO) * ROUND_TO
+        return max(MIN_BUDGET, budget)
+
+    def budget(self, key, limit):
+        """key의 다음 요청에 쓸 max_output_tokens. 기록이 부족하면 limit."""
+        with self._lock:
+            samples = self._samples.get(key, [])
+            if len(samples) < MIN_SAMPLES:
+                return limit
+            return min(limit, self._estimate(samples))
+
+    def record(self, key, output_tokens):
+        """실제로 생성된 응답 전체(이어쓰기 포함)의 출력 토큰 수를 기록합니다."""
+        if not output_tokens:
+            return
+        with self._lock:
+            samples = self._samples.setdefault(key, [])
+            samples.append(int(output_tokens))
+            del samples[:-WINDOW]
+            self._save_locked()
+
+    def _save_locked(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._samples, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print("토큰 예산 저장 실패:", e)
+
+    def stats(self, limit=8192):
+        """카테고리별 기록 수, 평균 출력 토큰 수, 현재 예산"""
+        with self._lock:
+            items = {key: list(samples) for key, samples in self._samples.items()}
+        return {
+            key: {
+                "samples": len(samples),
+                "mean": round(sum(samples) / len(samples)) if samples else 0,
+                "budget": min(limit, self._estimate(samples)) if len(samples) >= MIN_SAMPLES else limit,
+            }
+            for key, samples in items.items()
+        }
+
+# 프로세스 전역 설정 (설정 패널의 "토큰 예산 자동 조절"과 연결)
+_budget = None
+_budget_lock = threading.Lock()
+_enabled = True
+_options = {}
+
+def configure(enabled=True, **options):
+    """
+    enabled=False이면 항상 설정한 max_tokens로 요청하고 기록하지 않습니다.
+    options(path)가 바뀌면 다음 호출 때 기록을 다시 불러옵니다.
+    """
+    global _enabled, _options, _budget
+    with _budget_lock:
+        _enabled = enabled
+        if options != _options:
+            _options = options
+            _budget = None
+
+def get_budget():
+    """현재 설정의 공유 TokenBudget을 반환합니다. 꺼져 있으면 None."""
+    global _budget
+    if not _enabled:
+        return None
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = TokenBudget(**_options)
+    return _budget
+
+def request_tokens(key, limit):
+    """key(카테고리)의 요청에 쓸 max_output_tokens. 예산이 꺼져 있거나 key가 없으면 limit."""
+    budget = get_budget() if key else None
+    return budget.budget(key, limit) if budget is not None else limit
+
+def record(key, output_tokens):
+    budget = get_budget() if key else None
+    if budget is not None:
+        budget.record(key, output_tokens)
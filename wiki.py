@@ -1,5 +1,123 @@
 # wiki.py
+import gzip
+import hashlib
+import html
+import os
 import re
+import threading
+import time
+
+# 본문 마크업 토큰: [강조], (주석), 개행. 토큰 사이의 일반 텍스트는 HTML 이스케이프만 합니다.
+_MARKUP_RE = re.compile(r'\[([^\]]+)\]|\(([^)]+)\)|\n')
+
+_HIGHLIGHT_RE = re.compile(r'\[([^\]]+)\]')
+
+HIGHLIGHT_OPEN = '<span style="color:#00aaff;">'
+HIGHLIGHT_CLOSE = '</span>'
+_HIGHLIGHT_REPL = HIGHLIGHT_OPEN + r'\1' + HIGHLIGHT_CLOSE
+
+# 렌더러 출력 형식이 바뀌면 올려서, 저장된 섹션 조각(section_cache)을 무효화합니다.
+RENDER_VERSION = 1
+
+# (섹션 id, 제목, 본문을 찾을 카테고리 키들)
+SECTIONS = [
+    ("개요", "1. 개요", ("개요",)),
+    ("배경", "2. 배경", ("배경",)),
+    ("전개", "3. 전개", ("전개/경과", "전개")),
+    ("결과", "4. 결과", ("결과",)),
+    ("영향", "5. 영향", ("영향",)),
+    ("여담", "6. 여담", ("여담",)),
+    ("대중매체", "7. 대중 매체에서의 {event_title}", ("대중 매체에서 다루는 이 사건",)),
+]
+
+WIKI_CSS = """\
+body {
+  font-family: 'Noto Sans KR', sans-serif;
+  background-color: #ffffff;
+  color: #333;
+  margin: 0;
+  padding: 0;
+  line-height: 1.6;
+}
+.container {
+  max-width: 800px;
+  margin: 0 auto;
+  padding: 20px;
+}
+header {
+  background-color: #2e7d32;
+  color: #fff;
+  padding: 20px;
+  text-align: center;
+}
+header h1 {
+  margin: 0;
+  font-size: 32px;
+}
+.sub-title {
+  text-align: center;
+  font-size: 26px;
+  margin: 20px 0;
+  color: #333;
+  background-color: #ffffff;
+  padding: 10px;
+  border: 1px solid #ccc;
+}
+.toc {
+  padding: 10px;
+  margin: 20px 0;
+  border-bottom: 1px solid #ccc;
+}
+.toc ul {
+  list-style: none;
+  padding-left: 0;
+}
+.toc li {
+  margin-bottom: 8px;
+}
+.toc a {
+  color: #007acc;
+  text-decoration: none;
+  font-weight: bold;
+}
+section {
+  margin-bottom: 30px;
+  padding: 20px;
+  border: 1px solid #81c784;
+  border-radius: 4px;
+  background-color: #ffffff;
+}
+section h2 {
+  margin-bottom: 15px;
+  border-bottom: 1px solid #c8e6c9;
+  padding-bottom: 5px;
+}
+.footnotes {
+  font-size: 14px;
+  color: #555;
+  border-top: 1px solid #ccc;
+  padding-top: 10px;
+}
+.footnotes ol {
+  padding-left: 20px;
+}
+footer {
+  text-align: center;
+  font-size: 14px;
+  color: #555;
+  margin-top: 30px;
+  padding: 20px;
+  border-top: 1px solid #ccc;
+}
+.nav {
+  text-align: right;
+  font-size: 14px;
+}
+.nav a {
+  color: #007acc;
+  text-decoration: none;
+}
+"""
 
 def process_text_for_wiki(text, start_counter=1):
     """
@@ -7,18 +125,27 @@ def process_text_for_wiki(text, start_counter=1):
     소괄호 내 주석은 각주로 변환합니다.
     각주는 <a> 태그를 사용하여, 마우스 오버 시 주석 내용을 툴팁(title 속성)으로 표시하고,
     고유 id("footnotemark-{n}")를 부여하여 하단 각주로부터 돌아갈 수 있도록 합니다.
+    텍스트를 먼저 통째로 HTML 이스케이프한 뒤(괄호와 개행은 그대로 남음), 미리 컴파일한 패턴 하나로
+    강조 / 각주 / 개행(<br/>)을 한 번의 스캔으로 변환합니다. 강조 안의 주석도 각주가 됩니다.
     
     Returns:
         processed: 변환된 본문 텍스트
-        footnotes: [(번호, 주석 내용), ...]
+        footnotes: [(번호, 주석 내용), ...] (주석 내용은 HTML 이스케이프된 상태)
         counter: 최종 증가한 번호
     """
     footnotes = []
     counter = start_counter
 
-    def replace_comment(match):
+    def render(match):
         nonlocal counter
-        comment = match.group(1)
+        highlight = match.group(1)
+        if highlight is not None:
+            if "(" in highlight or "\n" in highlight:
+                highlight = _MARKUP_RE.sub(render, highlight)
+            return HIGHLIGHT_OPEN + highlight + HIGHLIGHT_CLOSE
+        comment = match.group(2)
+        if comment is None:
+            return "<br/>"
         footnotes.append((counter, comment))
         replacement = (f'<a href="#footnote-{counter}" id="footnotemark-{counter}" '
                        f'style="text-decoration:none; color:#00aaff;" title="{comment}">'
@@ -26,18 +153,143 @@ def process_text_for_wiki(text, start_counter=1):
         counter += 1
         return replacement
 
-    # 대괄호 [] 내 텍스트 -> 하늘색 (#00aaff) 텍스트, bold 효과 없이
-    processed = re.sub(r'\[([^\]]+)\]', r'<span style="color:#00aaff;">\1</span>', text)
-    # 소괄호 () 내 주석 -> 각주 처리 (위의 replace_comment 함수 사용)
-    processed = re.sub(r'\(([^)]+)\)', replace_comment, processed)
+    processed = _MARKUP_RE.sub(render, html.escape(text))
+    return processed, footnotes, counter
 
+def render_section(sec_id, content, start_counter, section_cache=None):
+    """
+    섹션 본문 하나를 변환하여 (HTML, 각주 리스트, 다음 각주 번호)를 반환합니다.
+    section_cache({섹션 id: 조각})가 주어지면 본문과 시작 각주 번호가 지난번과 같은 섹션은 저장된 조각을 그대로 쓰고,
+    바뀐 섹션만 다시 변환하여 캐시를 갱신합니다. 앞 섹션의 각주 수가 바뀌면 뒤 섹션은 번호를 맞추기 위해 다시 변환됩니다.
+    """
+    if section_cache is None:
+        return process_text_for_wiki(content, start_counter=start_counter)
+    key = hashlib.sha1(f"{RENDER_VERSION}\n{start_counter}\n{content}".encode("utf-8")).hexdigest()
+    entry = section_cache.get(sec_id)
+    if entry and entry["key"] == key:
+        return entry["html"], entry["footnotes"], entry["counter"]
+    processed, footnotes, counter = process_text_for_wiki(content, start_counter=start_counter)
+    section_cache[sec_id] = {"key": key, "html": processed, "footnotes": footnotes, "counter": counter}
     return processed, footnotes, counter
 
-def generate_wiki_html(event_title, original_text, detailed_articles, output_file="wiki.html"):
+def _section_content(articles, keys):
+    for key in keys:
+        if key in articles:
+            return articles[key]
+    return ""
+
+def _page_head(title, in_progress, stylesheet_href):
+    parts = ['<!DOCTYPE html>\n<html lang="ko">\n<head>\n  <meta charset="UTF-8">\n'
+             '  <meta name="viewport" content="width=device-width, initial-scale=1.0">\n']
+    if in_progress:
+        parts.append('  <meta http-equiv="refresh" content="2">\n')
+    parts.append(f'  <title>{title} - 생성형 위키</title>\n')
+    if stylesheet_href:
+        # 사이트 출력: 모든 페이지가 같은 외부 스타일시트를 공유
+        parts.append(f'  <link rel="stylesheet" href="{html.escape(stylesheet_href)}">\n')
+    else:
+        parts.append(f'  <style>\n{WIKI_CSS}  </style>\n')
+    parts.append('</head>\n<body>\n  <div class="container">\n'
+                 '    <header>\n      <h1>생성형 위키</h1>\n    </header>\n')
+    return parts
+
+def _page_footer():
+    return ('    <footer>\n      <p>© 2025 생성형 위키. All rights reserved.</p>\n    </footer>\n'
+            '  </div>\n</body>\n</html>\n')
+
+def render_wiki_page(event_title, detailed_articles, in_progress=False, stylesheet_href=None, index_href=None,
+                     section_cache=None):
+    """
+    위키 페이지 전체를 HTML 조각 리스트로 만듭니다. (문자열 += 연결 없이 마지막에 한 번만 join/write)
+    stylesheet_href가 주어지면 CSS를 인라인으로 넣지 않고 해당 스타일시트를 링크하며,
+    index_href가 주어지면 문서 목록으로 가는 링크를 표시합니다.
+    section_cache가 주어지면 바뀐 섹션만 다시 변환합니다 (render_section 참고).
+    """
+    title = html.escape(event_title)
+    sections = [(sec_id, heading.format(event_title=title), _section_content(detailed_articles, keys))
+                for sec_id, heading, keys in SECTIONS]
+    parts = _page_head(title, in_progress, stylesheet_href)
+    append = parts.append
+    if index_href:
+        append(f'    <div class="nav"><a href="{html.escape(index_href)}">전체 문서</a></div>\n')
+    append(f'    <div class="sub-title">{title}</div>\n')
+    
+    append('    <div class="toc">\n      <h2>목차</h2>\n      <ul>\n')
+    for sec_id, heading, _ in sections:
+        append(f'        <li><a href="#{sec_id}" style="color:#007acc; text-decoration:none;">{heading}</a></li>\n')
+    append('      </ul>\n    </div>\n')
+    
+    all_footnotes = []
+    counter = 1
+    for sec_id, heading, content in sections:
+        processed, footnotes, counter = render_section(sec_id, content, counter, section_cache)
+        all_footnotes.extend(footnotes)
+        append(f'    <section id="{sec_id}">\n      <h2>{heading}</h2>\n      <p>{processed}</p>\n    </section>\n')
+    
+    if all_footnotes:
+        append("    <div class='footnotes'><h2>각주</h2><ol>")
+        for idx, note in all_footnotes:
+            # 각주 항목에 원래 footnote 마커로 돌아가는 링크를 추가
+            # 주석 내용은 이미 이스케이프되어 있고 닫는 소괄호가 없으므로 강조만 변환합니다.
+            if "[" in note:
+                note = _HIGHLIGHT_RE.sub(_HIGHLIGHT_REPL, note)
+            append(f'<li id="footnote-{idx}"><a href="#footnotemark-{idx}" style="text-decoration:none; color:#00aaff;">[{idx}]</a> {note}</li>')
+        append("</ol></div>\n")
+    
+    append(_page_footer())
+    return parts
+
+def render_index_page(entries, stylesheet_href=None):
+    """
+    문서 목록 페이지를 HTML 조각 리스트로 만듭니다.
+    entries: [(제목, 링크), ...] (표시 순서대로)
+    """
+    parts = _page_head("전체 문서", False, stylesheet_href)
+    append = parts.append
+    append(f'    <div class="sub-title">전체 문서 ({len(entries)})</div>\n'
+           '    <div class="toc">\n      <ul>\n')
+    for title, href in entries:
+        append(f'        <li><a href="{html.escape(href)}">{html.escape(title)}</a></li>\n')
+    append('      </ul>\n    </div>\n')
+    append(_page_footer())
+    return parts
+
+# Windows에서는 다른 스레드/프로세스(wiki_server, 브라우저)가 대상 파일을 읽는 순간 os.replace가
+# PermissionError로 실패하므로, 잠깐 기다렸다가 다시 시도합니다.
+REPLACE_RETRIES = 10
+REPLACE_RETRY_DELAY = 0.02
+
+def _replace(src, dst):
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(REPLACE_RETRY_DELAY)
+
+def write_atomic(path, text, precompress=False):
+    """
+    임시 파일에 쓴 뒤 교체하여, 읽는 쪽(브라우저, 다른 프로세스)이 반쯤 쓰인 파일을 보지 않게 합니다.
+    precompress=True이면 gzip으로 압축한 <path>.gz도 같은 방식으로 써 둡니다 (wiki_server가 요청마다 압축하지 않고 보냄).
+    .gz는 원본을 교체한 뒤에 쓰므로, 원본보다 수정 시각이 이른 .gz는 아직 갱신되지 않은 것입니다.
+    """
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    _replace(tmp_file, path)
+    if precompress:
+        with open(tmp_file, "wb") as f:
+            f.write(gzip.compress(text.encode("utf-8"), compresslevel=9, mtime=0))
+        _replace(tmp_file, path + ".gz")
+
+def generate_wiki_html(event_title, original_text, detailed_articles, output_file="wiki.html", in_progress=False,
+                       stylesheet_href=None, index_href=None, section_cache=None, precompress=False):
     """
     event_title: 사건의 제목
     original_text: 원본 텍스트 (옵션)
-    detailed_articles: 딕셔너리, 키: "개요", "배경", "전개/경과"(전개), "결과", "영향", "여담", "대중 매체"
+    detailed_articles: 딕셔너리, 키: "개요", "배경", "전개/경과"(전개), "결과", "영향", "여담", "대중 매체에서 다루는 이 사건"
     
     - 최상단 헤더는 초록색 배경의 "생성형 위키" 타이틀.
     - 그 아래 별도의 영역에 event_title이 표시됩니다.
@@ -45,167 +297,64 @@ def generate_wiki_html(event_title, original_text, detailed_articles, output_fil
     - 각 섹션은 번호가 붙으며, "전개/경과"는 "전개", "대중 매체"는 "대중 매체에서의 {event_title}"로 표시됩니다.
     - 본문 내 대괄호는 하늘색(#00aaff) 텍스트로, 소괄호 주석은 각주 마커로 변환되며, 마우스 오버 시 툴팁으로 주석 내용을 확인할 수 있습니다.
     - 하단 각주 목록의 각 항목은 원래 각주 마커로 돌아가는 링크를 포함합니다.
+    - in_progress=True이면 생성 중인 페이지로 보고, 브라우저가 2초마다 새로고침하도록 합니다.
+    - 파일은 임시 파일에 쓴 뒤 교체하므로, 브라우저가 반쯤 쓰인 파일을 읽지 않습니다.
+    - stylesheet_href / index_href: 사이트 출력(wiki_site)에서 공유 스타일시트와 문서 목록 링크를 지정합니다.
+    - section_cache: 이전 렌더링의 섹션 조각. 주어지면 바뀐 섹션만 다시 변환하고 캐시를 갱신합니다.
+    - precompress: gzip으로 압축한 <output_file>.gz도 함께 씁니다 (write_atomic).
     """
-    # "전개/경과" 키가 있다면 "전개"로 대체
-    articles = detailed_articles.copy()
-    if "전개/경과" in articles:
-        articles["전개"] = articles.pop("전개/경과")
-    
-    sections = [
-        ("1. 개요", articles.get("개요", "")),
-        ("2. 배경", articles.get("배경", "")),
-        ("3. 전개", articles.get("전개", "")),
-        ("4. 결과", articles.get("결과", "")),
-        ("5. 영향", articles.get("영향", "")),
-        ("6. 여담", articles.get("여담", "")),
-        (f"7. 대중 매체에서의 {event_title}", articles.get("대중 매체에서 다루는 이 사건", ""))
-    ]
-    
-    section_html = ""
-    all_footnotes = []
-    current_counter = 1
-    for title, content in sections:
-        processed_content, footnotes, current_counter = process_text_for_wiki(content, start_counter=current_counter)
-        processed_content = processed_content.replace("\n", "<br/>")
-        all_footnotes.extend(footnotes)
-        # 섹션 id: 제목의 번호와 한글 부분을 조합 (공백 제거)
-        sec_id = title.split()[1] if len(title.split()) > 1 else title.replace(".", "")
-        section_html += f"""
-    <section id="{sec_id}">
-      <h2>{title}</h2>
-      <p>{processed_content}</p>
-    </section>
+    html_text = "".join(render_wiki_page(event_title, detailed_articles, in_progress=in_progress,
+                                         stylesheet_href=stylesheet_href, index_href=index_href,
+                                         section_cache=section_cache))
+    write_atomic(output_file, html_text, precompress=precompress)
+    return html_text
+
+async def agenerate_wiki_html(event_title, original_text, detailed_articles, output_file="wiki.html", in_progress=False,
+                              stylesheet_href=None, index_href=None, section_cache=None, precompress=False):
     """
-    
-    toc_html = f"""
-    <div class="toc">
-      <h2>목차</h2>
-      <ul>
-        <li><a href="#개요" style="color:#007acc; text-decoration:none;">1. 개요</a></li>
-        <li><a href="#배경" style="color:#007acc; text-decoration:none;">2. 배경</a></li>
-        <li><a href="#전개" style="color:#007acc; text-decoration:none;">3. 전개</a></li>
-        <li><a href="#결과" style="color:#007acc; text-decoration:none;">4. 결과</a></li>
-        <li><a href="#영향" style="color:#007acc; text-decoration:none;">5. 영향</a></li>
-        <li><a href="#여담" style="color:#007acc; text-decoration:none;">6. 여담</a></li>
-        <li><a href="#대중매체" style="color:#007acc; text-decoration:none;">7. 대중 매체에서의 {event_title}</a></li>
-      </ul>
-    </div>
+    generate_wiki_html의 asyncio 버전입니다. 렌더링은 현재 루프에서 하고,
+    파일 쓰기(임시 파일 + 교체)는 asyncio.to_thread로 넘겨 이벤트 루프를 막지 않습니다.
+    """
+    import asyncio
+    html_text = "".join(render_wiki_page(event_title, detailed_articles, in_progress=in_progress,
+                                         stylesheet_href=stylesheet_href, index_href=index_href,
+                                         section_cache=section_cache))
+    await asyncio.to_thread(write_atomic, output_file, html_text, precompress)
+    return html_text
+
+class IncrementalWikiWriter:
     """
+    스트리밍 생성 중 섹션 텍스트가 도착할 때마다 위키 페이지를 다시 써서,
+    전체 생성이 끝나기 전에도 도착한 섹션부터 바로 볼 수 있게 합니다.
+    update()는 여러 스레드에서 호출될 수 있으며, 최소 min_interval초 간격으로만 파일을 씁니다.
+    page_options는 generate_wiki_html에 그대로 전달됩니다 (stylesheet_href, index_href, section_cache, precompress).
+    """
+    def __init__(self, event_title, original_text, output_file="wiki.html", min_interval=0.5, **page_options):
+        self.event_title = event_title
+        self.original_text = original_text
+        self.output_file = output_file
+        self.min_interval = min_interval
+        self.page_options = page_options
+        self.articles = {}
+        self._last_write = 0.0
+        self._lock = threading.Lock()
     
-    footnotes_html = ""
-    if all_footnotes:
-        footnotes_html += "<div class='footnotes'><h2>각주</h2><ol>"
-        for idx, note in all_footnotes:
-            # 각주 항목에 원래 footnote 마커로 돌아가는 링크를 추가
-            footnotes_html += f'<li id="footnote-{idx}"><a href="#footnotemark-{idx}" style="text-decoration:none; color:#00aaff;">[{idx}]</a> {note}</li>'
-        footnotes_html += "</ol></div>"
+    def update(self, category, text):
+        with self._lock:
+            self.articles[category] = text
+            now = time.monotonic()
+            if now - self._last_write < self.min_interval:
+                return
+            self._last_write = now
+            generate_wiki_html(self.event_title, self.original_text, self.articles,
+                               output_file=self.output_file, in_progress=True, **self.page_options)
     
-    html = f"""<!DOCTYPE html>
-<html lang="ko">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>{event_title} - 생성형 위키</title>
-  <style>
-    body {{
-      font-family: 'Noto Sans KR', sans-serif;
-      background-color: #ffffff;
-      color: #333;
-      margin: 0;
-      padding: 0;
-      line-height: 1.6;
-    }}
-    .container {{
-      max-width: 800px;
-      margin: 0 auto;
-      padding: 20px;
-    }}
-    header {{
-      background-color: #2e7d32;
-      color: #fff;
-      padding: 20px;
-      text-align: center;
-    }}
-    header h1 {{
-      margin: 0;
-      font-size: 32px;
-    }}
-    .sub-title {{
-      text-align: center;
-      font-size: 26px;
-      margin: 20px 0;
-      color: #333;
-      background-color: #ffffff;
-      padding: 10px;
-      border: 1px solid #ccc;
-    }}
-    .toc {{
-      padding: 10px;
-      margin: 20px 0;
-      border-bottom: 1px solid #ccc;
-    }}
-    .toc ul {{
-      list-style: none;
-      padding-left: 0;
-    }}
-    .toc li {{
-      margin-bottom: 8px;
-    }}
-    .toc a {{
-      color: #007acc;
-      text-decoration: none;
-      font-weight: bold;
-    }}
-    section {{
-      margin-bottom: 30px;
-      padding: 20px;
-      border: 1px solid #81c784;
-      border-radius: 4px;
-      background-color: #ffffff;
-    }}
-    section h2 {{
-      margin-bottom: 15px;
-      border-bottom: 1px solid #c8e6c9;
-      padding-bottom: 5px;
-    }}
-    .footnotes {{
-      font-size: 14px;
-      color: #555;
-      border-top: 1px solid #ccc;
-      padding-top: 10px;
-    }}
-    .footnotes ol {{
-      padding-left: 20px;
-    }}
-    footer {{
-      text-align: center;
-      font-size: 14px;
-      color: #555;
-      margin-top: 30px;
-      padding: 20px;
-      border-top: 1px solid #ccc;
-    }}
-  </style>
-</head>
-<body>
-  <div class="container">
-    <header>
-      <h1>생성형 위키</h1>
-    </header>
-    <div class="sub-title">{event_title}</div>
-    {toc_html}
-    {section_html}
-    {footnotes_html}
-    <footer>
-      <p>© 2025 생성형 위키. All rights reserved.</p>
-    </footer>
-  </div>
-</body>
-</html>
-"""
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html)
-    return html
+    def finish(self, detailed_articles):
+        """완성된 전체 문서로 마지막 페이지를 씁니다 (자동 새로고침 제거)."""
+        with self._lock:
+            self.articles = dict(detailed_articles)
+            return generate_wiki_html(self.event_title, self.original_text, self.articles,
+                                      output_file=self.output_file, **self.page_options)
 
 if __name__ == "__main__":
     # 테스트 예시
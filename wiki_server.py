@@ -0,0 +1,292 @@
+# wiki_server.py
+"""
+생성된 위키 사이트(wiki_site)를 HTTP로 제공하는 내장 서버입니다.
+
+- 사이트 폴더 바로 아래의 페이지(<slug>.html, index.html)와 공유 스타일시트(wiki.css)만 제공합니다
+  (data/, manifest.json, 검색 색인은 제공하지 않음).
+- 클라이언트가 gzip을 받으면 생성할 때 미리 압축해 둔 <파일>.gz를 그대로 보냅니다 (요청마다 압축하지 않음).
+  .gz가 없거나 원본보다 오래되었으면 원본을 보냅니다.
+- 응답마다 ETag와 Last-Modified를 붙이고, If-None-Match / If-Modified-Since가 맞으면 304로 본문 없이 응답합니다.
+  페이지는 no-cache(매번 확인, 생성 중인 페이지가 바뀔 수 있음), 내용 해시가 붙은 스타일시트 주소
+  (wiki.css?v=<해시>)는 1년 동안 immutable로 캐시하게 합니다.
+- 파일 내용은 메모리에 읽어 두고 요청마다 stat만 확인해 다시 씁니다. 파일은 읽는 동안만 열고 바로 닫으므로
+  (mmap이나 열린 핸들을 요청 사이에 유지하지 않음), 같은 프로세스의 GUI가 보고 있는 페이지를 다시 생성해도
+  Windows에서 os.replace가 막히지 않습니다. 교체된 파일(inode, 크기, 수정 시각이 다름)은 다시 읽고,
+  읽어 둔 내용의 합계가 max_bytes를 넘으면 가장 오래 쓰지 않은 파일부터 버립니다.
+- HTTP/1.1 keep-alive로 연결을 재사용하며 연결마다 스레드 하나로 처리합니다.
+
+사용법:
+    python wiki_server.py --site site --host 0.0.0.0 --port 8000
+"""
+import argparse
+import email.utils
+import os
+import stat
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import wiki_site
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+}
+# 페이지는 매번 ETag로 확인하고, 내용 해시가 붙은 스타일시트 주소는 바뀌지 않으므로 오래 캐시
+PAGE_CACHE_CONTROL = "no-cache"
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 읽어 둔 파일 내용의 합계 한도 (페이지 하나는 gzip 사본 포함 수십~수백 KB)
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+class CachedFile:
+    """읽어 둔 파일 하나의 내용과 검증에 쓰는 메타데이터 (읽은 파일의 fstat 기준)"""
+    def __init__(self, path):
+        # 읽는 동안만 열어 둠 (Windows에서 열린 파일은 교체할 수 없음)
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.data = f.read()
+        self.key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        self.size = len(self.data)
+        self.mtime_ns = st.st_mtime_ns
+        self.etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        self.last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        self._version = None
+
+    def version(self):
+        """내용 해시 (wiki_site.asset_version). 처음 필요할 때 한 번 계산합니다."""
+        if self._version is None:
+            self._version = wiki_site.asset_version(self.data)
+        return self._version
+
+class FileCache:
+    """
+    경로별 CachedFile 캐시입니다 (LRU, 내용 합계 max_bytes 이하). 파일이 교체되었으면(inode, 크기, 수정 시각) 다시 읽습니다.
+    이전 내용은 참조만 버리므로, 그 내용을 보내는 중인 다른 스레드의 응답은 그대로 끝납니다.
+    """
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """path의 CachedFile. 없거나 일반 파일이 아니면 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            with self._lock:
+                self._discard_locked(path)
+            return None
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached.key == (st.st_ino, st.st_size, st.st_mtime_ns):
+                self._files.move_to_end(path)
+                return cached
+        try:
+            cached = CachedFile(path)
+        except OSError:
+            return None
+        if cached.size > self.max_bytes:
+            return cached
+        with self._lock:
+            self._discard_locked(path)
+            self._files[path] = cached
+            self._bytes += cached.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._files.popitem(last=False)
+                self._bytes -= evicted.size
+        return cached
+
+    def _discard_locked(self, path):
+        cached = self._files.pop(path, None)
+        if cached is not None:
+            self._bytes -= cached.size
+
+def accepts_gzip(header):
+    """Accept-Encoding 헤더가 gzip을 허용하는지 (q=0은 거부)"""
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+def _etag_matches(header, etags):
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+def _not_modified_since(header, mtime_ns):
+    try:
+        since = email.utils.parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None or since.tzinfo is None:
+        return False
+    return mtime_ns // 10 ** 9 <= since.timestamp()
+
+class WikiRequestHandler(BaseHTTPRequestHandler):
+    server_version = "WikiServer/1.0"
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 따로 보내므로, 작은 응답이 Nagle 알고리즘과 지연 ACK 때문에 늦어지지 않게 함
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def resolve(self):
+        """요청 경로를 (사이트 폴더 안의 파일 경로, 쿼리) 로 바꿉니다. 제공하지 않는 경로면 (None, None)"""
+        parts = urlsplit(self.path)
+        name = unquote(parts.path).lstrip("/") or wiki_site.INDEX
+        # 사이트 폴더 바로 아래의 페이지와 스타일시트만 제공 (하위 폴더, 숨김 파일, 상위 경로,
+        # Windows의 드라이브 상대 경로(C:x.html)나 스트림 이름(a.html:b) 불가)
+        if "/" in name or "\\" in name or ":" in name or name.startswith(".") or "\0" in name:
+            return None, None
+        if os.path.splitext(name)[1] not in CONTENT_TYPES:
+            return None, None
+        path = os.path.abspath(os.path.join(self.server.site_dir, name))
+        if os.path.dirname(path) != self.server.site_dir:
+            return None, None
+        return path, parse_qs(parts.query)
+
+    def serve(self, send_body):
+        path, query = self.resolve()
+        original = self.server.files.get(path) if path else None
+        if original is None:
+            self.send_error(404)
+            return
+        served, encoding = original, None
+        if accepts_gzip(self.headers.get("Accept-Encoding", "")):
+            compressed = self.server.files.get(path + ".gz")
+            # 원본보다 먼저 쓰인 .gz는 아직 갱신되지 않은 이전 내용
+            if compressed is not None and compressed.mtime_ns >= original.mtime_ns:
+                served, encoding = compressed, "gzip"
+        etag = original.etag if encoding is None else original.etag[:-1] + '-gz"'
+
+        cache_control = PAGE_CACHE_CONTROL
+        if os.path.basename(path) == wiki_site.STYLESHEET and query.get("v") == [original.version()]:
+            cache_control = ASSET_CACHE_CONTROL
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, (original.etag, original.etag[:-1] + '-gz"'))
+        else:
+            if_modified_since = self.headers.get("If-Modified-Since")
+            not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, original.mtime_ns)
+
+        self.send_response(304 if not_modified else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", original.last_modified)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", CONTENT_TYPES[os.path.splitext(path)[1]])
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(served.size))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(served.data)
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # 응답 도중 클라이언트가 연결을 끊은 경우는 기록하지 않음
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+class WikiServer:
+    """
+    site_dir을 제공하는 HTTP 서버입니다. start()는 백그라운드 스레드에서, serve_forever()는 현재 스레드에서 실행합니다.
+    port=0이면 빈 포트를 골라 씁니다 (port 속성으로 확인).
+    """
+    def __init__(self, site_dir=wiki_site.DEFAULT_SITE_DIR, host=DEFAULT_HOST, port=DEFAULT_PORT, quiet=False):
+        self.site_dir = os.path.abspath(site_dir)
+        self.httpd = _HTTPServer((host, port), WikiRequestHandler)
+        self.httpd.site_dir = self.site_dir
+        self.httpd.files = FileCache()
+        self.httpd.quiet = quiet
+        self.host = host
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self):
+        # 모든 주소에서 받는 경우에도 이 컴퓨터에서 열 주소는 localhost
+        host = "127.0.0.1" if self.host in ("", "0.0.0.0") else self.host
+        return f"http://{host}:{self.port}/"
+
+    def url_for(self, path):
+        """사이트 폴더 안 파일(path)의 주소. 제공하지 않는 파일이면 None"""
+        path = os.path.abspath(path)
+        if os.path.dirname(path) != self.site_dir:
+            return None
+        return self.url + quote(os.path.basename(path))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="wiki_server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="생성된 위키 사이트를 HTTP로 제공합니다.")
+    parser.add_argument("--site", default=wiki_site.DEFAULT_SITE_DIR, help=f"사이트 폴더 (기본: {wiki_site.DEFAULT_SITE_DIR})")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"받을 주소 (기본: {DEFAULT_HOST}, 팀에 공유하려면 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"포트 (기본: {DEFAULT_PORT})")
+    parser.add_argument("--quiet", action="store_true", help="요청 로그를 출력하지 않음")
+    args = parser.parse_args(argv)
+
+    wiki_site.ensure_site(args.site)
+    server = WikiServer(args.site, args.host, args.port, quiet=args.quiet)
+    print(f"{server.site_dir}를 {server.url} 에서 제공합니다 (Ctrl+C로 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# wiki_site.py
+"""
+사건마다 별도 페이지를 만드는 정적 사이트 출력입니다.
+
+<사이트 폴더>/
+    wiki.css            모든 페이지가 공유하는 스타일시트 (페이지는 내용 해시를 붙인 wiki.css?v=<해시>로 링크)
+    index.html          문서 목록
+    manifest.json       문서 목록의 원본 ({slug: {"title", "updated_at"}})
+    search.sqlite3      전문 검색 색인 (search_index)
+    <slug>.html         사건 페이지 (slug는 위 파일/폴더 이름과 겹치지 않음, slugify 참고)
+    data/<slug>.json    페이지를 다시 렌더링할 때 쓰는 원본 (제목, 입력 텍스트, 키워드, 섹션 원문)과 중간 결과:
+                        입력 해시(keywords_input, article_inputs), 섹션별 렌더링 조각(sections)
+    *.html.gz, wiki.css.gz  페이지, 문서 목록, 스타일시트를 생성할 때 미리 압축해 둔 사본 (wiki_server가 그대로 보냄)
+
+같은 사건을 다시 생성할 때는 저장된 입력 해시와 비교하여 바뀐 카테고리만 LLM으로 다시 생성하고,
+바뀐 섹션만 다시 렌더링합니다 (llm_to_wiki.expand_event_incremental, wiki.render_section).
+
+모든 파일은 임시 파일에 쓴 뒤 교체합니다.
+저장된 글 전체를 여러 프로세스에서 다시 렌더링하려면:
+    python wiki_site.py build --site site --workers 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from urllib.parse import quote
+
+import search_index
+import wiki
+
+DEFAULT_SITE_DIR = "site"
+STYLESHEET = "wiki.css"
+INDEX = "index.html"
+MANIFEST = "manifest.json"
+DATA_DIR = "data"
+
+def asset_version(data):
+    """공유 스타일시트 주소에 붙이는 내용 해시. 내용이 바뀌면 주소가 바뀌므로 브라우저가 오래 캐시해도 됩니다."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:10]
+
+STYLESHEET_HREF = f"{STYLESHEET}?v={asset_version(wiki.WIKI_CSS)}"
+
+# 사이트 페이지는 인라인 CSS 대신 공유 스타일시트를 링크하고 문서 목록으로 가는 링크를 가지며, gzip 사본을 함께 씁니다.
+PAGE_OPTIONS = {"stylesheet_href": STYLESHEET_HREF, "index_href": INDEX, "precompress": True}
+
+_SAFE_SLUG_RE = re.compile(r"^[a-z0-9][a-z0-9_\-]{0,79}$")
+_UNSAFE_RE = re.compile(r"[^\w\-]+")
+# 그대로 쓰면 사이트 파일(<slug>.html이 index.html 등)과 겹치거나 Windows에서 파일 이름으로 쓸 수 없는 slug
+RESERVED_SLUGS = frozenset(
+    [os.path.splitext(name)[0] for name in (INDEX, STYLESHEET, MANIFEST, search_index.INDEX_FILE)] + [DATA_DIR]
+    + ["con", "prn", "aux", "nul"] + [f"{port}{i}" for port in ("com", "lpt") for i in range(1, 10)]
+)
+_manifest_lock = threading.Lock()
+
+def slugify(text):
+    """
+    제목(또는 id)으로 안정적인 파일 이름을 만듭니다. 같은 제목은 항상 같은 slug가 됩니다.
+    이미 소문자 영숫자 slug이면 그대로 쓰고, 그 외에는 안전한 문자만 남긴 뒤
+    원문 해시를 붙여 대소문자만 다른 제목끼리도 (대소문자를 구분하지 않는 파일 시스템에서) 겹치지 않게 합니다.
+    RESERVED_SLUGS("index" 등)도 해시를 붙이므로 사건 페이지가 문서 목록이나 다른 사이트 파일을 덮어쓰지 않습니다.
+    slug에는 "."이 들어가지 않으므로 .gz, .css, .json 이름과도 겹치지 않습니다.
+    """
+    if _SAFE_SLUG_RE.match(text) and text not in RESERVED_SLUGS:
+        return text
+    normalized = unicodedata.normalize("NFC", text).strip().lower()
+    base = _UNSAFE_RE.sub("-", normalized).strip("-_")[:60]
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+    return f"{base}-{digest}" if base else digest
+
+def page_path(site_dir, slug):
+    return os.path.join(site_dir, f"{slug}.html")
+
+def data_path(site_dir, slug):
+    return os.path.join(site_dir, DATA_DIR, f"{slug}.json")
+
+def ensure_site(site_dir):
+    """
+    사이트 폴더와 공유 스타일시트를 준비합니다. 스타일시트는 내용이 바뀌었거나 gzip 사본이 없는 경우에만 다시 쓰고,
+    문서 목록이 없으면 manifest.json(없으면 빈 목록)으로 만듭니다.
+    """
+    os.makedirs(os.path.join(site_dir, DATA_DIR), exist_ok=True)
+    if not os.path.exists(os.path.join(site_dir, INDEX)):
+        with _manifest_lock:
+            write_index(site_dir, _read_manifest(site_dir))
+    css_path = os.path.join(site_dir, STYLESHEET)
+    try:
+        with open(css_path, "r", encoding="utf-8") as f:
+            if f.read() == wiki.WIKI_CSS and os.path.exists(css_path + ".gz"):
+                return
+    except OSError:
+        pass
+    wiki.write_atomic(css_path, wiki.WIKI_CSS, precompress=True)
+
+def save_article(site_dir, slug, title, text, keywords, articles, **artifacts):
+    """
+    페이지를 다시 렌더링할 수 있도록 글의 원본을 data/<slug>.json에 저장하고, 검색 색인에서 이 글만 갱신합니다.
+    artifacts: 다음 실행에서 재사용할 중간 결과 (keywords_input, article_inputs, sections)
+    """
+    record = {
+        "slug": slug,
+        "title": title,
+        "text": text,
+        "keywords": keywords,
+        "articles": articles,
+        "updated_at": time.time(),
+    }
+    record.update(artifacts)
+    wiki.write_atomic(data_path(site_dir, slug), json.dumps(record, ensure_ascii=False, indent=2))
+    search_index.add_record(site_dir, record, page_path(site_dir, slug))
+    return record
+
+def load_article(site_dir, slug):
+    with open(data_path(site_dir, slug), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def find_article(site_dir, slug):
+    """저장된 글이 있으면 반환하고, 없거나 읽을 수 없으면 None (처음부터 생성)"""
+    try:
+        return load_article(site_dir, slug)
+    except (OSError, ValueError):
+        return None
+
+def render_article(site_dir, record, section_cache=None):
+    """저장된 원본으로 사건 페이지를 렌더링하고 파일 경로를 반환합니다."""
+    output_file = page_path(site_dir, record["slug"])
+    wiki.generate_wiki_html(record["title"], record["text"], record["articles"],
+                            output_file=output_file, section_cache=section_cache, **PAGE_OPTIONS)
+    return output_file
+
+def publish(site_dir, slug, title, text, keywords, articles, previous=None, **artifacts):
+    """
+    페이지 렌더링과 원본 저장을 함께 합니다. 문서 목록은 update_index로 따로 갱신합니다.
+    previous(지난번에 저장된 글)가 주어지면 그 섹션 조각을 재사용하여 바뀐 섹션만 다시 렌더링합니다.
+    """
+    ensure_site(site_dir)
+    sections = dict((previous or {}).get("sections", {}))
+    record = {"slug": slug, "title": title, "text": text, "articles": articles}
+    output_file = render_article(site_dir, record, section_cache=sections)
+    save_article(site_dir, slug, title, text, keywords, articles, sections=sections, **artifacts)
+    return output_file
+
+def _read_manifest(site_dir):
+    try:
+        with open(os.path.join(site_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_index(site_dir, manifest):
+    """manifest로 manifest.json과 index.html(최근 수정 순)을 씁니다."""
+    wiki.write_atomic(os.path.join(site_dir, MANIFEST), json.dumps(manifest, ensure_ascii=False, indent=2))
+    ordered = sorted(manifest.items(), key=lambda item: item[1].get("updated_at", 0), reverse=True)
+    entries = [(entry["title"], quote(f"{slug}.html")) for slug, entry in ordered]
+    wiki.write_atomic(os.path.join(site_dir, INDEX), "".join(wiki.render_index_page(entries, STYLESHEET_HREF)),
+                      precompress=True)
+
+def update_index(site_dir, pages):
+    """
+    문서 목록에 pages({slug: 제목})를 추가/갱신합니다.
+    같은 프로세스의 여러 스레드(GUI, 배치)에서 호출할 수 있습니다.
+    """
+    if not pages:
+        return
+    now = time.time()
+    with _manifest_lock:
+        manifest = _read_manifest(site_dir)
+        for slug, title in pages.items():
+            manifest[slug] = {"title": title, "updated_at": now}
+        write_index(site_dir, manifest)
+
+def stored_slugs(site_dir):
+    directory = os.path.join(site_dir, DATA_DIR)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json"))
+
+def _render_stored(site_dir, slug):
+    # 작업 프로세스에서 실행됩니다 (pickle 가능한 최상위 함수)
+    record = load_article(site_dir, slug)
+    render_article(site_dir, record)
+    return slug, record["title"], record.get("updated_at", 0)
+
+def _migrate_reserved(site_dir):
+    """이전 버전이 예약된 slug로 저장한 글을 slugify가 지금 만드는 slug로 옮깁니다 (다시 생성하면 쓰일 곳)."""
+    for slug in stored_slugs(site_dir):
+        if slug not in RESERVED_SLUGS:
+            continue
+        record = load_article(site_dir, slug)
+        record["slug"] = slugify(slug)
+        wiki.write_atomic(data_path(site_dir, record["slug"]), json.dumps(record, ensure_ascii=False, indent=2))
+        os.remove(data_path(site_dir, slug))
+        search_index.get_index(site_dir).remove(slug)
+        search_index.add_record(site_dir, record, page_path(site_dir, record["slug"]))
+
+def build_site(site_dir=DEFAULT_SITE_DIR, workers=None):
+    """
+    data/에 저장된 모든 글을 다시 렌더링하고 문서 목록을 새로 만듭니다.
+    렌더링은 CPU 작업이므로 workers개 프로세스에 나누어 실행합니다 (기본: CPU 수, 1이면 현재 프로세스).
+    Returns:
+        다시 렌더링한 페이지 수
+    """
+    ensure_site(site_dir)
+    _migrate_reserved(site_dir)
+    slugs = stored_slugs(site_dir)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(slugs) <= 1:
+        results = [_render_stored(site_dir, slug) for slug in slugs]
+    else:
+        # multiprocessing은 import가 무거우므로 전체 재생성 때만 가져옴 (GUI/배치 시작 시간에서 제외)
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(slugs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_render_stored, [site_dir] * len(slugs), slugs, chunksize=chunksize))
+    manifest = {slug: {"title": title, "updated_at": updated_at} for slug, title, updated_at in results}
+    with _manifest_lock:
+        write_index(site_dir, manifest)
+    return len(results)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="사건별 위키 페이지로 이루어진 정적 사이트를 관리합니다.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="저장된 모든 글을 여러 프로세스에서 다시 렌더링하고 목록을 새로 만듭니다.")
+    build.add_argument("--site", default=DEFAULT_SITE_DIR, help=f"사이트 폴더 (기본: {DEFAULT_SITE_DIR})")
+    build.add_argument("--workers", type=int, default=None, help="렌더링 프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = build_site(args.site, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{count}개 페이지를 {elapsed:.2f}s에 렌더링했습니다 ({count / elapsed if elapsed else 0:.0f} pages/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())